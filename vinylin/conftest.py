@@ -0,0 +1,17 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    """
+    Every test starts with an empty cache of its own. A cache that
+    misses on every read, like an unreachable Redis, would hide stale
+    cached responses.
+    """
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+    cache.clear()
@@ -1,8 +1,42 @@
 from django.contrib import admin
 
 from .models import Cart, Order, OrderItem
+from store.pagination import EstimatedCountPaginator
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'status', 'total_price', 'created_at')
+    list_display_links = ('id', 'user')
+    list_filter = ('status',)
+    list_select_related = ('user',)
+    # Trigram indexed (users 0005)
+    search_fields = ('user__email',)
+    raw_id_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(OrderItem)
+class OrderItemAdmin(admin.ModelAdmin):
+    list_display = ('id', 'order', 'product', 'quantity')
+    list_display_links = ('id', 'order')
+    # Trigram indexed (store 0016)
+    search_fields = ('product__title', 'product__part_number')
+    raw_id_fields = ('cart', 'order', 'product')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        """
+        The manager already selects related rows, so list_select_related
+        would be ignored. Its prefetches are only rendered by the API.
+        """
+        return (
+            super().get_queryset(request)
+                   .select_related('order__user')
+                   .prefetch_related(None)
+        )
 
 
 admin.site.register(Cart)
-admin.site.register(Order)
-admin.site.register(OrderItem)
@@ -0,0 +1,70 @@
+from django.conf import settings
+from redis import Redis
+
+
+CART_KEY = 'cart:{cart_id}'
+# Lines of a cart left alone this long expire, in seconds
+CART_TIMEOUT = 60 * 60 * 24 * 30
+
+# Quantities by product id of every cart, one hash each, written
+# instead of cart items when settings.REDIS_CART is on
+carts = Redis.from_url(
+    settings.CART_REDIS_URL,
+    socket_connect_timeout=0.5,
+    socket_timeout=0.5,
+)
+
+
+def read_cart(cart_id):
+    """Quantities of the lines of the cart by product id"""
+    return from_hash(carts.hgetall(CART_KEY.format(cart_id=cart_id)))
+
+
+def add_to_cart(cart_id, product_id, quantity):
+    """
+    Adds `quantity` to the line of the product and returns the new
+    quantity. A line is dropped when it is no longer positive, so the
+    returned quantity may be below zero.
+    """
+    key = CART_KEY.format(cart_id=cart_id)
+    with carts.pipeline(transaction=True) as pipe:
+        pipe.hincrby(key, product_id, quantity)
+        pipe.expire(key, CART_TIMEOUT)
+        quantity, _ = pipe.execute()
+    if quantity <= 0:
+        carts.hdel(key, product_id)
+    return quantity
+
+
+def remove_from_cart(cart_id, product_id):
+    return carts.hdel(CART_KEY.format(cart_id=cart_id), product_id)
+
+
+def take_cart(cart_id):
+    """
+    Reads and deletes the lines of the cart at once, so lines added
+    meanwhile stay for the next checkout
+    """
+    key = CART_KEY.format(cart_id=cart_id)
+    with carts.pipeline(transaction=True) as pipe:
+        pipe.hgetall(key)
+        pipe.delete(key)
+        lines, _ = pipe.execute()
+    return from_hash(lines)
+
+
+def restore_cart(cart_id, lines):
+    """Adds taken lines back, e.g. when they could not be written"""
+    key = CART_KEY.format(cart_id=cart_id)
+    with carts.pipeline(transaction=True) as pipe:
+        for product_id, quantity in lines.items():
+            pipe.hincrby(key, product_id, quantity)
+        pipe.expire(key, CART_TIMEOUT)
+        pipe.execute()
+
+
+def from_hash(values):
+    return {
+        int(product_id): int(quantity)
+        for product_id, quantity in values.items()
+    }
@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from hashlib import md5
+
+from django.db.models import Count, Max
+
+from orders.models import Order
+from vinyl.cache import get_catalog_modified_at, get_catalog_version
+
+
+def orders_last_modified(request, *args, **kwargs):
+    return _get_orders_state(request).get('last_modified')
+
+
+def orders_etag(request, *args, **kwargs):
+    """
+    The count also changes the tag when an order is deleted. Orders show
+    their products, so any change of the catalog changes it too.
+    """
+    state = _get_orders_state(request)
+    if not state.get('count'):
+        return None
+    return md5(
+        f'{request.user.pk}:{state["count"]}:{state["last_modified"]}:'
+        f'{get_catalog_version()}'.encode()
+    ).hexdigest()
+
+
+def _get_orders_state(request):
+    if not hasattr(request, '_orders_state'):
+        state = (
+            Order.objects.filter(user=request.user)
+                         .aggregate(count=Count('pk'),
+                                    last_modified=Max('updated_at'))
+        )
+        if state['count']:
+            catalog_modified_at = datetime.fromtimestamp(
+                get_catalog_modified_at(), timezone.utc
+            )
+            state['last_modified'] = max(state['last_modified'],
+                                         catalog_modified_at)
+        request._orders_state = state
+    return request._orders_state
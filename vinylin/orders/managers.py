@@ -1,4 +1,6 @@
-from django.db.models import Manager, DecimalField, F, Q, Case, When
+from django.db.models import Manager
+
+from store.pricing import line_price_expression, unit_price_expression
 
 
 class OrderItemManager(Manager):
@@ -7,24 +9,11 @@ class OrderItemManager(Manager):
         queryset = self.annotate_final_price(queryset)
         return queryset
 
-    def annotate_final_price(self, queryset):
-        price = F('product__price')
-        quantity = F('quantity')
-        discount_amount = F('product__discount__amount')
-        discount_amount_not_null = Q(product__discount__amount__isnull=False)
-        # Used to convert the discount percentage to a decimal fraction
-        dec = self.get_decimal(0.01)
-
+    @staticmethod
+    def annotate_final_price(queryset):
         return queryset.annotate(
-            final_price=Case(
-                When(
-                    product__discount__amount=None,
-                    then=price * quantity
-                ),
-                When(
-                    product__discount__amount=discount_amount_not_null,
-                    then=(price * (1 - (discount_amount * dec))) * quantity)
-            )
+            unit_price=unit_price_expression(prefix='product__'),
+            final_price=line_price_expression(prefix='product__'),
         )
 
     @staticmethod
@@ -33,12 +22,6 @@ class OrderItemManager(Manager):
             queryset.select_related('product')
                     .select_related('product__discount')
                     .select_related('product__storage')
-                    .prefetch_related('product__images')
+                    .prefetch_related('product__images__renditions')
                     .prefetch_related('product__tags')
         )
-
-    @staticmethod
-    def get_decimal(value):
-        return DecimalField(
-            max_digits=6, decimal_places=2
-        ).clean(str(value), None)
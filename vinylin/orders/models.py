@@ -34,11 +34,14 @@ class Order(models.Model):
         ('DE', 'is_delivered'),
         ('CA', 'canceled'),
     ]
+    # Orders of these statuses have been paid for
+    COMPLETED_STATUSES = ('PA', 'ODE', 'DE')
 
     user = models.ForeignKey(to=User, null=True, on_delete=models.SET_NULL)
     status = models.CharField(max_length=5, choices=STATUS_CHOICES)
     total_price = models.DecimalField(max_digits=7, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'({self.pk}) {self.user} Order'
@@ -1,10 +1,43 @@
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db.models import QuerySet, F, Sum, DecimalField
+from django.db.models import QuerySet, F, Sum
 from django.db import transaction, connection
-from django.db.utils import IntegrityError
+from django.db.utils import DatabaseError, IntegrityError
+from redis.exceptions import RedisError
 
+from orders.carts import (
+    add_to_cart,
+    read_cart,
+    remove_from_cart,
+    restore_cart,
+    take_cart,
+)
 from orders.models import OrderItem, Order
 from orders.emails import OrderEmailMessage
+from store.availability import mirror_availability_on_commit
+from store.popularity import count_sales
+from store.pricing import to_decimal
+from store.models import Product, Storage
+from vinyl.cache import invalidate_catalog_cache_on_commit
+
+
+UPDATE_STORAGE_SQL = '''
+UPDATE {storage} ss SET
+    quantity = ss.quantity - oo.quantity,
+    updated_at = now()
+FROM {order_item} oo
+WHERE oo.cart_id = %s AND oo.product_id = ss.product_id
+'''.format(
+    storage=Storage._meta.db_table,
+    order_item=OrderItem._meta.db_table,
+)
+
+MERGE_CART_SQL = '''
+UPDATE {order_item} oo SET quantity = oo.quantity + c.quantity
+FROM (VALUES {values}) AS c (product_id, quantity)
+WHERE oo.cart_id = %s AND oo.product_id = c.product_id
+RETURNING oo.product_id
+'''.format(order_item=OrderItem._meta.db_table, values='{values}')
 
 
 class OrderItemService:
@@ -34,6 +67,44 @@ class OrderItemService:
                              .order_by('product_id')
         )
 
+    @property
+    def cart_lines(self):
+        """
+        Cart items to show. With the Redis cart, its lines are added to
+        the items kept in the database, e.g. while Redis was unavailable,
+        and their products are read by one query.
+        """
+        if not settings.REDIS_CART:
+            return self.cart_items
+        try:
+            lines = read_cart(self.cart.pk)
+        except RedisError:
+            lines = {}
+        if not lines:
+            return self.cart_items
+
+        item_ids = {}
+        for pk, product_id, quantity in (
+            self.cart_items.values_list('pk', 'product_id', 'quantity')
+        ):
+            item_ids[product_id] = pk
+            lines[product_id] = lines.get(product_id, 0) + quantity
+        products = (
+            Product.objects.select_related('discount', 'storage')
+                           .prefetch_related('images__renditions', 'tags')
+                           .in_bulk(lines)
+        )
+        return [
+            OrderItem(
+                pk=item_ids.get(product_id),
+                cart=self.cart,
+                product=products[product_id],
+                quantity=quantity,
+            )
+            for product_id, quantity in sorted(lines.items())
+            if quantity > 0 and product_id in products
+        ]
+
     @property
     def existing_order_items(self) -> QuerySet:
         return (
@@ -47,16 +118,32 @@ class OrderItemService:
         return self.add_or_update_cart_item(product_id, quantity)
 
     def add_or_update_cart_item(self, product_id, quantity):
+        if settings.REDIS_CART:
+            try:
+                return self._add_to_redis_cart(product_id, quantity)
+            except RedisError:
+                pass
         order_item, created_order_item = OrderItem.objects.get_or_create(
             cart=self.cart,
             order=None,
             product_id=product_id,
+            defaults={'quantity': quantity},
         )
         if not created_order_item:
             order_item.quantity = F('quantity') + quantity
             order_item.save()
         return order_item
 
+    def _add_to_redis_cart(self, product_id, quantity):
+        quantity = add_to_cart(self.cart.pk, product_id, quantity)
+        if quantity < 0:
+            # The rest is taken from an item kept in the database
+            self.change_cart_item_quantity(product_id, quantity)
+            OrderItem.objects.filter(cart=self.cart, product_id=product_id,
+                                     quantity__lte=0).delete()
+        return OrderItem(cart=self.cart, product_id=product_id,
+                         quantity=max(quantity, 0))
+
     def change_cart_item_quantity(self, product_id, quantity):
         return (
             OrderItem.objects.filter(cart=self.cart, product_id=product_id)
@@ -64,13 +151,76 @@ class OrderItemService:
         )
 
     def delete_cart_item(self, product_id):
+        if settings.REDIS_CART:
+            try:
+                remove_from_cart(self.cart.pk, product_id)
+            except RedisError:
+                pass
         return (
             OrderItem.objects.filter(cart=self.cart, product_id=product_id)
                              .delete()
         )
 
-    @transaction.atomic
     def create_order(self):
+        if settings.REDIS_CART and not self.flush_cart():
+            return None
+        return self._create_order()
+
+    def flush_cart(self):
+        """
+        Moves the lines of the Redis cart to cart items before checkout.
+        Lines are given back to Redis when they could not be written, an
+        unreachable Redis fails the checkout instead of ordering a part
+        of the cart.
+        """
+        try:
+            lines = take_cart(self.cart.pk)
+        except RedisError:
+            self.errors.update({'cart': ['Cart is unavailable, try again.']})
+            return False
+        if not lines:
+            return True
+
+        try:
+            with transaction.atomic():
+                self._merge_cart_lines(lines)
+        except DatabaseError:
+            restore_cart(self.cart.pk, lines)
+            raise
+        return True
+
+    def _merge_cart_lines(self, lines):
+        """
+        Adds the lines to the existing items by one UPDATE and creates
+        the rest by one INSERT. Lines of deleted products are dropped.
+        """
+        values = ', '.join(['(%s::bigint, %s::integer)'] * len(lines))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                MERGE_CART_SQL.format(values=values),
+                [value for line in lines.items() for value in line]
+                + [self.cart.pk],
+            )
+            merged = {row[0] for row in cursor.fetchall()}
+        new_lines = {
+            product_id: quantity
+            for product_id, quantity in lines.items()
+            if product_id not in merged and quantity > 0
+        }
+        product_ids = (
+            Product.objects.filter(pk__in=new_lines)
+                           .values_list('pk', flat=True)
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(cart=self.cart, product_id=product_id,
+                      quantity=new_lines[product_id])
+            for product_id in product_ids
+        ])
+        OrderItem.objects.filter(cart=self.cart, product_id__in=merged,
+                                 quantity__lte=0).delete()
+
+    @transaction.atomic
+    def _create_order(self):
         total_price = self._count_total_price(self.cart_items)
         discard_balance = self._discard_user_balance(
             self.user,
@@ -91,6 +241,12 @@ class OrderItemService:
         self.cart_items.update(order=order, cart=None)
 
         order_items = OrderItem.objects.filter(order=order)
+        sold = {}
+        for product_id, quantity in order_items.values_list('product_id',
+                                                            'quantity'):
+            sold[product_id] = sold.get(product_id, 0) + quantity
+        transaction.on_commit(lambda: count_sales(sold))
+        mirror_availability_on_commit(sold)
         self._send_order_mail(
             request=self.request,
             context={'order_items': order_items, 'total_price': total_price}
@@ -101,20 +257,13 @@ class OrderItemService:
     def _count_total_price(queryset):
         if not queryset.exists():
             return None
-        return round(
-            queryset.aggregate(Sum('final_price'))['final_price__sum'], 2
-        )
+        # Line prices are already rounded, so the sum is exact
+        return queryset.aggregate(Sum('final_price'))['final_price__sum']
 
     def _discard_user_balance(self, user, total_price):
         try:
             user_profile = user.profile
-            new_user_balance = float(user_profile.balance) - float(total_price)
-
-            decimal = DecimalField(max_digits=6, decimal_places=2)
-            new_user_balance = str(round(new_user_balance, 2))
-            new_user_balance = decimal.clean(new_user_balance,
-                                             model_instance=None)
-            user_profile.balance = new_user_balance
+            user_profile.balance -= to_decimal(total_price)
             user_profile.save()
             return user_profile
 
@@ -123,16 +272,14 @@ class OrderItemService:
             return None
 
     def _update_storage(self):
+        """
+        Takes every cart item from its stock by one UPDATE, the in-stock
+        flags of the products are kept by the triggers of the storage
+        """
         try:
             with connection.cursor() as cursor:
-                cursor.execute(
-                    f'UPDATE store_storage ss SET quantity=(quantity - ('
-                    f'SELECT oo.quantity FROM orders_orderitem oo '
-                    f'WHERE oo.cart_id={self.cart.pk})) '
-                    f'WHERE ss.product_id IN (SELECT oo.product_id '
-                    f'FROM orders_orderitem oo '
-                    f'WHERE oo.cart_id={self.cart.pk})'
-                )
+                cursor.execute(UPDATE_STORAGE_SQL, [self.cart.pk])
+            invalidate_catalog_cache_on_commit()
             return cursor.rowcount
         except IntegrityError:
             self.errors.update({'quantity': ['Not enough products in stock.']})
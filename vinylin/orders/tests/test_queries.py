@@ -0,0 +1,81 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from orders.models import Order, OrderItem
+from orders.tests.fixtures import orders_fixture
+from store.models import Discount, Image, Storage
+from users.models import User
+from vinyl.models import Vinyl
+
+
+@pytest.mark.usefixtures('orders_fixture')
+class OrderItemQueryBudgetTest(APITestCase):
+    """
+    Budgets include the user lookup of JWT authentication,
+    the cart lookup of OrderItemService and the Last-Modified
+    lookup of conditional requests
+    """
+    CART_QUERIES = 6
+    LIST_QUERIES = 8
+
+    def setUp(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {self.access_token}'
+        )
+
+    def add_cart_items(self, count, order=None):
+        for number in range(count):
+            vinyl = Vinyl.objects.create(
+                title=f'Title {number}',
+                price='10.00',
+                part_number=f'QB{order.pk if order else 0}-{number}',
+                vinyl_title=f'Vinyl Title {number}',
+            )
+            Storage.objects.create(product=vinyl, quantity=5)
+            Discount.objects.create(product=vinyl, amount=10)
+            Image.objects.create(product=vinyl, image='vinyl/images/a.jpg')
+            OrderItem.objects.create(
+                cart=None if order else self.user.cart,
+                order=order,
+                product=vinyl,
+            )
+
+    def test_show_cart(self):
+        self.add_cart_items(5)
+        with self.assertNumQueries(self.CART_QUERIES):
+            response = self.client.get('/api/orders/cart/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 6)
+
+    def test_list(self):
+        for _ in range(3):
+            order = Order.objects.create(
+                user=self.user,
+                status='PA',
+                total_price='10.00'
+            )
+            self.add_cart_items(3, order=order)
+
+        with self.assertNumQueries(self.LIST_QUERIES):
+            response = self.client.get('/api/orders/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 3)
+
+    def test_admin_changelists(self):
+        admin = User.objects.create_superuser(email='admin@mail.com',
+                                              password='DifficultPassword1')
+        self.client.force_login(admin)
+        for url in ('/admin/orders/order/', '/admin/orders/orderitem/'):
+            queries = []
+            for _ in range(2):
+                order = Order.objects.create(user=self.user, status='PA',
+                                             total_price='10.00')
+                self.add_cart_items(3, order=order)
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(url, {'q': 'e'})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                queries.append(len(context.captured_queries))
+            self.assertEqual(queries[0], queries[1], url)
@@ -1,12 +1,16 @@
+from decimal import Decimal
 from unittest.mock import patch
 
 import pytest
-from django.test import TestCase
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from redis.exceptions import RedisError
 
+from orders.carts import CART_KEY
 from orders.models import OrderItem, Order
 from orders.services import OrderItemService
 from orders.tests.fixtures import orders_fixture
-from store.models import Storage
+from store.models import Discount, Storage
 from users.models import Profile
 from vinyl.models import Vinyl
 
@@ -65,6 +69,16 @@ class OrderItemServiceTest(TestCase):
             self.order_item.quantity * self.order_item.product.price
         )
 
+    def test_discounted_total_price_is_charged(self):
+        Discount.objects.create(product=self.vinyl, amount=33)
+        total_price = self.service._count_total_price(self.service.cart_items)
+        # 10.00 * 0.67 = 6.70 per item, 10 items
+        self.assertEqual(total_price, Decimal('67.00'))
+
+        self.service._discard_user_balance(self.user, total_price)
+        self.assertEqual(Profile.objects.get(user=self.user).balance,
+                         Decimal('933.00'))
+
     def test_discard_user_balance(self):
         last_balance = self.user.profile.balance
         total_price = self.service._count_total_price(self.service.cart_items)
@@ -98,6 +112,24 @@ class OrderItemServiceTest(TestCase):
         storage_update = self.service._update_storage()
         self.assertIs(storage_update, None)
 
+    def test_update_storage_of_many_items(self):
+        new_vinyl_data = {**self.vinyl_data, 'part_number': '456DEF'}
+        new_vinyl = Vinyl.objects.create(**new_vinyl_data)
+        Storage.objects.create(product_id=new_vinyl.pk, quantity=3)
+        OrderItem.objects.create(cart=self.user.cart, product_id=new_vinyl.pk,
+                                 quantity=3)
+        quantity = Storage.objects.get(product_id=self.vinyl.pk).quantity
+
+        self.assertEqual(self.service._update_storage(), 2)
+        self.assertEqual(
+            Storage.objects.get(product_id=self.vinyl.pk).quantity,
+            quantity - self.order_item.quantity
+        )
+        self.assertEqual(Storage.objects.get(product_id=new_vinyl.pk).quantity,
+                         0)
+        new_vinyl.refresh_from_db(fields=['in_stock'])
+        self.assertIs(new_vinyl.in_stock, False)
+
     @staticmethod
     def mock_send_order_mail(request, context):
         return None
@@ -107,3 +139,156 @@ class OrderItemServiceTest(TestCase):
     def test_create_order(self):
         self.service.create_order()
         self.assertTrue(Order.objects.filter(user=self.user).exists())
+
+
+class FakeCarts:
+    """Hashes of the Redis cart kept in memory"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hgetall(self, key):
+        return {
+            str(field).encode(): str(value).encode()
+            for field, value in self.hashes.get(key, {}).items()
+        }
+
+    def hincrby(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        values[field] = values.get(field, 0) + amount
+        return values[field]
+
+    def hdel(self, key, *fields):
+        values = self.hashes.get(key, {})
+        return len([values.pop(field) for field in fields if field in values])
+
+    def delete(self, key):
+        return int(self.hashes.pop(key, None) is not None)
+
+    def expire(self, key, seconds):
+        return key in self.hashes
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args) for name, args in self.calls]
+
+
+@override_settings(REDIS_CART=True)
+@pytest.mark.usefixtures('orders_fixture')
+class RedisCartTest(TestCase):
+    def setUp(self):
+        self.user.profile.balance = 1000
+        self.user.profile.save()
+        self.new_vinyl = Vinyl.objects.create(
+            **{**self.vinyl_data, 'part_number': '456DEF'}
+        )
+        Storage.objects.create(product=self.new_vinyl, quantity=5)
+
+        self.carts = FakeCarts()
+        patcher = patch('orders.carts.carts', new=self.carts)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = OrderItemService(self.request)
+
+    @property
+    def lines(self):
+        key = CART_KEY.format(cart_id=self.user.cart.pk)
+        return self.carts.hashes.get(key)
+
+    def test_lines_are_kept_in_redis(self):
+        self.service.select_cart_item_modification(self.new_vinyl.pk, 3)
+        self.service.select_cart_item_modification(self.vinyl.pk, 2)
+        self.assertEqual(self.lines, {self.new_vinyl.pk: 3, self.vinyl.pk: 2})
+        self.assertFalse(
+            OrderItem.objects.filter(product=self.new_vinyl).exists()
+        )
+
+        # Lines are added to the items kept in the database
+        cart_lines = self.service.cart_lines
+        self.assertEqual(
+            [(item.pk, item.product_id, item.quantity)
+             for item in cart_lines],
+            [(self.order_item.pk, self.vinyl.pk, 12),
+             (None, self.new_vinyl.pk, 3)],
+        )
+
+        self.service.select_cart_item_modification(self.new_vinyl.pk, 0)
+        self.service.select_cart_item_modification(self.vinyl.pk, -2)
+        self.assertEqual(self.lines, {})
+
+    def test_removed_quantity_offsets_database_item(self):
+        self.service.add_or_update_cart_item(self.vinyl.pk, 2)
+        self.service.add_or_update_cart_item(self.vinyl.pk, -5)
+        self.assertEqual(self.lines, {})
+        self.assertEqual(
+            OrderItem.objects.get(pk=self.order_item.pk).quantity, 7
+        )
+
+        # Nothing negative is kept to offset later additions
+        self.service.add_or_update_cart_item(self.new_vinyl.pk, -2)
+        self.service.add_or_update_cart_item(self.new_vinyl.pk, 1)
+        self.assertEqual(self.lines, {self.new_vinyl.pk: 1})
+
+        self.service.add_or_update_cart_item(self.vinyl.pk, -7)
+        self.assertFalse(
+            OrderItem.objects.filter(pk=self.order_item.pk).exists()
+        )
+
+    @patch('orders.services.OrderItemService._send_order_mail')
+    def test_create_order_flushes_lines(self, send_order_mail):
+        self.service.add_or_update_cart_item(self.new_vinyl.pk, 3)
+        self.service.add_or_update_cart_item(self.vinyl.pk, 2)
+
+        order_items = self.service.create_order()
+        self.assertEqual(self.service.errors, {})
+        self.assertEqual(
+            sorted(order_items.values_list('product_id', 'quantity')),
+            [(self.vinyl.pk, 12), (self.new_vinyl.pk, 3)],
+        )
+        self.assertIsNone(self.lines)
+        self.assertEqual(
+            Storage.objects.get(product=self.new_vinyl).quantity, 2
+        )
+
+    def test_failed_flush_gives_lines_back(self):
+        self.service.add_or_update_cart_item(self.new_vinyl.pk, 3)
+        with patch.object(OrderItemService, '_merge_cart_lines',
+                          side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.service.create_order()
+        self.assertEqual(self.lines, {self.new_vinyl.pk: 3})
+
+    def test_unavailable_redis(self):
+        with patch('orders.carts.carts') as carts:
+            carts.pipeline.side_effect = RedisError
+            carts.hgetall.side_effect = RedisError
+            carts.hdel.side_effect = RedisError
+
+            # Changes fall back to the database
+            self.service.add_or_update_cart_item(self.new_vinyl.pk, 3)
+            self.assertEqual(
+                OrderItem.objects.get(product=self.new_vinyl).quantity, 3
+            )
+            self.assertEqual(len(self.service.cart_lines), 2)
+
+            # Checkout does not order a part of the cart
+            self.assertIsNone(self.service.create_order())
+            self.assertIn('cart', self.service.errors)
+            self.assertFalse(Order.objects.filter(user=self.user).exists())
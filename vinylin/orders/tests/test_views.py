@@ -1,11 +1,14 @@
+import time
 from unittest.mock import patch
 
 import pytest
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from orders.models import Order, OrderItem
 from orders.services import OrderItemService
 from orders.tests.fixtures import orders_fixture
+from vinyl.models import Vinyl
 
 
 @pytest.mark.usefixtures('orders_fixture')
@@ -23,7 +26,7 @@ class OrderItemViewSetTest(APITestCase):
     def test_change_cart_item(self):
         invalid_response = self.client.patch(
             path='/api/orders/cart/',
-            data={'product': 100, 'quantity': 1},
+            data={'product': 0, 'quantity': 1},
             format='json'
         )
         self.assertEqual(invalid_response.status_code,
@@ -56,3 +59,41 @@ class OrderItemViewSetTest(APITestCase):
     def test_list(self):
         response = self.client.get('/api/orders/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_conditional_list(self):
+        order = Order.objects.create(
+            user=self.user,
+            status='PA',
+            total_price='10.00'
+        )
+        response = self.client.get('/api/orders/')
+        etag = response['ETag']
+
+        not_modified = self.client.get('/api/orders/',
+                                       HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+        order.status = 'ODE'
+        order.save()
+        modified = self.client.get('/api/orders/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(modified.status_code, status.HTTP_200_OK)
+
+    def test_conditional_list_after_price_change(self):
+        Order.objects.create(user=self.user, status='PA', total_price='10.00')
+        OrderItem.objects.filter(pk=self.order_item.pk).update(
+            order=Order.objects.get(user=self.user)
+        )
+        response = self.client.get('/api/orders/')
+
+        # Orders show the current price of their products
+        with patch('vinyl.cache.time.time', return_value=time.time() + 10):
+            with self.captureOnCommitCallbacks(execute=True):
+                Vinyl.objects.filter(pk=self.vinyl.pk).get().save()
+        modified = self.client.get('/api/orders/',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(modified.status_code, status.HTTP_200_OK)
+        modified = self.client.get(
+            '/api/orders/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(modified.status_code, status.HTTP_200_OK)
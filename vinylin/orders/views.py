@@ -1,9 +1,12 @@
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
+from orders.conditions import orders_etag, orders_last_modified
 from orders.serializers import (
     OrderItemSerializer,
     CartSerializer,
@@ -31,7 +34,7 @@ class OrderItemViewSet(ViewSet):
     @staticmethod
     def show_cart(request, *args, **kwargs):
         service = OrderItemService(request)
-        serializer = CartSerializer(service.cart_items, many=True)
+        serializer = CartSerializer(service.cart_lines, many=True)
         return Response(data=serializer.data, status=status.HTTP_200_OK)
 
     def change_cart_item(self, request, *args, **kwargs):
@@ -49,6 +52,8 @@ class OrderItemViewSet(ViewSet):
             return self.non_valid_response(service=service)
         return Response(data=serializer.data, status=status.HTTP_200_OK)
 
+    @method_decorator(condition(etag_func=orders_etag,
+                                last_modified_func=orders_last_modified))
     def list(self, request, *args, **kwargs):
         """Show all user`s orders"""
         service = OrderItemService(request)
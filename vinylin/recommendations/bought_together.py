@@ -0,0 +1,116 @@
+from django.db import connection, transaction
+
+from orders.models import Order, OrderItem
+from recommendations.models import CountedOrder, ProductPair, RelatedProduct
+
+
+RELATED_PRODUCTS_LIMIT = 10
+ORDERS_BATCH_SIZE = 5000
+
+COUNT_NEW_ORDERS_SQL = '''
+WITH new_orders AS (
+    INSERT INTO {counted_order} (order_id)
+    SELECT o.id FROM {order} o
+    WHERE o.status = ANY(%s)
+      AND NOT EXISTS (
+          SELECT 1 FROM {counted_order} c WHERE c.order_id = o.id
+      )
+    ORDER BY o.id
+    LIMIT %s
+    ON CONFLICT DO NOTHING
+    RETURNING order_id
+),
+items AS (
+    SELECT DISTINCT i.order_id, i.product_id
+    FROM {order_item} i
+    JOIN new_orders n ON n.order_id = i.order_id
+    WHERE i.product_id IS NOT NULL
+),
+pairs AS (
+    INSERT INTO {pair} (product_id, related_id, count)
+    SELECT a.product_id, b.product_id, COUNT(*)
+    FROM items a
+    JOIN items b ON b.order_id = a.order_id
+                AND b.product_id <> a.product_id
+    GROUP BY a.product_id, b.product_id
+    ON CONFLICT (product_id, related_id) DO UPDATE SET
+        count = {pair}.count + EXCLUDED.count
+    RETURNING product_id
+)
+SELECT (SELECT COUNT(*) FROM new_orders),
+       ARRAY(SELECT DISTINCT product_id FROM pairs)
+'''.format(
+    counted_order=CountedOrder._meta.db_table,
+    order=Order._meta.db_table,
+    order_item=OrderItem._meta.db_table,
+    pair=ProductPair._meta.db_table,
+)
+
+# Serializes re-ranking, a DELETE does not see the rows a concurrent
+# refresh inserts, so the INSERT after it would break the unique ranks
+LOCK_RELATED_SQL = '''
+SELECT pg_advisory_xact_lock('{related}'::regclass::oid::integer)
+'''.format(related=RelatedProduct._meta.db_table)
+
+DELETE_RELATED_SQL = '''
+DELETE FROM {related} WHERE product_id = ANY(%s)
+'''.format(related=RelatedProduct._meta.db_table)
+
+INSERT_RELATED_SQL = '''
+INSERT INTO {related} (product_id, related_id, count, rank)
+SELECT product_id, related_id, count, rank
+FROM (
+    SELECT product_id, related_id, count,
+           ROW_NUMBER() OVER (
+               PARTITION BY product_id ORDER BY count DESC, related_id
+           ) AS rank
+    FROM {pair}
+    WHERE product_id = ANY(%s)
+) ranked
+WHERE rank <= %s
+'''.format(
+    related=RelatedProduct._meta.db_table,
+    pair=ProductPair._meta.db_table,
+)
+
+
+def refresh_bought_together(batch_size=ORDERS_BATCH_SIZE,
+                            limit=RELATED_PRODUCTS_LIMIT):
+    """
+    Adds completed orders that are not counted yet to the co-occurrence
+    matrix and ranks neighbours again only for the products they contain.
+    Every batch of orders is counted by one statement in its own
+    transaction. An order is counted once, however many refreshes run
+    at the same time. Returns the number of counted orders.
+    """
+    counted = 0
+    while True:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(COUNT_NEW_ORDERS_SQL,
+                               [list(Order.COMPLETED_STATUSES), batch_size])
+                orders, product_ids = cursor.fetchone()
+                if product_ids:
+                    rank_related_products(cursor, product_ids, limit)
+        counted += orders
+        if orders < batch_size:
+            return counted
+
+
+def rebuild_bought_together(batch_size=ORDERS_BATCH_SIZE,
+                            limit=RELATED_PRODUCTS_LIMIT):
+    """
+    Counts every completed order again, e.g. after orders were canceled
+    or the limit of neighbours was changed
+    """
+    with transaction.atomic():
+        RelatedProduct.objects.all().delete()
+        ProductPair.objects.all().delete()
+        CountedOrder.objects.all().delete()
+        return refresh_bought_together(batch_size, limit)
+
+
+def rank_related_products(cursor, product_ids, limit):
+    cursor.execute(LOCK_RELATED_SQL)
+    cursor.execute(DELETE_RELATED_SQL, [product_ids])
+    cursor.execute(INSERT_RELATED_SQL, [product_ids, limit])
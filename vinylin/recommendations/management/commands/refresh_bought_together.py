@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recommendations.bought_together import (
+    ORDERS_BATCH_SIZE,
+    RELATED_PRODUCTS_LIMIT,
+    rebuild_bought_together,
+    refresh_bought_together,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Counts products bought together in completed orders that are not '
+        'counted yet and ranks related products of the products they contain'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Count every completed order again')
+        parser.add_argument('--batch-size', type=int,
+                            default=ORDERS_BATCH_SIZE)
+        parser.add_argument('--limit', type=int,
+                            default=RELATED_PRODUCTS_LIMIT,
+                            help='Related products kept per product')
+
+    def handle(self, *args, **options):
+        batch_size, limit = options['batch_size'], options['limit']
+        if batch_size < 1 or limit < 1:
+            raise CommandError('--batch-size and --limit must be positive')
+
+        refresh = (rebuild_bought_together if options['rebuild']
+                   else refresh_bought_together)
+        orders = refresh(batch_size=batch_size, limit=limit)
+        self.stdout.write(self.style.SUCCESS(f'Orders: {orders}'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recommendations.similarity import (
+    SIMILAR_VINYLS_LIMIT,
+    refresh_similar_vinyls,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Ranks similar vinyls again for vinyls whose genres, tags, artist '
+        'or country changed and for the vinyls the change reaches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Rank similar vinyls of every vinyl')
+        parser.add_argument('--limit', type=int,
+                            default=SIMILAR_VINYLS_LIMIT,
+                            help='Similar vinyls kept per vinyl')
+
+    def handle(self, *args, **options):
+        if options['limit'] < 1:
+            raise CommandError('--limit must be positive')
+
+        vinyls = refresh_similar_vinyls(limit=options['limit'],
+                                        rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(f'Vinyls: {vinyls}'))
@@ -0,0 +1,88 @@
+from django.db import models
+
+from orders.models import Order
+from store.models import Product
+
+
+class CountedOrder(models.Model):
+    """Completed order whose products are counted in ProductPair"""
+    order = models.OneToOneField(
+        to=Order,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+
+
+class ProductPair(models.Model):
+    """
+    Non-zero cell of the co-occurrence matrix: how many completed orders
+    contain both products. Every pair is stored in both directions.
+    """
+    product = models.ForeignKey(
+        to=Product,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    related = models.ForeignKey(
+        to=Product,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ['product', 'related']
+
+
+class RelatedProduct(models.Model):
+    """Top neighbours of a product in ProductPair, ranked from 1"""
+    product = models.ForeignKey(
+        to=Product,
+        on_delete=models.CASCADE,
+        related_name='related_products',
+    )
+    related = models.ForeignKey(
+        to=Product,
+        on_delete=models.CASCADE,
+        related_name='related_to',
+    )
+    count = models.PositiveIntegerField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['product', 'rank']
+        unique_together = ['product', 'rank']
+
+
+class SimilarProduct(models.Model):
+    """
+    Most similar vinyls of a vinyl by Jaccard similarity of their
+    genres, tags, artist and country, ranked from 1
+    """
+    product = models.ForeignKey(
+        to=Product,
+        on_delete=models.CASCADE,
+        related_name='similar_products',
+    )
+    related = models.ForeignKey(
+        to=Product,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+    )
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['product', 'rank']
+        unique_together = ['product', 'rank']
+
+
+class StaleSimilarity(models.Model):
+    """Vinyl whose features changed since similar vinyls were ranked"""
+    product = models.OneToOneField(
+        to=Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
@@ -0,0 +1,46 @@
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from recommendations.models import SimilarProduct
+from recommendations.similarity import mark_similarity_stale
+from store.models import Product, Tag
+from vinyl.models import Country, Genre, Vinyl
+
+
+@receiver(post_save, sender=Vinyl)
+def mark_saved_vinyl(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    mark_similarity_stale([instance.pk])
+
+
+@receiver(pre_delete, sender=Vinyl)
+def mark_vinyls_listing_deleted(sender, instance, **kwargs):
+    mark_similarity_stale(
+        SimilarProduct.objects.filter(related=instance)
+                              .values_list('product_id', flat=True)
+    )
+
+
+@receiver(pre_delete, sender=Country)
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Tag)
+def mark_vinyls_of_deleted(sender, instance, **kwargs):
+    """Vinyls lose the feature without a signal of their own"""
+    lookup = {Country: 'country', Genre: 'genres', Tag: 'tags'}[sender]
+    mark_similarity_stale(
+        Vinyl.objects.filter(**{lookup: instance})
+                     .values_list('pk', flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=Vinyl.genres.through)
+@receiver(m2m_changed, sender=Product.tags.through)
+def mark_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # Reverse clear does not report pk_set, so the vinyls are marked before
+    if action == 'pre_clear' and reverse:
+        mark_vinyls_of_deleted(type(instance), instance)
+    elif action in ('post_add', 'post_remove', 'post_clear') and not reverse:
+        mark_similarity_stale([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        mark_similarity_stale(pk_set)
@@ -0,0 +1,276 @@
+import heapq
+from collections import defaultdict
+from itertools import islice
+
+from django.db import connection, transaction
+
+from recommendations.models import SimilarProduct, StaleSimilarity
+from store.models import Product
+from vinyl.models import Vinyl
+
+
+SIMILAR_VINYLS_LIMIT = 10
+# Vinyls scored per vinyl, collected from its rarest features first
+MAX_CANDIDATES = 1000
+# Vinyls whose similar vinyls are inserted by one query
+WRITE_BATCH_SIZE = 500
+
+TAKE_STALE_SQL = '''
+DELETE FROM {stale} RETURNING product_id
+'''.format(stale=StaleSimilarity._meta.db_table)
+
+DELETE_SIMILAR_SQL = '''
+DELETE FROM {similar} WHERE product_id = ANY(%s)
+'''.format(similar=SimilarProduct._meta.db_table)
+
+
+def mark_similarity_stale(product_ids):
+    """Queues vinyls for the next refresh_similar_vinyls"""
+    StaleSimilarity.objects.bulk_create(
+        [StaleSimilarity(product_id=pk) for pk in set(product_ids)],
+        ignore_conflicts=True,
+    )
+
+
+# Newest vinyls of the features of the given vinyls, at most `limit`
+# per feature, with the number of vinyls of every feature
+POSTINGS_SQL = '''
+WITH postings (kind, value, vinyl_id) AS (
+    SELECT 'artist', artist_id, product_ptr_id FROM {vinyl}
+    WHERE artist_id = ANY(%(artists)s)
+    UNION ALL
+    SELECT 'country', country_id, product_ptr_id FROM {vinyl}
+    WHERE country_id = ANY(%(countries)s)
+    UNION ALL
+    SELECT 'genre', genre_id, vinyl_id FROM {vinyl_genres}
+    WHERE genre_id = ANY(%(genres)s)
+    UNION ALL
+    SELECT 'tag', pt.tag_id, pt.product_id FROM {product_tags} pt
+    JOIN {vinyl} v ON v.product_ptr_id = pt.product_id
+    WHERE pt.tag_id = ANY(%(tags)s)
+)
+SELECT kind, value, vinyl_id, size FROM (
+    SELECT kind, value, vinyl_id,
+           ROW_NUMBER() OVER (
+               PARTITION BY kind, value ORDER BY vinyl_id DESC
+           ) AS position,
+           COUNT(*) OVER (PARTITION BY kind, value) AS size
+    FROM postings
+) ranked
+WHERE position <= %(limit)s
+'''.format(
+    vinyl=Vinyl._meta.db_table,
+    vinyl_genres=Vinyl.genres.through._meta.db_table,
+    product_tags=Product.tags.through._meta.db_table,
+)
+
+
+def popcount(vector):
+    return bin(vector).count('1')
+
+
+class FeatureIndex:
+    """
+    Genres, tags, artist and country of vinyls as bit vectors, one bit
+    per feature, and an inverted index from every feature to its newest
+    vinyls with its number of vinyls. Only vinyls sharing a feature are
+    scored. Unless loaded for every vinyl, the index holds the vinyls
+    being ranked and their candidates only.
+    """
+
+    def __init__(self):
+        self.features = {}
+        self.vectors = {}
+        self.bits = {}
+        self.postings = {}
+        self.sizes = {}
+
+    @classmethod
+    def load(cls, pks=None):
+        """Index of the vinyls `pks` and their candidates, or of all"""
+        index = cls()
+        if pks is None:
+            index.load_features()
+            postings = defaultdict(list)
+            for pk in sorted(index.features):
+                for feature in index.features[pk]:
+                    postings[feature].append(pk)
+            index.postings.update(postings)
+            index.sizes.update(
+                (feature, len(pks)) for feature, pks in postings.items()
+            )
+        else:
+            index.extend(pks)
+        return index
+
+    def extend(self, pks):
+        """Adds the vinyls and every candidate they may be ranked with"""
+        self.load_features(pks)
+        features = {
+            feature
+            for pk in pks if pk in self.features
+            for feature in self.features[pk]
+            if feature not in self.postings
+        }
+        if not features:
+            return
+        params = {'artists': [], 'countries': [], 'genres': [], 'tags': [],
+                  'limit': MAX_CANDIDATES + 1}
+        kinds = {'artist': 'artists', 'country': 'countries',
+                 'genre': 'genres', 'tag': 'tags'}
+        for kind, value in features:
+            params[kinds[kind]].append(value)
+            self.postings[(kind, value)] = []
+            self.sizes[(kind, value)] = 0
+        with connection.cursor() as cursor:
+            cursor.execute(POSTINGS_SQL, params)
+            rows = cursor.fetchall()
+        for kind, value, pk, size in sorted(rows, key=lambda row: row[2]):
+            self.postings[(kind, value)].append(pk)
+            self.sizes[(kind, value)] = size
+        self.load_features({pk for kind, value, pk, size in rows})
+
+    def load_features(self, pks=None):
+        """Feature sets and vectors of the vinyls that are not loaded"""
+        vinyls = Vinyl.objects.order_by('pk')
+        genres = Vinyl.genres.through.objects.all()
+        tags = Product.tags.through.objects.all()
+        if pks is not None:
+            pks = [pk for pk in pks if pk not in self.features]
+            if not pks:
+                return
+            vinyls = vinyls.filter(pk__in=pks)
+            genres = genres.filter(vinyl_id__in=pks)
+            tags = tags.filter(product_id__in=pks)
+
+        features = {}
+        for pk, artist_id, country_id in vinyls.values_list('pk', 'artist_id',
+                                                            'country_id'):
+            features[pk] = set()
+            if artist_id is not None:
+                features[pk].add(('artist', artist_id))
+            if country_id is not None:
+                features[pk].add(('country', country_id))
+        # Vinyls created after the first read are left for the next refresh
+        for pk, genre_id in genres.values_list('vinyl_id', 'genre_id'):
+            if pk in features:
+                features[pk].add(('genre', genre_id))
+        for pk, tag_id in tags.values_list('product_id', 'tag_id'):
+            if pk in features:
+                features[pk].add(('tag', tag_id))
+
+        for pk, vinyl_features in features.items():
+            vector = 0
+            for feature in vinyl_features:
+                bit = self.bits.setdefault(feature, len(self.bits))
+                vector |= 1 << bit
+            self.features[pk] = frozenset(vinyl_features)
+            self.vectors[pk] = vector
+
+    def similarity(self, pk, other):
+        """Jaccard similarity of the feature vectors"""
+        return self.score(self.vectors[pk], [self.vectors[other]])[0]
+
+    @staticmethod
+    def score(vector, others):
+        """Jaccard similarity of a vector to each of a batch of vectors"""
+        size = popcount(vector)
+        scores = []
+        for other in others:
+            shared = popcount(vector & other)
+            scores.append(
+                shared / (size + popcount(other) - shared) if shared else 0.0
+            )
+        return scores
+
+    def candidates(self, pk):
+        """
+        Vinyls sharing a feature with the vinyl, except itself. Postings
+        of common features are cut to the newest vinyls that still fit.
+        """
+        candidates = set()
+        for feature in sorted(self.features[pk],
+                              key=lambda feature: self.sizes[feature]):
+            room = MAX_CANDIDATES + 1 - len(candidates)
+            if room <= 0:
+                break
+            candidates.update(self.postings[feature][-room:])
+        candidates.discard(pk)
+        return candidates
+
+    def rank(self, pk, limit):
+        """(vinyl id, score) of the most similar vinyls, best first"""
+        candidates = list(self.candidates(pk))
+        scores = self.score(self.vectors[pk],
+                            [self.vectors[other] for other in candidates])
+        # Older vinyls win ties
+        return heapq.nlargest(limit, zip(candidates, scores),
+                              key=lambda item: (item[1], -item[0]))
+
+
+def refresh_similar_vinyls(limit=SIMILAR_VINYLS_LIMIT, rebuild=False):
+    """
+    Ranks similar vinyls again for the stale vinyls, the vinyls that list
+    one of them and the vinyls one of them now gets into, or for every
+    vinyl on rebuild. Stale marks are taken in the same transaction, so
+    a vinyl marked meanwhile is refreshed next time. Returns the number
+    of ranked vinyls.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(TAKE_STALE_SQL)
+            stale = {pk for pk, in cursor.fetchall()}
+        if not stale and not rebuild:
+            return 0
+
+        if rebuild:
+            index = FeatureIndex.load()
+            affected = set(index.features)
+        else:
+            # Only the stale vinyls, the affected ones and their
+            # candidates are read
+            index = FeatureIndex.load(stale)
+            affected = stale | find_affected_vinyls(index, stale, limit)
+            index.extend(affected)
+        affected &= set(index.features)
+
+        with connection.cursor() as cursor:
+            cursor.execute(DELETE_SIMILAR_SQL, [list(affected)])
+        pks = iter(sorted(affected))
+        while True:
+            batch = list(islice(pks, WRITE_BATCH_SIZE))
+            if not batch:
+                break
+            SimilarProduct.objects.bulk_create(
+                SimilarProduct(product_id=pk, related_id=other,
+                               score=score, rank=rank)
+                for pk in batch
+                for rank, (other, score) in enumerate(index.rank(pk, limit),
+                                                      start=1)
+            )
+    return len(affected)
+
+
+def find_affected_vinyls(index, stale, limit):
+    """
+    Vinyls listing a stale vinyl may lose it, other vinyls may get it
+    when it scores above their last similar vinyl
+    """
+    affected = set(
+        SimilarProduct.objects.filter(related_id__in=stale)
+                              .values_list('product_id', flat=True)
+    )
+    candidates = {
+        pk: index.candidates(pk) for pk in stale if pk in index.features
+    }
+    last_scores = dict(
+        SimilarProduct.objects.filter(
+            rank=limit,
+            product_id__in=set().union(*candidates.values()),
+        ).values_list('product_id', 'score')
+    )
+    for pk, others in candidates.items():
+        for other in others:
+            if index.similarity(other, pk) >= last_scores.get(other, 0.0):
+                affected.add(other)
+    return affected
@@ -0,0 +1,13 @@
+from vinylin.celery import celery_app
+from recommendations.bought_together import refresh_bought_together
+from recommendations.similarity import refresh_similar_vinyls
+
+
+@celery_app.task
+def refresh_bought_together_task():
+    return refresh_bought_together()
+
+
+@celery_app.task
+def refresh_similar_vinyls_task():
+    return refresh_similar_vinyls()
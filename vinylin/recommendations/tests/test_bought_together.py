@@ -0,0 +1,99 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from orders.models import Order, OrderItem
+from recommendations.bought_together import (
+    rebuild_bought_together,
+    refresh_bought_together,
+)
+from recommendations.models import ProductPair, RelatedProduct
+from vinyl.models import Vinyl
+
+
+class BoughtTogetherTest(TestCase):
+    def setUp(self):
+        self.vinyls = [
+            Vinyl.objects.create(title=f'Title {number}', price='10.00',
+                                 vinyl_title=f'Vinyl Title {number}')
+            for number in range(4)
+        ]
+
+    def create_order(self, *vinyls, status='PA'):
+        order = Order.objects.create(status=status, total_price='10.00')
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=vinyl) for vinyl in vinyls
+        )
+        return order
+
+    def get_related(self, vinyl):
+        return list(
+            RelatedProduct.objects.filter(product=vinyl)
+                                  .values_list('related_id', 'count', 'rank')
+        )
+
+    def test_refresh(self):
+        first, second, third, fourth = self.vinyls
+        self.create_order(first, second, third)
+        self.create_order(first, third)
+        self.create_order(first, second, status='NPA')
+        self.create_order(first, fourth, status='CA')
+
+        self.assertEqual(refresh_bought_together(), 2)
+        self.assertEqual(self.get_related(first), [
+            (third.pk, 2, 1),
+            (second.pk, 1, 2),
+        ])
+        self.assertEqual(self.get_related(second), [
+            (first.pk, 1, 1),
+            (third.pk, 1, 2),
+        ])
+        self.assertEqual(self.get_related(fourth), [])
+
+    def test_refresh_counts_new_orders_only(self):
+        first, second, third, fourth = self.vinyls
+        self.create_order(first, second)
+        self.create_order(third, fourth)
+        refresh_bought_together()
+
+        self.create_order(first, second)
+        self.create_order(first, third, status='DE')
+        # Counting, locking, deleting and inserting ranks in a savepoint
+        with self.assertNumQueries(6):
+            self.assertEqual(refresh_bought_together(), 2)
+
+        self.assertEqual(self.get_related(first), [
+            (second.pk, 2, 1),
+            (third.pk, 1, 2),
+        ])
+        self.assertEqual(
+            ProductPair.objects.get(product=second, related=first).count, 2
+        )
+        self.assertEqual(self.get_related(fourth), [(third.pk, 1, 1)])
+        self.assertEqual(refresh_bought_together(), 0)
+
+    def test_refresh_in_batches(self):
+        first, second, third, _ = self.vinyls
+        for _ in range(3):
+            self.create_order(first, second, third)
+
+        self.assertEqual(refresh_bought_together(batch_size=2, limit=1), 3)
+        self.assertEqual(self.get_related(first), [(second.pk, 3, 1)])
+
+    def test_rebuild(self):
+        first, second, _, _ = self.vinyls
+        order = self.create_order(first, second)
+        refresh_bought_together()
+        order.status = 'CA'
+        order.save()
+
+        self.assertEqual(rebuild_bought_together(), 0)
+        self.assertFalse(ProductPair.objects.exists())
+        self.assertFalse(RelatedProduct.objects.exists())
+
+    def test_command(self):
+        first, second, _, _ = self.vinyls
+        self.create_order(first, second)
+        call_command('refresh_bought_together', stdout=StringIO())
+        self.assertEqual(self.get_related(first), [(second.pk, 1, 1)])
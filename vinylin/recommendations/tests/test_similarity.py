@@ -0,0 +1,110 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from recommendations.models import SimilarProduct, StaleSimilarity
+from recommendations.similarity import FeatureIndex, refresh_similar_vinyls
+from store.models import Tag
+from vinyl.models import Artist, Country, Genre, Vinyl
+
+
+class SimilarVinylsTest(TestCase):
+    def setUp(self):
+        self.artist = Artist.objects.create(name='Artist')
+        self.country = Country.objects.create(name='Country')
+        self.rock = Genre.objects.create(title='Rock')
+        self.jazz = Genre.objects.create(title='Jazz')
+        self.tag = Tag.objects.create(title='Tag')
+
+        self.first = self.create_vinyl(1, artist=self.artist,
+                                       country=self.country)
+        self.first.genres.add(self.rock, self.jazz)
+        self.first.tags.add(self.tag)
+        self.second = self.create_vinyl(2, artist=self.artist)
+        self.second.genres.add(self.rock, self.jazz)
+        self.third = self.create_vinyl(3, country=self.country)
+        self.third.genres.add(self.rock)
+        self.unrelated = self.create_vinyl(4)
+
+    @staticmethod
+    def create_vinyl(number, **kwargs):
+        return Vinyl.objects.create(title=f'Title {number}', price='10.00',
+                                    vinyl_title=f'Vinyl Title {number}',
+                                    **kwargs)
+
+    def get_similar(self, vinyl):
+        return list(
+            SimilarProduct.objects.filter(product=vinyl)
+                                  .values_list('related_id', 'score', 'rank')
+        )
+
+    def test_similarity(self):
+        index = FeatureIndex.load()
+        # Artist and both genres of 5 features
+        self.assertEqual(index.similarity(self.first.pk, self.second.pk),
+                         3 / 5)
+        self.assertEqual(index.similarity(self.first.pk, self.third.pk),
+                         2 / 5)
+        self.assertEqual(index.similarity(self.unrelated.pk,
+                                          self.unrelated.pk), 0.0)
+        self.assertNotIn(self.unrelated.pk, index.candidates(self.first.pk))
+
+    def test_index_of_stale_vinyls(self):
+        full = FeatureIndex.load()
+        # Features of the vinyl, its postings and features of candidates
+        with self.assertNumQueries(7):
+            index = FeatureIndex.load([self.third.pk])
+        self.assertNotIn(self.unrelated.pk, index.features)
+        self.assertEqual(index.rank(self.third.pk, 10),
+                         full.rank(self.third.pk, 10))
+
+        # Common features are cut to the same newest vinyls
+        with mock.patch('recommendations.similarity.MAX_CANDIDATES', 1):
+            index = FeatureIndex.load([self.first.pk])
+            self.assertEqual(index.candidates(self.first.pk),
+                             full.candidates(self.first.pk))
+
+    def test_refresh(self):
+        self.assertEqual(refresh_similar_vinyls(), 4)
+        self.assertFalse(StaleSimilarity.objects.exists())
+        self.assertEqual(self.get_similar(self.first), [
+            (self.second.pk, 3 / 5, 1),
+            (self.third.pk, 2 / 5, 2),
+        ])
+        self.assertEqual(self.get_similar(self.unrelated), [])
+        self.assertEqual(refresh_similar_vinyls(), 0)
+
+    def test_refresh_on_relations_change(self):
+        refresh_similar_vinyls(limit=1)
+
+        self.unrelated.genres.add(self.rock, self.jazz)
+        self.unrelated.tags.add(self.tag)
+        self.unrelated.artist = self.artist
+        self.unrelated.country = self.country
+        self.unrelated.save()
+        self.assertEqual(refresh_similar_vinyls(limit=1), 4)
+        self.assertEqual(self.get_similar(self.first),
+                         [(self.unrelated.pk, 1.0, 1)])
+        self.assertEqual(self.get_similar(self.third),
+                         [(self.first.pk, 2 / 5, 1)])
+
+        self.unrelated.delete()
+        self.assertEqual(refresh_similar_vinyls(limit=1), 3)
+        self.assertEqual(self.get_similar(self.first),
+                         [(self.second.pk, 3 / 5, 1)])
+
+    def test_refresh_on_feature_delete(self):
+        refresh_similar_vinyls()
+        self.jazz.delete()
+        refresh_similar_vinyls()
+        self.assertEqual(self.get_similar(self.first), [
+            (self.second.pk, 2 / 4, 1),
+            (self.third.pk, 2 / 4, 2),
+        ])
+
+    def test_command(self):
+        StaleSimilarity.objects.all().delete()
+        call_command('refresh_similar_vinyls', '--rebuild', stdout=StringIO())
+        self.assertEqual(self.get_similar(self.second)[0][0], self.first.pk)
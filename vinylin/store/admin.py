@@ -1,14 +1,185 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.core.exceptions import PermissionDenied
+from django.db import DataError
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 
-from .forms import ProductAdminForm
-from .models import Tag, Discount, Image, Product, Storage
+from .forms import (
+    AdjustStockForm,
+    ProductAdminForm,
+    ProductCSVForm,
+    RepriceForm,
+    SetDiscountForm,
+)
+from .campaigns import preview_campaign, restart_campaign
+from .models import (
+    Tag,
+    Discount,
+    DiscountCampaign,
+    Image,
+    Product,
+    Storage,
+)
+from .pagination import EstimatedCountPaginator
+from .services import ProductBulkService
+
+
+class ProductBulkActionsMixin:
+    """
+    Bulk changes of stock, prices and discounts of the selected products
+    and a CSV upload of them by part number, see ProductBulkService
+    """
+    actions = ['decrease_quantity', 'adjust_stock', 'set_discount',
+               'reprice']
+    change_list_template = 'admin/product_change_list.html'
+
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path('upload-csv/',
+                 self.admin_site.admin_view(self.upload_csv_view),
+                 name=f'{opts.app_label}_{opts.model_name}_upload_csv'),
+            *super().get_urls(),
+        ]
+
+    def changelist_view(self, request, extra_context=None):
+        """The CSV upload is linked for users who may change products"""
+        extra_context = {
+            'has_change_permission': self.has_change_permission(request),
+            **(extra_context or {}),
+        }
+        return super().changelist_view(request, extra_context)
+
+    def decrease_quantity(self, request, queryset):
+        updated = ProductBulkService(queryset).adjust_stock(-1)
+        self.message_user(request, f'Quantity of {updated} products is '
+                                   f'decreased.', messages.SUCCESS)
+    decrease_quantity.short_description = 'Decrease quantity by 1'
+    decrease_quantity.allowed_permissions = ('change',)
+
+    def adjust_stock(self, request, queryset):
+        return self.bulk_action_view(
+            request, queryset, AdjustStockForm, 'Adjust stock',
+            lambda service, data: service.adjust_stock(data['delta']),
+        )
+    adjust_stock.short_description = 'Adjust stock by a number'
+    adjust_stock.allowed_permissions = ('change',)
+
+    def set_discount(self, request, queryset):
+        return self.bulk_action_view(
+            request, queryset, SetDiscountForm, 'Set discount',
+            lambda service, data: service.set_discount(data['amount']),
+        )
+    set_discount.short_description = 'Set or clear discount'
+    set_discount.allowed_permissions = ('change',)
+
+    def reprice(self, request, queryset):
+        return self.bulk_action_view(
+            request, queryset, RepriceForm, 'Reprice',
+            lambda service, data: service.reprice(data['percent']),
+        )
+    reprice.short_description = 'Reprice by a percentage'
+    reprice.allowed_permissions = ('change',)
+
+    def bulk_action_view(self, request, queryset, form_class, title, apply):
+        """
+        Asks for the parameters of an action on an intermediate page,
+        which posts the selection back with them to apply it
+        """
+        form = form_class(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            try:
+                updated = apply(ProductBulkService(queryset),
+                                form.cleaned_data)
+            except DataError:
+                self.message_user(request, 'A price would exceed the '
+                                           'maximum, nothing is changed.',
+                                  messages.ERROR)
+                return None
+            self.message_user(request, f'{updated} products are updated.',
+                              messages.SUCCESS)
+            return None
+        return TemplateResponse(request, 'admin/bulk_product_action.html', {
+            **self.admin_site.each_context(request),
+            'title': title,
+            'opts': self.model._meta,
+            'form': form,
+            'action': request.POST.get('action'),
+            'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+            'action_checkbox_name': ACTION_CHECKBOX_NAME,
+        })
+
+    def upload_csv_view(self, request):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+        form = ProductCSVForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            service = ProductBulkService()
+            priced, stocked, unknown = service.update_from_csv(
+                form.cleaned_data['file']
+            )
+            self.message_user(request, f'{priced} prices and {stocked} '
+                                       f'quantities are updated.',
+                              messages.SUCCESS)
+            if unknown:
+                self.message_user(
+                    request,
+                    f'{len(unknown)} part numbers match no product: '
+                    f'{", ".join(unknown[:10])}',
+                    messages.WARNING,
+                )
+            opts = self.model._meta
+            return redirect(f'admin:{opts.app_label}_{opts.model_name}'
+                            f'_changelist')
+        return TemplateResponse(request, 'admin/bulk_product_action.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Update stock and prices from CSV',
+            'opts': self.model._meta,
+            'form': form,
+        })
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(ProductBulkActionsMixin, admin.ModelAdmin):
     form = ProductAdminForm
     save_on_top = True
 
+    list_display = ('id', 'title', 'price', 'effective_price', 'part_number')
+    list_display_links = ('id', 'title')
+    search_fields = ('title', 'part_number')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(DiscountCampaign)
+class DiscountCampaignAdmin(admin.ModelAdmin):
+    """Campaigns are started and ended by store.campaigns"""
+    list_display = ('id', 'title', 'amount', 'starts_at', 'ends_at',
+                    'status')
+    list_display_links = ('id', 'title')
+    list_filter = ('status',)
+    search_fields = ('title',)
+    autocomplete_fields = ('products', 'tags', 'genres', 'artists')
+    readonly_fields = ('status', 'preview')
+
+    @admin.display(description='preview')
+    def preview(self, obj):
+        if obj.pk is None:
+            return 'Available after saving'
+        counts = preview_campaign(obj)
+        return (f'{counts["products"]} products, the discount of '
+                f'{counts["raised"]} would be raised, {counts["applied"]} '
+                f'are discounted by this campaign')
+
+    def save_related(self, request, form, formsets, change):
+        """Changes of an active campaign are applied at once"""
+        super().save_related(request, form, formsets, change)
+        if form.instance.status == DiscountCampaign.ACTIVE:
+            restart_campaign(form.instance)
+
 
 class ImageInlineAdmin(admin.StackedInline):
     model = Image
@@ -22,7 +193,12 @@ class StorageInlineAdmin(admin.StackedInline):
     model = Storage
 
 
-admin.site.register(Tag)
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    # Trigram indexed (migration 0017)
+    search_fields = ('title',)
+
+
 admin.site.register(Discount)
 admin.site.register(Image)
 admin.site.register(Storage)
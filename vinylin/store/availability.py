@@ -0,0 +1,176 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from redis import Redis
+from redis.exceptions import RedisError
+
+from store.models import Product
+
+
+MAX_AVAILABILITY_IDS = 500
+MIRROR_KEY = 'availability'
+MIRROR_SYNC_CHUNK_SIZE = 5000
+# Ids written since the start of the last sync, which mirrors them
+# again after replacing the hash by its older snapshot
+CHANGED_KEY = f'{MIRROR_KEY}:changed'
+CHANGED_TIMEOUT = 60 * 60
+
+# Stock and effective price by product id, written after every commit
+# that changes them when settings.AVAILABILITY_MIRROR is on
+mirror = Redis.from_url(
+    settings.AVAILABILITY_REDIS_URL,
+    socket_connect_timeout=0.5,
+    socket_timeout=0.5,
+)
+
+
+def get_availability(product_ids):
+    """
+    Stock and effective price of the products in the order of the ids,
+    unknown ids are skipped. Products missing from the mirror, or all
+    of them when it is off or unreachable, are read by one query
+    through the primary key and storage indexes.
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    availability = read_mirror(product_ids)
+    missing = [pk for pk in product_ids if pk not in availability]
+    if missing:
+        rows = read_availability(missing)
+        availability.update(rows)
+        if rows and settings.AVAILABILITY_MIRROR:
+            write_mirror(rows.values(), [])
+    return [availability[pk] for pk in product_ids if pk in availability]
+
+
+def read_availability(product_ids):
+    return {
+        pk: to_representation(pk, quantity, effective_price)
+        for pk, quantity, effective_price in (
+            Product.objects.filter(pk__in=product_ids)
+                           .order_by()
+                           .values_list('pk', 'storage__quantity',
+                                        'effective_price')
+        )
+    }
+
+
+def to_representation(pk, quantity, effective_price):
+    return {
+        'id': pk,
+        'quantity': quantity,
+        'in_stock': bool(quantity),
+        'effective_price': (
+            None if effective_price is None else f'{effective_price:f}'
+        ),
+    }
+
+
+def read_mirror(product_ids):
+    if not settings.AVAILABILITY_MIRROR or not product_ids:
+        return {}
+    try:
+        values = mirror.hmget(MIRROR_KEY, product_ids)
+    except RedisError:
+        return {}
+    return {
+        pk: from_mirror(pk, value)
+        for pk, value in zip(product_ids, values)
+        if value is not None
+    }
+
+
+def to_mirror(row):
+    return '|'.join(
+        '' if row[field] is None else str(row[field])
+        for field in ('quantity', 'effective_price')
+    )
+
+
+def from_mirror(pk, value):
+    quantity, effective_price = value.decode().split('|')
+    return to_representation(
+        pk,
+        int(quantity) if quantity else None,
+        Decimal(effective_price) if effective_price else None,
+    )
+
+
+def write_mirror(rows, deleted_ids):
+    """Stale entries are repaired by the next sync, so errors are ignored"""
+    try:
+        with mirror.pipeline(transaction=False) as pipe:
+            mapping = {row['id']: to_mirror(row) for row in rows}
+            if mapping:
+                pipe.hset(MIRROR_KEY, mapping=mapping)
+            if deleted_ids:
+                pipe.hdel(MIRROR_KEY, *deleted_ids)
+            changed_ids = [*mapping, *deleted_ids]
+            if changed_ids:
+                pipe.sadd(CHANGED_KEY, *changed_ids)
+                pipe.expire(CHANGED_KEY, CHANGED_TIMEOUT)
+            pipe.execute()
+    except RedisError:
+        pass
+
+
+def mirror_availability(product_ids):
+    """Copies stock and effective price of the products to the mirror"""
+    product_ids = list(set(product_ids))
+    rows = read_availability(product_ids)
+    write_mirror(rows.values(), [pk for pk in product_ids if pk not in rows])
+
+
+def mirror_availability_on_commit(product_ids):
+    """
+    The mirror is written after the commit, so it never shows stock
+    of a transaction that is rolled back
+    """
+    if not settings.AVAILABILITY_MIRROR:
+        return
+    product_ids = list(product_ids)
+    transaction.on_commit(lambda: mirror_availability(product_ids))
+
+
+def sync_availability_mirror():
+    """
+    Rebuilds the mirror from every product under a temporary key that
+    replaces it at once. The products are read from one snapshot, so
+    those written meanwhile are mirrored again afterwards. Returns the
+    number of mirrored products.
+    """
+    if not settings.AVAILABILITY_MIRROR:
+        return 0
+    temporary_key = f'{MIRROR_KEY}:sync'
+    mirror.delete(temporary_key, CHANGED_KEY)
+    rows = (
+        Product.objects.order_by()
+                       .values_list('pk', 'storage__quantity',
+                                    'effective_price')
+                       .iterator(chunk_size=MIRROR_SYNC_CHUNK_SIZE)
+    )
+    count = 0
+    mapping = {}
+    for pk, quantity, effective_price in rows:
+        mapping[pk] = to_mirror(
+            to_representation(pk, quantity, effective_price)
+        )
+        if len(mapping) == MIRROR_SYNC_CHUNK_SIZE:
+            mirror.hset(temporary_key, mapping=mapping)
+            count += len(mapping)
+            mapping = {}
+    if mapping:
+        mirror.hset(temporary_key, mapping=mapping)
+        count += len(mapping)
+    if count:
+        mirror.rename(temporary_key, MIRROR_KEY)
+    else:
+        mirror.delete(MIRROR_KEY)
+
+    with mirror.pipeline(transaction=True) as pipe:
+        pipe.smembers(CHANGED_KEY)
+        pipe.delete(CHANGED_KEY)
+        changed_ids, _ = pipe.execute()
+    if changed_ids:
+        mirror_availability(int(pk) for pk in changed_ids)
+    return count
@@ -0,0 +1,176 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from store.availability import mirror_availability_on_commit
+from store.models import Discount, DiscountCampaign, Product
+from vinyl.cache import invalidate_catalog_cache_on_commit
+from vinyl.models import Vinyl
+
+
+# Ids of the products of the campaign `%(campaign)s`
+CAMPAIGN_PRODUCTS_SQL = '''
+SELECT product_id AS id FROM {campaign_products}
+WHERE discountcampaign_id = %(campaign)s
+UNION
+SELECT pt.product_id FROM {product_tags} pt
+JOIN {campaign_tags} ct ON ct.tag_id = pt.tag_id
+WHERE ct.discountcampaign_id = %(campaign)s
+UNION
+SELECT vg.vinyl_id FROM {vinyl_genres} vg
+JOIN {campaign_genres} cg ON cg.genre_id = vg.genre_id
+WHERE cg.discountcampaign_id = %(campaign)s
+UNION
+SELECT v.product_ptr_id FROM {vinyl} v
+JOIN {campaign_artists} ca ON ca.artist_id = v.artist_id
+WHERE ca.discountcampaign_id = %(campaign)s
+'''.format(
+    campaign_products=DiscountCampaign.products.through._meta.db_table,
+    product_tags=Product.tags.through._meta.db_table,
+    campaign_tags=DiscountCampaign.tags.through._meta.db_table,
+    vinyl_genres=Vinyl.genres.through._meta.db_table,
+    campaign_genres=DiscountCampaign.genres.through._meta.db_table,
+    vinyl=Vinyl._meta.db_table,
+    campaign_artists=DiscountCampaign.artists.through._meta.db_table,
+)
+
+# A campaign only takes over smaller discounts. The amount it replaces
+# is kept once, so it survives overlapping campaigns.
+APPLY_CAMPAIGN_SQL = '''
+WITH targets AS ({targets})
+INSERT INTO {discount} (product_id, amount, campaign_id, regular_amount,
+                        created_at, updated_at)
+SELECT id, %(amount)s, %(campaign)s, 0, now(), now() FROM targets
+ON CONFLICT (product_id) DO UPDATE SET
+    regular_amount = CASE
+        WHEN {discount}.campaign_id IS NULL THEN {discount}.amount
+        ELSE {discount}.regular_amount
+    END,
+    amount = EXCLUDED.amount,
+    campaign_id = EXCLUDED.campaign_id,
+    updated_at = EXCLUDED.updated_at
+WHERE {discount}.amount < EXCLUDED.amount
+RETURNING product_id
+'''.format(targets=CAMPAIGN_PRODUCTS_SQL, discount=Discount._meta.db_table)
+
+RESTORE_DISCOUNTS_SQL = '''
+UPDATE {discount} SET
+    amount = regular_amount,
+    regular_amount = NULL,
+    campaign_id = NULL,
+    updated_at = now()
+WHERE campaign_id = ANY(%s)
+RETURNING product_id
+'''.format(discount=Discount._meta.db_table)
+
+PREVIEW_CAMPAIGN_SQL = '''
+WITH targets AS ({targets})
+SELECT COUNT(*),
+       COUNT(*) FILTER (WHERE COALESCE(d.amount, 0) < %(amount)s),
+       COUNT(*) FILTER (WHERE d.campaign_id = %(campaign)s)
+FROM targets t
+LEFT JOIN {discount} d ON d.product_id = t.id
+'''.format(targets=CAMPAIGN_PRODUCTS_SQL, discount=Discount._meta.db_table)
+
+
+def sync_discount_campaigns():
+    """
+    Ends campaigns past their end and starts the due ones, then applies
+    every active campaign again, largest first, so products of an ended
+    campaign fall back to an overlapping one. Campaigns are applied by
+    one upsert each, whatever the number of their products. Products
+    tagged after the start of a campaign join it with the next change.
+    Returns the numbers of started and ended campaigns.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = DiscountCampaign.objects.select_for_update(skip_locked=True)
+        ended = list(
+            due.filter(status__in=[DiscountCampaign.SCHEDULED,
+                                   DiscountCampaign.ACTIVE],
+                       ends_at__lte=now)
+               .values_list('pk', flat=True)
+        )
+        started = list(
+            due.filter(status=DiscountCampaign.SCHEDULED,
+                       starts_at__lte=now, ends_at__gt=now)
+               .values_list('pk', flat=True)
+        )
+        if not ended and not started:
+            return 0, 0
+
+        DiscountCampaign.objects.filter(pk__in=ended).update(
+            status=DiscountCampaign.ENDED
+        )
+        DiscountCampaign.objects.filter(pk__in=started).update(
+            status=DiscountCampaign.ACTIVE
+        )
+        with connection.cursor() as cursor:
+            product_ids = restore_discounts(cursor, ended)
+            product_ids.update(apply_active_campaigns(cursor))
+        _on_commit(product_ids)
+    return len(started), len(ended)
+
+
+def restart_campaign(campaign):
+    """Applies an active campaign again after its products changed"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        product_ids = restore_discounts(cursor, [campaign.pk])
+        product_ids.update(apply_active_campaigns(cursor))
+        _on_commit(product_ids)
+
+
+def end_campaign(campaign):
+    """
+    Restores the discounts of a campaign, e.g. before it is deleted, and
+    applies the other active campaigns again, so its products fall back
+    to an overlapping one
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        product_ids = restore_discounts(cursor, [campaign.pk])
+        if product_ids:
+            product_ids.update(
+                apply_active_campaigns(cursor, exclude=[campaign.pk])
+            )
+        _on_commit(product_ids)
+
+
+def apply_active_campaigns(cursor, exclude=()):
+    product_ids = set()
+    campaigns = (
+        DiscountCampaign.objects.filter(status=DiscountCampaign.ACTIVE)
+                                .exclude(pk__in=exclude)
+                                .order_by('-amount', 'pk')
+                                .values_list('pk', 'amount')
+    )
+    for pk, amount in campaigns:
+        cursor.execute(APPLY_CAMPAIGN_SQL, {'campaign': pk, 'amount': amount})
+        product_ids.update(row[0] for row in cursor.fetchall())
+    return product_ids
+
+
+def restore_discounts(cursor, campaign_ids):
+    if not campaign_ids:
+        return set()
+    cursor.execute(RESTORE_DISCOUNTS_SQL, [list(campaign_ids)])
+    return {row[0] for row in cursor.fetchall()}
+
+
+def preview_campaign(campaign):
+    """
+    Numbers of products of the campaign, of those whose discount it
+    would raise and of those it discounts now, by one query
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(PREVIEW_CAMPAIGN_SQL, {
+            'campaign': campaign.pk,
+            'amount': campaign.amount,
+        })
+        products, raised, applied = cursor.fetchone()
+    return {'products': products, 'raised': raised, 'applied': applied}
+
+
+def _on_commit(product_ids):
+    """Raw statements bypass the signals of discounts"""
+    if product_ids:
+        invalidate_catalog_cache_on_commit()
+        mirror_availability_on_commit(product_ids)
@@ -1,13 +1,109 @@
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
 from django import forms
 
+from store.pricing import CENT
 from .models import Product
-from .utils import generate_part_number
+
+
+MAX_PRICE = 10 ** (Product._meta.get_field('price').max_digits
+                   - Product._meta.get_field('price').decimal_places)
 
 
 class ProductAdminForm(forms.ModelForm):
     class Meta:
         model = Product
         fields = '__all__'
-        widgets = {
-            'part_number': forms.TextInput({'value': generate_part_number()})
-        }
+
+
+class AdjustStockForm(forms.Form):
+    delta = forms.IntegerField(
+        help_text='Added to the quantity, negative to take from it',
+    )
+
+    def clean_delta(self):
+        delta = self.cleaned_data['delta']
+        if not delta:
+            raise forms.ValidationError('Enter a non-zero number.')
+        return delta
+
+
+class SetDiscountForm(forms.Form):
+    amount = forms.IntegerField(
+        min_value=0,
+        max_value=100,
+        help_text='Percentage, 0 clears the discount',
+    )
+
+
+class RepriceForm(forms.Form):
+    percent = forms.DecimalField(
+        min_value=Decimal('-99.99'),
+        max_value=1000,
+        max_digits=6,
+        decimal_places=2,
+        help_text='Percentage added to the price, negative to lower it',
+    )
+
+
+class ProductCSVForm(forms.Form):
+    file = forms.FileField(
+        help_text='CSV with part_number and quantity and/or price columns, '
+                  'empty cells keep current values',
+    )
+
+    def clean_file(self):
+        """Parses the file into rows of part number, quantity and price"""
+        try:
+            content = self.cleaned_data['file'].read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise forms.ValidationError('The file is not UTF-8 text.')
+        reader = csv.DictReader(io.StringIO(content))
+        columns = set(reader.fieldnames or ())
+        if 'part_number' not in columns or columns.isdisjoint({'quantity',
+                                                               'price'}):
+            raise forms.ValidationError(
+                'Expected a part_number column and a quantity or price '
+                'column.'
+            )
+
+        rows = {}
+        errors = []
+        for number, data in enumerate(reader, start=2):
+            try:
+                part_number, quantity, price = self._parse_row(data)
+            except ValueError as error:
+                errors.append(f'Line {number}: {error}')
+                continue
+            rows[part_number] = (part_number, quantity, price)
+        if errors:
+            raise forms.ValidationError(errors[:10])
+        if not rows:
+            raise forms.ValidationError('The file has no rows.')
+        return list(rows.values())
+
+    @staticmethod
+    def _parse_row(data):
+        part_number = (data.get('part_number') or '').strip()
+        quantity = (data.get('quantity') or '').strip() or None
+        price = (data.get('price') or '').strip() or None
+        if not part_number:
+            raise ValueError('part_number is required')
+        if quantity is not None:
+            try:
+                quantity = int(quantity)
+            except ValueError:
+                raise ValueError('quantity is not an integer')
+            if quantity < 0:
+                raise ValueError('quantity is negative')
+        if price is not None:
+            try:
+                price = Decimal(price)
+            except InvalidOperation:
+                raise ValueError('price is not a number')
+            if not price.is_finite() or not 0 <= price < MAX_PRICE:
+                raise ValueError('price is not a valid price')
+            price = price.quantize(CENT)
+        return part_number, quantity, price
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from store.models import Image
+from store.renditions import create_renditions
+from store.tasks import create_image_renditions_task
+
+
+class Command(BaseCommand):
+    help = 'Creates renditions of images that have none yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Recreate renditions of every image')
+        parser.add_argument('--queue', action='store_true',
+                            help='Queue Celery tasks instead of rendering')
+
+    def handle(self, *args, **options):
+        images = Image.objects.order_by('pk')
+        if not options['all']:
+            images = images.filter(renditions__isnull=True)
+
+        count = 0
+        for image in images.iterator():
+            if options['queue']:
+                create_image_renditions_task.delay(image.pk)
+            else:
+                create_renditions(image)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Images: {count}'))
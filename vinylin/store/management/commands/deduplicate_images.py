@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from store.models import Image
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves images uploaded before the content-addressed storage into '
+        'it, so duplicates share one file, and deletes the old files'
+    )
+
+    def handle(self, *args, **options):
+        storage = Image._meta.get_field('image').storage
+        moved = missing = 0
+        for image in Image.objects.filter(checksum='').iterator():
+            old_name = image.image.name
+            if not storage.exists(old_name):
+                missing += 1
+                continue
+
+            with storage.open(old_name) as file:
+                name = storage.save(old_name, file)
+            Image.objects.filter(pk=image.pk).update(
+                image=name,
+                checksum=storage.get_checksum(name),
+            )
+            if not Image.objects.filter(image=old_name).exists():
+                storage.delete(old_name)
+            moved += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved: {moved}, missing files: {missing}'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from store.popularity import recount_sales
+
+
+class Command(BaseCommand):
+    help = (
+        'Recounts sales of every product from completed orders, e.g. after '
+        'counters were lost while Redis was unavailable'
+    )
+
+    def handle(self, *args, **options):
+        products = recount_sales()
+        self.stdout.write(self.style.SUCCESS(f'Products: {products}'))
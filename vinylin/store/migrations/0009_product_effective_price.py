@@ -0,0 +1,73 @@
+# Generated by Django 3.2.13 on 2026-10-18 12:09
+
+from django.db import migrations, models
+
+
+# Same rounding as store.pricing.unit_price
+EFFECTIVE_PRICE_TRIGGERS = '''
+CREATE FUNCTION store_product_effective_price() RETURNS trigger AS $$
+BEGIN
+    NEW.effective_price := ROUND(
+        NEW.price * (100 - COALESCE((
+            SELECT amount FROM store_discount
+            WHERE product_id = NEW.id AND amount > 0
+        ), 0)) / 100,
+        2
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER store_product_effective_price
+BEFORE INSERT OR UPDATE OF price, effective_price ON store_product
+FOR EACH ROW EXECUTE FUNCTION store_product_effective_price();
+
+CREATE FUNCTION store_discount_effective_price() RETURNS trigger AS $$
+BEGIN
+    -- Touching the price recomputes the product through its own trigger
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE store_product SET price = price WHERE id = OLD.product_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE store_product SET price = price WHERE id = NEW.product_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER store_discount_effective_price
+AFTER INSERT OR UPDATE OF amount, product_id OR DELETE ON store_discount
+FOR EACH ROW EXECUTE FUNCTION store_discount_effective_price();
+
+UPDATE store_product SET price = price;
+'''
+
+DROP_EFFECTIVE_PRICE_TRIGGERS = '''
+DROP TRIGGER store_discount_effective_price ON store_discount;
+DROP FUNCTION store_discount_effective_price();
+DROP TRIGGER store_product_effective_price ON store_product;
+DROP FUNCTION store_product_effective_price();
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=6, null=True),
+        ),
+        migrations.RunSQL(
+            EFFECTIVE_PRICE_TRIGGERS,
+            DROP_EFFECTIVE_PRICE_TRIGGERS,
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price', 'id'], name='effective_price_id_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.13 on 2026-10-18 12:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_product_effective_price'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='image',
+            options={'ordering': ['pk']},
+        ),
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ['pk']},
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.13 on 2026-10-18 12:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_tag_image_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('width', models.PositiveSmallIntegerField()),
+                ('format', models.CharField(choices=[('jpeg', 'JPEG'), ('webp', 'WebP')], max_length=4)),
+                ('file', models.ImageField(upload_to='vinyl/renditions/')),
+                ('image', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='store.image')),
+            ],
+            options={
+                'ordering': ['format', 'width'],
+                'unique_together': {('image', 'width', 'format')},
+            },
+        ),
+    ]
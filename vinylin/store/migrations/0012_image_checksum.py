@@ -0,0 +1,24 @@
+# Generated by Django 3.2.13 on 2026-10-18 12:19
+
+from django.db import migrations, models
+import store.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_imagerendition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='checksum',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='image',
+            field=models.ImageField(storage=store.storage.ContentAddressedStorage(), upload_to='vinyl/images/'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.13 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_image_checksum'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            # 26 * 26 letter pairs of 10 ** 8 numbers each
+            'CREATE SEQUENCE store_part_number_seq '
+            'MAXVALUE 67599999999 NO CYCLE',
+            'DROP SEQUENCE store_part_number_seq',
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='part_number',
+            field=models.CharField(blank=True, help_text='Allocated on save when left empty', max_length=11, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.13 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+# Sales of paid, delivering and delivered orders placed before counters
+BACKFILL_SALES_COUNT = '''
+UPDATE store_product p SET sales_count = s.quantity
+FROM (
+    SELECT i.product_id, SUM(i.quantity) AS quantity
+    FROM orders_orderitem i
+    JOIN orders_order o ON o.id = i.order_id
+    WHERE o.status IN ('PA', 'ODE', 'DE')
+    GROUP BY i.product_id
+) s
+WHERE p.id = s.product_id
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_part_number_sequence'),
+        ('orders', '0009_order_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sales_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(BACKFILL_SALES_COUNT, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['sales_count', 'id'], name='sales_count_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['trending_score', 'id'], name='trending_score_id_idx'),
+        ),
+    ]
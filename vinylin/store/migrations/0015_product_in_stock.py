@@ -0,0 +1,75 @@
+# Generated by Django 3.2.13 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+# Same pattern as the effective price triggers of migration 0009
+IN_STOCK_TRIGGERS = '''
+CREATE FUNCTION store_product_in_stock() RETURNS trigger AS $$
+BEGIN
+    NEW.in_stock := EXISTS (
+        SELECT 1 FROM store_storage
+        WHERE product_id = NEW.id AND quantity > 0
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER store_product_in_stock
+BEFORE INSERT OR UPDATE OF in_stock ON store_product
+FOR EACH ROW EXECUTE FUNCTION store_product_in_stock();
+
+CREATE FUNCTION store_storage_in_stock() RETURNS trigger AS $$
+BEGIN
+    -- Touching the flag recomputes the product through its own trigger,
+    -- products whose flag stays the same are not written
+    IF TG_OP = 'DELETE'
+       OR (TG_OP = 'UPDATE' AND NEW.product_id <> OLD.product_id) THEN
+        UPDATE store_product SET in_stock = in_stock
+        WHERE id = OLD.product_id AND in_stock;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE store_product SET in_stock = in_stock
+        WHERE id = NEW.product_id
+          AND in_stock IS DISTINCT FROM (NEW.quantity > 0);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER store_storage_in_stock
+AFTER INSERT OR UPDATE OF quantity, product_id OR DELETE ON store_storage
+FOR EACH ROW EXECUTE FUNCTION store_storage_in_stock();
+
+UPDATE store_product SET in_stock = in_stock;
+'''
+
+DROP_IN_STOCK_TRIGGERS = '''
+DROP TRIGGER store_storage_in_stock ON store_storage;
+DROP FUNCTION store_storage_in_stock();
+DROP TRIGGER store_product_in_stock ON store_product;
+DROP FUNCTION store_product_in_stock();
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0014_popularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='in_stock',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunSQL(
+            IN_STOCK_TRIGGERS,
+            DROP_IN_STOCK_TRIGGERS,
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('in_stock', True)), fields=['created_at', 'id'], name='in_stock_created_at_id_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.13 on 2026-10-18 18:20
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Admin search compiles icontains to UPPER(column::text) LIKE UPPER(%s),
+# so the indexes are built on the same expression
+TRIGRAM_INDEXES = '''
+CREATE INDEX store_product_title_trgm_idx
+ON store_product USING gin (UPPER(title::text) gin_trgm_ops);
+
+CREATE INDEX store_product_part_number_trgm_idx
+ON store_product USING gin (UPPER(part_number::text) gin_trgm_ops);
+'''
+
+DROP_TRIGRAM_INDEXES = '''
+DROP INDEX store_product_part_number_trgm_idx;
+DROP INDEX store_product_title_trgm_idx;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_product_in_stock'),
+    ]
+
+    operations = [
+        # pg_trgm is created here only. The other trigram migrations
+        # depend on this one, so reversing them keeps the extension
+        TrigramExtension(),
+        migrations.RunSQL(TRIGRAM_INDEXES, DROP_TRIGRAM_INDEXES),
+    ]
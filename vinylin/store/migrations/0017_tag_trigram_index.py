@@ -0,0 +1,23 @@
+# Generated by Django 3.2.13 on 2026-10-18 19:05
+
+from django.db import migrations
+
+
+# Same expression as the indexes of migration 0016
+TRIGRAM_INDEX = '''
+CREATE INDEX store_tag_title_trgm_idx
+ON store_tag USING gin (UPPER(title::text) gin_trgm_ops);
+'''
+
+DROP_TRIGRAM_INDEX = 'DROP INDEX store_tag_title_trgm_idx;'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0016_product_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(TRIGRAM_INDEX, DROP_TRIGRAM_INDEX),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 3.2.13 on 2026-10-18 12:49
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vinyl', '0011_reference_trigram_indexes'),
+        ('store', '0017_tag_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discount',
+            name='regular_amount',
+            field=models.SmallIntegerField(editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='DiscountCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=150)),
+                ('amount', models.SmallIntegerField(help_text='Percentage off', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(100)])),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('scheduled', 'scheduled'), ('active', 'active'), ('ended', 'ended')], default='scheduled', editable=False, max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('artists', models.ManyToManyField(blank=True, related_name='discount_campaigns', to='vinyl.Artist')),
+                ('genres', models.ManyToManyField(blank=True, related_name='discount_campaigns', to='vinyl.Genre')),
+                ('products', models.ManyToManyField(blank=True, related_name='discount_campaigns', to='store.Product')),
+                ('tags', models.ManyToManyField(blank=True, related_name='discount_campaigns', to='store.Tag')),
+            ],
+            options={
+                'ordering': ['-starts_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='discount',
+            name='campaign',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='discounts', to='store.discountcampaign'),
+        ),
+        migrations.AddIndex(
+            model_name='discountcampaign',
+            index=models.Index(fields=['status', 'starts_at'], name='campaign_status_starts_at_idx'),
+        ),
+    ]
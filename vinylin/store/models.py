@@ -1,5 +1,11 @@
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
+from store.pricing import unit_price
+from store.storage import ContentAddressedStorage
+from store.utils import generate_part_number
+
 
 class Tag(models.Model):
     title = models.CharField(max_length=100)
@@ -7,6 +13,77 @@ class Tag(models.Model):
     def __str__(self):
         return self.title
 
+    class Meta:
+        ordering = ['pk']
+
+
+class DiscountCampaign(models.Model):
+    """
+    Percentage off the products, tags, genres and artists of the
+    campaign between its start and end, applied and expired by
+    store.campaigns
+    """
+    SCHEDULED = 'scheduled'
+    ACTIVE = 'active'
+    ENDED = 'ended'
+    STATUS_CHOICES = [
+        (SCHEDULED, 'scheduled'),
+        (ACTIVE, 'active'),
+        (ENDED, 'ended'),
+    ]
+
+    title = models.CharField(max_length=150)
+    amount = models.SmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(100)],
+        help_text='Percentage off',
+    )
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=SCHEDULED,
+        editable=False,
+    )
+    products = models.ManyToManyField(
+        to='Product',
+        blank=True,
+        related_name='discount_campaigns',
+    )
+    tags = models.ManyToManyField(
+        to=Tag,
+        blank=True,
+        related_name='discount_campaigns',
+    )
+    genres = models.ManyToManyField(
+        to='vinyl.Genre',
+        blank=True,
+        related_name='discount_campaigns',
+    )
+    artists = models.ManyToManyField(
+        to='vinyl.Artist',
+        blank=True,
+        related_name='discount_campaigns',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.title
+
+    def clean(self):
+        if self.starts_at and self.ends_at and self.starts_at >= self.ends_at:
+            raise ValidationError({
+                'ends_at': 'The end must follow the start.',
+            })
+
+    class Meta:
+        ordering = ['-starts_at']
+        indexes = [
+            models.Index(fields=['status', 'starts_at'],
+                         name='campaign_status_starts_at_idx'),
+        ]
+
 
 class Discount(models.Model):
     product = models.OneToOneField(
@@ -15,7 +92,19 @@ class Discount(models.Model):
         related_name='discount',
     )
     amount = models.SmallIntegerField(default=0)
+    # Set while a campaign overrides the amount, which is restored from
+    # regular_amount when the campaign ends
+    campaign = models.ForeignKey(
+        to=DiscountCampaign,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='discounts',
+        editable=False,
+    )
+    regular_amount = models.SmallIntegerField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.product.title
@@ -24,7 +113,7 @@ class Discount(models.Model):
     def price_with_discount(self):
         if not self.amount:
             return None
-        return round(float(self.product.price) * (1 - (self.amount * 0.01)), 2)
+        return unit_price(self.product.price, self.amount)
 
 
 class AbstractProduct(models.Model):
@@ -35,6 +124,7 @@ class AbstractProduct(models.Model):
         unique=True,
         blank=True,
         null=True,
+        help_text='Allocated on save when left empty',
     )
     overview = models.TextField(blank=True, null=True)
 
@@ -45,10 +135,50 @@ class AbstractProduct(models.Model):
 class Product(AbstractProduct):
     tags = models.ManyToManyField(to=Tag, blank=True, related_name='tags')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Price with discount, written by database triggers on every change
+    # of the price or the discount (see migration 0009), so it is stale
+    # on an instance until refresh_from_db()
+    effective_price = models.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        null=True,
+        editable=False,
+    )
+    # Whether the storage quantity is positive, written by database
+    # triggers on every change of the storage (see migration 0015)
+    in_stock = models.BooleanField(default=False, editable=False)
+    # Added from Redis counters by store.popularity.flush_counters
+    sales_count = models.PositiveIntegerField(default=0, editable=False)
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+    # Weighted views and sales, decayed hourly by store.popularity
+    trending_score = models.FloatField(default=0, editable=False)
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if not self.part_number:
+            self.part_number = generate_part_number()
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the catalog seeks on (created_at, id)
+            models.Index(fields=['created_at', 'id'],
+                         name='created_at_id_idx'),
+            models.Index(fields=['effective_price', 'id'],
+                         name='effective_price_id_idx'),
+            models.Index(fields=['sales_count', 'id'],
+                         name='sales_count_id_idx'),
+            models.Index(fields=['trending_score', 'id'],
+                         name='trending_score_id_idx'),
+            # Newest vinyls in stock without a join or a scan of the rest
+            models.Index(fields=['created_at', 'id'],
+                         name='in_stock_created_at_id_idx',
+                         condition=models.Q(in_stock=True)),
+        ]
+
 
 class Image(models.Model):
     product = models.ForeignKey(
@@ -58,8 +188,53 @@ class Image(models.Model):
     )
     image = models.ImageField(
         upload_to='vinyl/images/',
+        storage=ContentAddressedStorage(),
+    )
+    # SHA-256 of the stored file, empty for files uploaded before
+    # the content-addressed storage
+    checksum = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
+
+    class Meta:
+        ordering = ['pk']
+
+    def save(self, *args, **kwargs):
+        # The storage names the file by its content, so the file is saved
+        # before the row to know the checksum
+        if self.image and not self.image._committed:
+            self.image.save(self.image.name, self.image.file, save=False)
+        self.checksum = self.image.storage.get_checksum(self.image.name)
+        super().save(*args, **kwargs)
+
+
+class ImageRendition(models.Model):
+    """Resized copy of an image, created by store.tasks after upload"""
+    JPEG = 'jpeg'
+    WEBP = 'webp'
+    FORMAT_CHOICES = (
+        (JPEG, 'JPEG'),
+        (WEBP, 'WebP'),
+    )
+
+    image = models.ForeignKey(
+        to=Image,
+        on_delete=models.CASCADE,
+        related_name='renditions',
+    )
+    width = models.PositiveSmallIntegerField()
+    format = models.CharField(max_length=4, choices=FORMAT_CHOICES)
+    file = models.ImageField(
+        upload_to='vinyl/renditions/',
     )
 
+    class Meta:
+        ordering = ['format', 'width']
+        unique_together = ['image', 'width', 'format']
+
 
 class Storage(models.Model):
     product = models.OneToOneField(
@@ -68,6 +243,7 @@ class Storage(models.Model):
         related_name='storage',
     )
     quantity = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.product.title
@@ -0,0 +1,168 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from redis import Redis
+from redis.exceptions import RedisError, ResponseError
+
+from orders.models import Order, OrderItem
+from store.models import Product
+
+
+VIEWS_KEY = 'popularity:views'
+SALES_KEY = 'popularity:sales'
+RANKED_AT_KEY = 'popularity:ranked_at'
+
+# Trending score of a view and of a sold unit, halved every day
+VIEW_WEIGHT = 1
+SALE_WEIGHT = 10
+TRENDING_HALF_LIFE_HOURS = 24
+# Decayed scores below this are zeroed, so decay skips them afterwards
+MIN_TRENDING_SCORE = 0.01
+
+FLUSH_COUNTERS_SQL = '''
+UPDATE {product} p SET
+    view_count = p.view_count + c.views,
+    sales_count = p.sales_count + c.sales,
+    trending_score = p.trending_score + c.views * %s + c.sales * %s
+FROM (VALUES {values}) AS c (id, views, sales)
+WHERE p.id = c.id
+'''.format(product=Product._meta.db_table, values='{values}')
+
+DECAY_TRENDING_SQL = '''
+UPDATE {product} SET trending_score = CASE
+    WHEN trending_score * %(factor)s < %(minimum)s THEN 0
+    ELSE trending_score * %(factor)s
+END
+WHERE trending_score > 0
+'''.format(product=Product._meta.db_table)
+
+RECOUNT_SALES_SQL = '''
+UPDATE {product} p SET sales_count = COALESCE((
+    SELECT SUM(i.quantity) FROM {order_item} i
+    JOIN {order} o ON o.id = i.order_id
+    WHERE i.product_id = p.id AND o.status = ANY(%s)
+), 0)
+'''.format(
+    product=Product._meta.db_table,
+    order_item=OrderItem._meta.db_table,
+    order=Order._meta.db_table,
+)
+
+# Counters outlive cache flushes, so they are kept in their own database.
+# Short timeouts keep requests fast while Redis is unreachable.
+counters = Redis.from_url(
+    settings.COUNTERS_REDIS_URL,
+    socket_connect_timeout=0.5,
+    socket_timeout=0.5,
+)
+# After an error increments are dropped for this long, in seconds, so
+# only one request per worker waits for the timeouts during an outage
+COUNTERS_RETRY_INTERVAL = 30
+
+# Per worker process, when increments are tried again
+_retry_at = 0.0
+
+
+def count_view(product_id):
+    _increment(VIEWS_KEY, {product_id: 1})
+
+
+def count_sales(quantities):
+    """Counts units sold by product id"""
+    _increment(SALES_KEY, quantities)
+
+
+def _increment(key, amounts):
+    """
+    Counters are a popularity signal, not accounting, so increments
+    are dropped while Redis is unavailable instead of failing requests
+    """
+    global _retry_at
+    if time.monotonic() < _retry_at:
+        return
+    try:
+        with counters.pipeline(transaction=False) as pipe:
+            for product_id, amount in amounts.items():
+                pipe.hincrby(key, product_id, amount)
+            pipe.execute()
+    except RedisError:
+        _retry_at = time.monotonic() + COUNTERS_RETRY_INTERVAL
+
+
+def flush_counters():
+    """
+    Adds counted views and sales to products and their trending scores
+    by one UPDATE. A hash is renamed before it is read, so increments
+    made meanwhile wait for the next flush, and it is deleted once the
+    UPDATE is committed, so a failed flush is retried with the same
+    counts. Returns the number of updated products.
+    """
+    views = _take_counts(VIEWS_KEY)
+    sales = _take_counts(SALES_KEY)
+    rows = [
+        (product_id, views.get(product_id, 0), sales.get(product_id, 0))
+        for product_id in sorted(views.keys() | sales.keys())
+    ]
+    if rows:
+        with transaction.atomic(), connection.cursor() as cursor:
+            placeholder = '(%s, %s, %s)'
+            cursor.execute(
+                FLUSH_COUNTERS_SQL.format(
+                    values=', '.join([placeholder] * len(rows))
+                ),
+                [VIEW_WEIGHT, SALE_WEIGHT,
+                 *[value for row in rows for value in row]],
+            )
+        set_ranked_at()
+    counters.delete(f'{VIEWS_KEY}:flushing', f'{SALES_KEY}:flushing')
+    return len(rows)
+
+
+def _take_counts(key):
+    flushing_key = f'{key}:flushing'
+    try:
+        # Counts of a failed flush are taken first, new ones stay
+        counters.renamenx(key, flushing_key)
+    except ResponseError:
+        # Nothing was counted since the last flush
+        pass
+    return {
+        int(product_id): int(count)
+        for product_id, count in counters.hgetall(flushing_key).items()
+    }
+
+
+def decay_trending_scores(hours=1):
+    """Halves trending scores every TRENDING_HALF_LIFE_HOURS"""
+    factor = 0.5 ** (hours / TRENDING_HALF_LIFE_HOURS)
+    with connection.cursor() as cursor:
+        cursor.execute(DECAY_TRENDING_SQL, {
+            'factor': factor,
+            'minimum': MIN_TRENDING_SCORE,
+        })
+        updated = cursor.rowcount
+    set_ranked_at()
+    return updated
+
+
+def recount_sales():
+    """
+    Sales counts of completed orders, to repair counts lost while Redis
+    was unavailable. Scans every order item, so it is not scheduled.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(RECOUNT_SALES_SQL, [list(Order.COMPLETED_STATUSES)])
+        updated = cursor.rowcount
+    set_ranked_at()
+    return updated
+
+
+def set_ranked_at():
+    cache.set(RANKED_AT_KEY, time.time(), timeout=None)
+
+
+def get_ranked_at():
+    """Time of the last change of popularity rankings, if known"""
+    return cache.get(RANKED_AT_KEY)
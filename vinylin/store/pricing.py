@@ -0,0 +1,68 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import (
+    Case,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Func,
+    When,
+)
+
+
+CENT = Decimal('0.01')
+
+PRICE_FIELD = DecimalField(max_digits=6, decimal_places=2)
+LINE_PRICE_FIELD = DecimalField(max_digits=9, decimal_places=2)
+
+
+def to_decimal(value):
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def unit_price(price, discount_amount=None):
+    """
+    Price of one item with a percentage discount, rounded half up to
+    cents exactly like `unit_price_expression` rounds in the database
+    """
+    price = to_decimal(price)
+    if discount_amount and discount_amount > 0:
+        price = price * (100 - discount_amount) / 100
+    return price.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def line_price(price, discount_amount, quantity):
+    """Unit price is rounded before multiplying, as in the database"""
+    return unit_price(price, discount_amount) * quantity
+
+
+class RoundCents(Func):
+    """PostgreSQL rounds numeric half away from zero, i.e. half up here"""
+    function = 'ROUND'
+    template = '%(function)s(%(expressions)s, 2)'
+
+
+def unit_price_expression(prefix=''):
+    """
+    Annotation of the discounted unit price. `prefix` is the lookup path
+    to the product, e.g. 'product__' for order items.
+    """
+    price = F(f'{prefix}price')
+    amount = F(f'{prefix}discount__amount')
+    return Case(
+        When(
+            **{f'{prefix}discount__amount__gt': 0},
+            then=RoundCents(price * (100 - amount) / 100)
+        ),
+        default=price,
+        output_field=PRICE_FIELD,
+    )
+
+
+def line_price_expression(prefix='', quantity='quantity'):
+    return ExpressionWrapper(
+        unit_price_expression(prefix) * F(quantity),
+        output_field=LINE_PRICE_FIELD,
+    )
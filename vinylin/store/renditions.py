@@ -0,0 +1,82 @@
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image as PillowImage, ImageOps
+
+from store.models import ImageRendition
+
+
+RENDITION_WIDTHS = (160, 320, 640)
+RENDITION_FORMATS = {
+    ImageRendition.JPEG: ('JPEG', {'quality': 80, 'optimize': True,
+                                   'progressive': True}),
+    ImageRendition.WEBP: ('WEBP', {'quality': 80, 'method': 6}),
+}
+
+
+def get_rendition_widths(original_width):
+    """Renditions are never upscaled, small originals get fewer sizes"""
+    return sorted({min(width, original_width) for width in RENDITION_WIDTHS})
+
+
+def render(picture, width, rendition_format):
+    pillow_format, options = RENDITION_FORMATS[rendition_format]
+    height = max(1, round(picture.height * width / picture.width))
+    resized = picture.resize((width, height), PillowImage.Resampling.LANCZOS)
+    if pillow_format == 'JPEG' and resized.mode != 'RGB':
+        # JPEG has no alpha channel, transparency turns white
+        background = PillowImage.new('RGB', resized.size, 'white')
+        background.paste(resized, mask=resized.getchannel('A'))
+        resized = background
+
+    content = BytesIO()
+    resized.save(content, pillow_format, **options)
+    return content.getvalue()
+
+
+def create_renditions(image):
+    """
+    Replaces renditions of the image with every width in every format.
+    The picture is rotated by its EXIF orientation first, renditions are
+    saved without EXIF.
+    """
+    with image.image.open('rb') as file:
+        picture = ImageOps.exif_transpose(PillowImage.open(file))
+        picture = picture.convert(
+            'RGBA' if 'A' in picture.getbands() else 'RGB'
+        )
+
+    renditions = []
+    for width in get_rendition_widths(picture.width):
+        for rendition_format in RENDITION_FORMATS:
+            rendition = ImageRendition(image=image, width=width,
+                                       format=rendition_format)
+            rendition.file.save(
+                f'{image.pk}-{width}.{rendition_format}',
+                ContentFile(render(picture, width, rendition_format)),
+                save=False,
+            )
+            renditions.append(rendition)
+
+    with transaction.atomic():
+        for old_rendition in image.renditions.all():
+            old_rendition.file.delete(save=False)
+            old_rendition.delete()
+        for rendition in renditions:
+            rendition.save()
+    return renditions
+
+
+def build_srcsets(renditions):
+    """
+    `srcset` attribute values by format from (format, width, url) of
+    one image, formats and widths in ascending order
+    """
+    srcsets = {}
+    for rendition_format, width, url in sorted(renditions):
+        srcsets.setdefault(rendition_format, []).append(f'{url} {width}w')
+    return {
+        rendition_format: ', '.join(candidates)
+        for rendition_format, candidates in srcsets.items()
+    }
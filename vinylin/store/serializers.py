@@ -1,9 +1,16 @@
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import DecimalField, ModelSerializer
 
 from store.models import Discount, Storage, Image
+from store.renditions import build_srcsets
 
 
 class DiscountSerializer(ModelSerializer):
+    price_with_discount = DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        read_only=True
+    )
+
     class Meta:
         model = Discount
         fields = ('amount', 'price_with_discount')
@@ -22,3 +29,17 @@ class ImageSerializer(ModelSerializer):
 
     def to_representation(self, instance):
         return instance.image.url
+
+
+class ImageSrcsetSerializer(ModelSerializer):
+    """`srcset` of every rendition format, empty until they are created"""
+
+    class Meta:
+        model = Image
+        fields = ('image',)
+
+    def to_representation(self, instance):
+        return build_srcsets(
+            (rendition.format, rendition.width, rendition.file.url)
+            for rendition in instance.renditions.all()
+        )
@@ -0,0 +1,194 @@
+from django.db import connection, transaction
+
+from store.availability import mirror_availability_on_commit
+from store.models import Discount, Product, Storage
+from vinyl.cache import invalidate_catalog_cache_on_commit
+
+
+# Rows of an uploaded CSV written by one statement
+CSV_CHUNK_SIZE = 1000
+
+# Statements on a selection follow its subquery as `selection (id)`
+SELECTION_SQL = 'WITH selection (id) AS ({selection})'
+
+ADJUST_STOCK_SQL = '''
+INSERT INTO {storage} (product_id, quantity, updated_at)
+SELECT id, GREATEST(%s, 0), now() FROM selection
+ON CONFLICT (product_id) DO UPDATE SET
+    quantity = GREATEST({storage}.quantity + %s, 0),
+    updated_at = EXCLUDED.updated_at
+RETURNING product_id
+'''.format(storage=Storage._meta.db_table)
+
+# Products of a campaign keep its larger discount, a smaller amount
+# becomes the one restored when the campaign ends
+SET_DISCOUNT_SQL = '''
+INSERT INTO {discount} (product_id, amount, created_at, updated_at)
+SELECT id, %s, now(), now() FROM selection
+ON CONFLICT (product_id) DO UPDATE SET
+    amount = CASE WHEN {in_campaign} THEN {discount}.amount
+                  ELSE EXCLUDED.amount END,
+    regular_amount = CASE WHEN {in_campaign} THEN EXCLUDED.amount END,
+    campaign_id = CASE WHEN {in_campaign} THEN {discount}.campaign_id END,
+    updated_at = EXCLUDED.updated_at
+WHERE {discount}.amount <> EXCLUDED.amount
+   OR {discount}.regular_amount <> EXCLUDED.amount
+RETURNING product_id
+'''.format(
+    discount=Discount._meta.db_table,
+    in_campaign=(
+        '{discount}.campaign_id IS NOT NULL '
+        'AND EXCLUDED.amount <= {discount}.amount'
+    ).format(discount=Discount._meta.db_table),
+)
+
+CLEAR_DISCOUNT_SQL = '''
+UPDATE {discount} d SET
+    amount = CASE WHEN d.campaign_id IS NULL THEN 0 ELSE d.amount END,
+    regular_amount = CASE WHEN d.campaign_id IS NULL THEN NULL ELSE 0 END,
+    updated_at = now()
+FROM selection s
+WHERE d.product_id = s.id
+  AND CASE WHEN d.campaign_id IS NULL THEN d.amount
+           ELSE d.regular_amount END <> 0
+RETURNING d.product_id
+'''.format(discount=Discount._meta.db_table)
+
+REPRICE_SQL = '''
+UPDATE {product} p SET
+    price = ROUND(p.price * (100 + %s) / 100, 2),
+    updated_at = now()
+FROM selection s
+WHERE p.id = s.id
+RETURNING p.id
+'''.format(product=Product._meta.db_table)
+
+UPDATE_CSV_PRICES_SQL = '''
+UPDATE {product} p SET price = c.price, updated_at = now()
+FROM (VALUES {values}) AS c (part_number, price)
+WHERE p.part_number = c.part_number AND p.price <> c.price
+RETURNING p.id
+'''.format(product=Product._meta.db_table, values='{values}')
+
+UPDATE_CSV_QUANTITIES_SQL = '''
+INSERT INTO {storage} (product_id, quantity, updated_at)
+SELECT p.id, c.quantity, now()
+FROM (VALUES {values}) AS c (part_number, quantity)
+JOIN {product} p ON p.part_number = c.part_number
+ON CONFLICT (product_id) DO UPDATE SET
+    quantity = EXCLUDED.quantity,
+    updated_at = EXCLUDED.updated_at
+WHERE {storage}.quantity <> EXCLUDED.quantity
+RETURNING product_id
+'''.format(
+    storage=Storage._meta.db_table,
+    product=Product._meta.db_table,
+    values='{values}',
+)
+
+SELECT_CSV_PART_NUMBERS_SQL = '''
+SELECT c.part_number FROM (VALUES {values}) AS c (part_number)
+WHERE NOT EXISTS (
+    SELECT 1 FROM {product} p WHERE p.part_number = c.part_number
+)
+'''.format(product=Product._meta.db_table, values='{values}')
+
+
+class ProductBulkService:
+    """
+    Changes stock, prices and discounts of many products at once. A
+    change of a selection is one statement over its subquery, an upload
+    is one statement per chunk of rows, so the number of round trips
+    does not grow with the number of products.
+    """
+
+    def __init__(self, queryset=None):
+        self._queryset = queryset
+
+    @property
+    def queryset(self):
+        return self._queryset
+
+    def adjust_stock(self, delta):
+        """
+        Adds `delta` to the quantity of every selected product, which
+        is never taken below zero. Missing storages are created.
+        """
+        return self._execute_on_selection(ADJUST_STOCK_SQL, [delta, delta])
+
+    def set_discount(self, amount):
+        """Sets a percentage discount, 0 clears existing discounts"""
+        if not amount:
+            return self._execute_on_selection(CLEAR_DISCOUNT_SQL, [])
+        return self._execute_on_selection(SET_DISCOUNT_SQL, [amount])
+
+    def reprice(self, percent):
+        """
+        Changes prices by `percent`, rounded half up to cents. Raises
+        DataError and changes nothing when a price would overflow.
+        """
+        return self._execute_on_selection(REPRICE_SQL, [percent])
+
+    def update_from_csv(self, rows):
+        """
+        Writes quantities and prices of `rows` of part number, quantity
+        and price, where None keeps the current value. Returns the
+        numbers of changed prices and quantities and the part numbers
+        that match no product.
+        """
+        prices = [(part_number, price)
+                  for part_number, quantity, price in rows
+                  if price is not None]
+        quantities = [(part_number, quantity)
+                      for part_number, quantity, price in rows
+                      if quantity is not None]
+        priced, stocked, unknown = set(), set(), []
+        with transaction.atomic(), connection.cursor() as cursor:
+            for chunk in self._chunks(prices):
+                priced.update(self._execute_values(
+                    cursor, UPDATE_CSV_PRICES_SQL, chunk, '(%s, %s::numeric)'
+                ))
+            for chunk in self._chunks(quantities):
+                stocked.update(self._execute_values(
+                    cursor, UPDATE_CSV_QUANTITIES_SQL, chunk,
+                    '(%s, %s::integer)'
+                ))
+            for chunk in self._chunks([(row[0],) for row in rows]):
+                unknown.extend(self._execute_values(
+                    cursor, SELECT_CSV_PART_NUMBERS_SQL, chunk, '(%s)'
+                ))
+            self._on_commit(priced | stocked)
+        return len(priced), len(stocked), unknown
+
+    def _execute_on_selection(self, sql, params):
+        selection, selection_params = (
+            self.queryset.order_by().values('pk').query.sql_with_params()
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'{SELECTION_SQL.format(selection=selection)} {sql}',
+                [*selection_params, *params],
+            )
+            product_ids = [row[0] for row in cursor.fetchall()]
+            self._on_commit(product_ids)
+        return len(product_ids)
+
+    @staticmethod
+    def _on_commit(product_ids):
+        """Raw statements bypass the signals of storages and discounts"""
+        if product_ids:
+            invalidate_catalog_cache_on_commit()
+            mirror_availability_on_commit(product_ids)
+
+    @staticmethod
+    def _execute_values(cursor, sql, rows, placeholder):
+        cursor.execute(
+            sql.format(values=', '.join([placeholder] * len(rows))),
+            [value for row in rows for value in row],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    @staticmethod
+    def _chunks(rows):
+        for start in range(0, len(rows), CSV_CHUNK_SIZE):
+            yield rows[start:start + CSV_CHUNK_SIZE]
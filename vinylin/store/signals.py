@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from store.availability import mirror_availability_on_commit
+from store.campaigns import end_campaign
+from store.models import Discount, DiscountCampaign, Image, Product, Storage
+from store.tasks import create_image_renditions_task
+
+
+@receiver(post_save, sender=Image)
+def create_renditions_on_upload(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(
+        lambda: create_image_renditions_task.delay(instance.pk)
+    )
+
+
+@receiver([post_save, post_delete], sender=Storage)
+@receiver([post_save, post_delete], sender=Discount)
+def mirror_stock_change(sender, instance, **kwargs):
+    mirror_availability_on_commit([instance.product_id])
+
+
+@receiver(post_save)
+def mirror_saved_product(sender, instance, **kwargs):
+    # Saving a vinyl only signals its own class
+    if isinstance(instance, Product):
+        mirror_availability_on_commit([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def mirror_deleted_product(sender, instance, **kwargs):
+    # Deleting a vinyl deletes its product too
+    mirror_availability_on_commit([instance.pk])
+
+
+@receiver(pre_delete, sender=DiscountCampaign)
+def end_deleted_campaign(sender, instance, **kwargs):
+    """
+    Discounts would keep the amount of the campaign after its deletion.
+    The status is not checked, it may be stale and restoring a campaign
+    without discounts changes nothing.
+    """
+    end_campaign(instance)
@@ -0,0 +1,207 @@
+import os
+import re
+import struct
+from hashlib import sha256
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from PIL import Image as PillowImage, ImageOps, UnidentifiedImageError
+
+
+BLOB_NAME_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# Extensions of formats whose metadata is stripped on ingest
+IMAGE_EXTENSIONS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'WEBP': '.webp',
+}
+EXIF_ORIENTATION = 0x0112
+
+# JPEG segments dropped when stripping: APP1 (EXIF, XMP) and comments
+JPEG_METADATA_MARKERS = {0xE1, 0xFE}
+JPEG_START_OF_SCAN = 0xDA
+PNG_METADATA_CHUNKS = {b'eXIf', b'tEXt', b'zTXt', b'iTXt'}
+WEBP_METADATA_CHUNKS = {b'EXIF', b'XMP '}
+# EXIF and XMP flags of the VP8X chunk
+WEBP_METADATA_FLAGS = 0x0C
+
+
+def _jpeg_segments(data):
+    """Yields the markers and bounds of segments up to the scan data"""
+    position = 2
+    while True:
+        if data[position] != 0xFF:
+            raise ValueError('Not a JPEG marker')
+        marker = data[position + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            position += 1
+            continue
+        if marker == JPEG_START_OF_SCAN:
+            yield marker, position, len(data)
+            return
+        length, = struct.unpack_from('>H', data, position + 2)
+        yield marker, position, position + 2 + length
+        position += 2 + length
+
+
+def _png_chunks(data):
+    """Yields the types and bounds of chunks after the signature"""
+    position = 8
+    while position < len(data):
+        length, chunk_type = struct.unpack_from('>I4s', data, position)
+        yield chunk_type, position, position + 12 + length
+        position += 12 + length
+
+
+def _webp_chunks(data):
+    """Yields the FourCCs and bounds of chunks of the RIFF container"""
+    if data[:4] != b'RIFF' or data[8:12] != b'WEBP':
+        raise ValueError('Not a WEBP container')
+    position = 12
+    while position < len(data):
+        fourcc, size = struct.unpack_from('<4sI', data, position)
+        # Chunks are padded to an even size
+        yield fourcc, position, position + 8 + size + (size & 1)
+        position += 8 + size + (size & 1)
+
+
+def _strip_jpeg(data):
+    return data[:2] + b''.join(
+        data[start:end] for marker, start, end in _jpeg_segments(data)
+        if marker not in JPEG_METADATA_MARKERS
+    )
+
+
+def _strip_png(data):
+    return data[:8] + b''.join(
+        data[start:end] for chunk_type, start, end in _png_chunks(data)
+        if chunk_type not in PNG_METADATA_CHUNKS
+    )
+
+
+def _strip_webp(data):
+    chunks = []
+    for fourcc, start, end in _webp_chunks(data):
+        if fourcc in WEBP_METADATA_CHUNKS:
+            continue
+        chunk = bytearray(data[start:end])
+        if fourcc == b'VP8X':
+            chunk[8] &= ~WEBP_METADATA_FLAGS & 0xFF
+            if not chunk[8]:
+                # Nothing else is extended, the simple format is enough
+                continue
+        chunks.append(chunk)
+    body = b'WEBP' + b''.join(chunks)
+    return b'RIFF' + struct.pack('<I', len(body)) + body
+
+
+METADATA_STRIPPERS = {
+    'JPEG': _strip_jpeg,
+    'PNG': _strip_png,
+    'WEBP': _strip_webp,
+}
+
+
+def strip_metadata(data, picture_format):
+    """
+    Drops the metadata of a picture without decoding it, so its pixels
+    are kept bit for bit. Returns None when the file cannot be parsed
+    or still has EXIF afterwards.
+    """
+    try:
+        stripped = METADATA_STRIPPERS[picture_format](data)
+        with PillowImage.open(BytesIO(stripped)) as picture:
+            if picture.getexif():
+                return None
+    except (IndexError, ValueError, struct.error, UnidentifiedImageError):
+        return None
+    return stripped
+
+
+def is_lossless_webp(data):
+    try:
+        return any(fourcc == b'VP8L' for fourcc, _, _ in _webp_chunks(data))
+    except (ValueError, struct.error):
+        return False
+
+
+def normalize_upload(data, name):
+    """
+    Strips EXIF from pictures, so the same picture with different
+    metadata is stored once. Pictures are only encoded again when they
+    have to be rotated by their EXIF orientation. Returns the bytes to
+    store and their extension. Other files are left as they are.
+    """
+    extension = os.path.splitext(name)[1].lower()
+    try:
+        picture = PillowImage.open(BytesIO(data))
+        picture_format = picture.format
+    except UnidentifiedImageError:
+        return data, extension
+    if picture_format not in IMAGE_EXTENSIONS:
+        return data, extension
+
+    extension = IMAGE_EXTENSIONS[picture_format]
+    exif = picture.getexif()
+    if not exif:
+        return data, extension
+
+    rotated = exif.get(EXIF_ORIENTATION, 1) != 1
+    if not rotated:
+        stripped = strip_metadata(data, picture_format)
+        if stripped is not None:
+            return stripped, extension
+
+    options = {'exif': b'', 'icc_profile': picture.info.get('icc_profile')}
+    if rotated:
+        picture = ImageOps.exif_transpose(picture)
+    if picture_format == 'JPEG':
+        # Pictures that are not rotated keep their quantization tables
+        options['quality'] = 95 if rotated else 'keep'
+    elif picture_format == 'WEBP':
+        if is_lossless_webp(data):
+            options['lossless'] = True
+        else:
+            options['quality'] = 95
+
+    content = BytesIO()
+    picture.save(content, picture_format, **options)
+    return content.getvalue(), extension
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Names every file by the SHA-256 of its normalized content and keeps
+    one copy of it in `blobs/ab/cd/<hash><extension>`, whatever name and
+    directory it was uploaded with. Files may be shared by many rows,
+    so they must not be deleted when one of them is.
+    """
+    directory = 'blobs'
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        content.seek(0)
+        data, extension = normalize_upload(content.read(), name)
+        blob_name = self.get_blob_name(sha256(data).hexdigest(), extension)
+        if not self.exists(blob_name):
+            saved_name = self._save(blob_name, ContentFile(data))
+            if saved_name != blob_name:
+                # The same blob was saved concurrently, the copy is dropped
+                self.delete(saved_name)
+        return blob_name
+
+    def get_blob_name(self, checksum, extension):
+        return (
+            f'{self.directory}/{checksum[:2]}/{checksum[2:4]}/'
+            f'{checksum}{extension}'
+        )
+
+    @staticmethod
+    def get_checksum(name):
+        """Checksum of a blob name, empty for files saved before"""
+        stem = os.path.splitext(os.path.basename(name or ''))[0]
+        return stem if BLOB_NAME_PATTERN.match(stem) else ''
@@ -0,0 +1,34 @@
+from vinylin.celery import celery_app
+from store.availability import sync_availability_mirror
+from store.campaigns import sync_discount_campaigns
+from store.models import Image
+from store.popularity import decay_trending_scores, flush_counters
+from store.renditions import create_renditions
+
+
+@celery_app.task
+def create_image_renditions_task(image_id):
+    image = Image.objects.filter(pk=image_id).first()
+    if image is None:
+        return
+    create_renditions(image)
+
+
+@celery_app.task
+def flush_popularity_counters_task():
+    return flush_counters()
+
+
+@celery_app.task
+def decay_trending_scores_task():
+    return decay_trending_scores()
+
+
+@celery_app.task
+def sync_availability_mirror_task():
+    return sync_availability_mirror()
+
+
+@celery_app.task
+def sync_discount_campaigns_task():
+    return sync_discount_campaigns()
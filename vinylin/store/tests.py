@@ -0,0 +1,740 @@
+import os
+import re
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from hashlib import sha256
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DataError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image as PillowImage
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from orders.models import Order, OrderItem
+from users.models import User
+from vinyl.models import Artist, Genre, Vinyl
+from store.availability import (
+    CHANGED_KEY,
+    MIRROR_KEY,
+    get_availability,
+    mirror_availability,
+    sync_availability_mirror,
+)
+from store.campaigns import preview_campaign, sync_discount_campaigns
+from store.models import (
+    Discount,
+    DiscountCampaign,
+    Image,
+    ImageRendition,
+    Product,
+    Storage,
+    Tag,
+)
+from store.popularity import (
+    SALES_KEY,
+    VIEWS_KEY,
+    count_view,
+    decay_trending_scores,
+    flush_counters,
+    recount_sales,
+)
+from store.pricing import line_price, unit_price, unit_price_expression
+from store.renditions import create_renditions
+from store.serializers import DiscountSerializer, ImageSrcsetSerializer
+from store.forms import ProductAdminForm, ProductCSVForm
+from store.services import ProductBulkService
+from store.storage import ContentAddressedStorage
+from store.utils import (
+    allocate_part_numbers,
+    format_part_number,
+    PART_NUMBER_MAX_VALUE,
+)
+from store.tasks import create_image_renditions_task
+
+
+class PricingTest(TestCase):
+    def test_unit_price(self):
+        self.assertEqual(unit_price('10.00'), Decimal('10.00'))
+        self.assertEqual(unit_price('10.00', 0), Decimal('10.00'))
+        self.assertEqual(unit_price('10.00', 15), Decimal('8.50'))
+        # 0.05 * 0.9 = 0.045 is rounded half up
+        self.assertEqual(unit_price('0.05', 10), Decimal('0.05'))
+        self.assertEqual(unit_price(19.99, 33), Decimal('13.39'))
+
+    def test_line_price(self):
+        self.assertEqual(line_price('0.05', 10, 3), Decimal('0.15'))
+
+    def test_database_and_python_prices_match(self):
+        prices = ('0.05', '0.15', '9.99', '19.99', '333.33')
+        amounts = (0, 1, 10, 15, 33, 50, 99)
+        for number, price in enumerate(prices):
+            for amount in amounts:
+                product = Product.objects.create(
+                    title='Title',
+                    price=price,
+                    part_number=f'{number}-{amount}'
+                )
+                Discount.objects.create(product=product, amount=amount)
+
+        products = (
+            Product.objects.select_related('discount')
+                           .annotate(unit_price=unit_price_expression())
+        )
+        for product in products:
+            self.assertEqual(
+                product.unit_price,
+                unit_price(product.price, product.discount.amount)
+            )
+
+    def test_discount_serializer(self):
+        product = Product.objects.create(title='Title', price='19.99')
+        discount = Discount.objects.create(product=product, amount=33)
+        self.assertEqual(DiscountSerializer(discount).data,
+                         {'amount': 33, 'price_with_discount': '13.39'})
+
+
+class EffectivePriceTest(TestCase):
+    def get_effective_price(self, product):
+        product.refresh_from_db(fields=['effective_price'])
+        return product.effective_price
+
+    def test_follows_price_and_discount(self):
+        product = Product.objects.create(title='Title', price='19.99')
+        self.assertEqual(self.get_effective_price(product), Decimal('19.99'))
+
+        discount = Discount.objects.create(product=product, amount=33)
+        self.assertEqual(self.get_effective_price(product),
+                         unit_price('19.99', 33))
+
+        discount.amount = 0
+        discount.save()
+        self.assertEqual(self.get_effective_price(product), Decimal('19.99'))
+
+        Discount.objects.filter(pk=discount.pk).update(amount=50)
+        Product.objects.filter(pk=product.pk).update(price='0.05')
+        self.assertEqual(self.get_effective_price(product),
+                         unit_price('0.05', 50))
+
+        discount.delete()
+        self.assertEqual(self.get_effective_price(product), Decimal('0.05'))
+
+
+class InStockTest(TestCase):
+    def get_in_stock(self, product):
+        product.refresh_from_db(fields=['in_stock'])
+        return product.in_stock
+
+    def test_follows_storage(self):
+        product = Product.objects.create(title='Title', price='19.99')
+        self.assertIs(self.get_in_stock(product), False)
+
+        storage = Storage.objects.create(product=product, quantity=2)
+        self.assertIs(self.get_in_stock(product), True)
+
+        Storage.objects.filter(pk=storage.pk).update(quantity=0)
+        self.assertIs(self.get_in_stock(product), False)
+
+        storage.quantity = 1
+        storage.save()
+        self.assertIs(self.get_in_stock(product), True)
+
+        # A stale flag of a saved instance is not written back
+        product.in_stock = False
+        product.save()
+        self.assertIs(self.get_in_stock(product), True)
+
+        storage.delete()
+        self.assertIs(self.get_in_stock(product), False)
+
+
+class DiscountCampaignTest(TestCase):
+    def setUp(self):
+        tag = Tag.objects.create(title='Tag')
+        genre = Genre.objects.create(title='Genre')
+        artist = Artist.objects.create(name='Artist')
+        self.tagged, self.of_genre, self.of_artist, self.listed, other = (
+            Vinyl.objects.create(title=f'Title {number}', price='10.00',
+                                 vinyl_title=f'Title {number}')
+            for number in range(5)
+        )
+        self.tagged.tags.add(tag)
+        self.of_genre.genres.add(genre)
+        Vinyl.objects.filter(pk=self.of_artist.pk).update(artist=artist)
+        Discount.objects.create(product=self.tagged, amount=10)
+        Discount.objects.create(product=self.of_genre, amount=60)
+
+        self.campaign = self.create_campaign(amount=30)
+        self.campaign.products.add(self.listed)
+        self.campaign.tags.add(tag)
+        self.campaign.genres.add(genre)
+        self.campaign.artists.add(artist)
+
+    @staticmethod
+    def create_campaign(amount):
+        now = timezone.now()
+        return DiscountCampaign.objects.create(
+            title=f'{amount}% off',
+            amount=amount,
+            starts_at=now - timezone.timedelta(hours=1),
+            ends_at=now + timezone.timedelta(hours=1),
+        )
+
+    @staticmethod
+    def end(campaign):
+        DiscountCampaign.objects.filter(pk=campaign.pk).update(
+            ends_at=timezone.now()
+        )
+
+    def get_amounts(self):
+        return dict(Discount.objects.values_list('product_id', 'amount'))
+
+    def test_campaigns(self):
+        self.assertEqual(preview_campaign(self.campaign),
+                         {'products': 4, 'raised': 3, 'applied': 0})
+        self.assertEqual(sync_discount_campaigns(), (1, 0))
+        self.assertEqual(sync_discount_campaigns(), (0, 0))
+        # Larger discounts are kept
+        self.assertEqual(self.get_amounts(), {
+            self.tagged.pk: 30,
+            self.of_genre.pk: 60,
+            self.of_artist.pk: 30,
+            self.listed.pk: 30,
+        })
+        self.assertEqual(
+            Product.objects.get(pk=self.listed.pk).effective_price,
+            Decimal('7.00')
+        )
+        self.assertEqual(preview_campaign(self.campaign),
+                         {'products': 4, 'raised': 0, 'applied': 3})
+
+        overlapping = self.create_campaign(amount=50)
+        overlapping.products.add(self.tagged)
+        self.assertEqual(sync_discount_campaigns(), (1, 0))
+        self.assertEqual(self.get_amounts()[self.tagged.pk], 50)
+
+        # Products fall back to the campaigns that are still active
+        self.end(overlapping)
+        self.assertEqual(sync_discount_campaigns(), (0, 1))
+        self.assertEqual(self.get_amounts()[self.tagged.pk], 30)
+
+        self.end(self.campaign)
+        self.assertEqual(sync_discount_campaigns(), (0, 1))
+        self.assertEqual(self.get_amounts(), {
+            self.tagged.pk: 10,
+            self.of_genre.pk: 60,
+            self.of_artist.pk: 0,
+            self.listed.pk: 0,
+        })
+        self.assertFalse(Discount.objects.filter(campaign__isnull=False)
+                                         .exists())
+
+    def test_deleted_campaign_is_ended(self):
+        sync_discount_campaigns()
+        DiscountCampaign.objects.get(pk=self.campaign.pk).delete()
+        self.assertEqual(self.get_amounts()[self.tagged.pk], 10)
+        self.assertEqual(self.get_amounts()[self.listed.pk], 0)
+
+    def test_bulk_discount_during_campaign(self):
+        sync_discount_campaigns()
+
+        def set_discount(product, amount):
+            products = Product.objects.filter(pk=product.pk)
+            ProductBulkService(products).set_discount(amount)
+
+        # The campaign keeps its larger discount
+        set_discount(self.tagged, 20)
+        self.assertEqual(self.get_amounts()[self.tagged.pk], 30)
+        set_discount(self.listed, 0)
+        set_discount(self.of_artist, 40)
+        self.assertEqual(self.get_amounts()[self.of_artist.pk], 40)
+
+        self.end(self.campaign)
+        sync_discount_campaigns()
+        self.assertEqual(self.get_amounts(), {
+            self.tagged.pk: 20,
+            self.of_genre.pk: 60,
+            self.of_artist.pk: 40,
+            self.listed.pk: 0,
+        })
+
+    def test_deleted_campaign_falls_back_to_overlapping(self):
+        overlapping = self.create_campaign(amount=50)
+        overlapping.products.add(self.tagged)
+        self.assertEqual(sync_discount_campaigns(), (2, 0))
+        self.assertEqual(self.get_amounts()[self.tagged.pk], 50)
+
+        # The instance is stale, its status is still scheduled
+        overlapping.delete()
+        self.assertEqual(self.get_amounts()[self.tagged.pk], 30)
+        self.assertEqual(sync_discount_campaigns(), (0, 0))
+        self.assertEqual(self.get_amounts()[self.tagged.pk], 30)
+        self.assertEqual(
+            Discount.objects.get(product=self.tagged).regular_amount, 10
+        )
+
+
+class PartNumberTest(TestCase):
+    LEGACY_PATTERN = r'^[A-Z]{2}[1-9][0-9]{8}$'
+    PATTERN = r'^[A-Z]{2}0[0-9]{8}$'
+
+    def test_format(self):
+        self.assertEqual(format_part_number(1), 'AA000000001')
+        self.assertEqual(format_part_number(10 ** 8), 'AB000000000')
+        self.assertEqual(format_part_number(PART_NUMBER_MAX_VALUE),
+                         'ZZ099999999')
+
+    def test_allocate(self):
+        part_numbers = allocate_part_numbers(5000)
+        self.assertEqual(len(set(part_numbers)), 5000)
+        self.assertTrue(all(
+            re.match(self.PATTERN, part_number)
+            and not re.match(self.LEGACY_PATTERN, part_number)
+            for part_number in part_numbers
+        ))
+        self.assertEqual(allocate_part_numbers(0), [])
+
+    def test_allocated_on_save(self):
+        product = Product.objects.create(title='Title', price='10.00')
+        self.assertRegex(product.part_number, self.PATTERN)
+        product.save()
+        self.assertEqual(
+            Product.objects.get(pk=product.pk).part_number,
+            product.part_number
+        )
+
+        legacy = Product.objects.create(title='Title', price='10.00',
+                                        part_number='AB123456789')
+        self.assertEqual(legacy.part_number, 'AB123456789')
+
+    def test_admin_form_has_no_default(self):
+        form = ProductAdminForm()
+        self.assertNotIn('value=', str(form['part_number']))
+
+
+class PopularityTest(TestCase):
+    def setUp(self):
+        self.first = Product.objects.create(title='First', price='10.00')
+        self.second = Product.objects.create(title='Second', price='10.00')
+
+    def test_flush_counters(self):
+        counts = {
+            f'{VIEWS_KEY}:flushing': {
+                str(self.first.pk).encode(): b'3',
+                str(self.second.pk).encode(): b'1',
+            },
+            f'{SALES_KEY}:flushing': {str(self.first.pk).encode(): b'2'},
+        }
+        with mock.patch('store.popularity.counters') as counters:
+            counters.hgetall.side_effect = counts.get
+            self.assertEqual(flush_counters(), 2)
+            self.assertEqual(flush_counters(), 2)
+
+        counters.renamenx.assert_any_call(VIEWS_KEY, f'{VIEWS_KEY}:flushing')
+        counters.delete.assert_called_with(*counts)
+        self.first.refresh_from_db()
+        self.assertEqual(
+            (self.first.view_count, self.first.sales_count,
+             self.first.trending_score),
+            (6, 4, 46.0)
+        )
+        self.assertEqual(Product.objects.get(pk=self.second.pk).view_count, 2)
+
+    @mock.patch('store.popularity._retry_at', 0.0)
+    def test_count_view_without_redis(self):
+        with mock.patch('store.popularity.counters') as counters:
+            counters.pipeline.side_effect = RedisConnectionError
+            count_view(self.first.pk)
+            # Redis is not tried again until the retry interval passes
+            count_view(self.first.pk)
+            self.assertEqual(counters.pipeline.call_count, 1)
+
+            with mock.patch('store.popularity.time.monotonic',
+                            return_value=time.monotonic() + 60):
+                count_view(self.first.pk)
+            self.assertEqual(counters.pipeline.call_count, 2)
+
+    def test_decay_trending_scores(self):
+        Product.objects.filter(pk=self.first.pk).update(trending_score=10)
+        Product.objects.filter(pk=self.second.pk).update(trending_score=0.015)
+        self.assertEqual(decay_trending_scores(hours=24), 2)
+        self.assertEqual(decay_trending_scores(hours=24), 1)
+        self.assertEqual(
+            list(Product.objects.order_by('pk')
+                                .values_list('trending_score', flat=True)),
+            [2.5, 0]
+        )
+
+    def test_recount_sales(self):
+        for status, quantity in (('PA', 2), ('DE', 3), ('CA', 5)):
+            order = Order.objects.create(status=status, total_price='10.00')
+            OrderItem.objects.create(order=order, product=self.first,
+                                     quantity=quantity)
+        recount_sales()
+        self.assertEqual(Product.objects.get(pk=self.first.pk).sales_count, 5)
+        self.assertEqual(Product.objects.get(pk=self.second.pk).sales_count,
+                         0)
+
+
+class AvailabilityTest(TestCase):
+    def setUp(self):
+        self.first = Product.objects.create(title='First', price='10.00')
+        self.second = Product.objects.create(title='Second', price='20.00')
+        Storage.objects.create(product=self.first, quantity=3)
+        Storage.objects.create(product=self.second, quantity=0)
+        Discount.objects.create(product=self.second, amount=10)
+
+    def test_get_availability(self):
+        with self.assertNumQueries(1):
+            availability = get_availability(
+                [self.second.pk, 0, self.first.pk, self.second.pk]
+            )
+        self.assertEqual(availability, [
+            {'id': self.second.pk, 'quantity': 0, 'in_stock': False,
+             'effective_price': '18.00'},
+            {'id': self.first.pk, 'quantity': 3, 'in_stock': True,
+             'effective_price': '10.00'},
+        ])
+
+    @override_settings(AVAILABILITY_MIRROR=True)
+    def test_get_availability_from_mirror(self):
+        with mock.patch('store.availability.mirror') as mirror:
+            mirror.hmget.return_value = [b'7|9.50', None, None]
+            with self.assertNumQueries(1):
+                availability = get_availability(
+                    [self.first.pk, self.second.pk, 0]
+                )
+
+        self.assertEqual(availability, [
+            {'id': self.first.pk, 'quantity': 7, 'in_stock': True,
+             'effective_price': '9.50'},
+            {'id': self.second.pk, 'quantity': 0, 'in_stock': False,
+             'effective_price': '18.00'},
+        ])
+        # Products read from the database are mirrored
+        pipe = mirror.pipeline.return_value.__enter__.return_value
+        pipe.hset.assert_called_once_with(
+            MIRROR_KEY, mapping={self.second.pk: '0|18.00'}
+        )
+
+    @override_settings(AVAILABILITY_MIRROR=True)
+    def test_mirror_follows_changes(self):
+        with mock.patch('store.availability.mirror') as mirror:
+            pipe = mirror.pipeline.return_value.__enter__.return_value
+            with self.captureOnCommitCallbacks(execute=True):
+                Storage.objects.filter(product=self.first).get().delete()
+            pipe.hset.assert_called_with(
+                MIRROR_KEY, mapping={self.first.pk: '|10.00'}
+            )
+
+            pk = self.second.pk
+            with self.captureOnCommitCallbacks(execute=True):
+                self.second.delete()
+            pipe.hdel.assert_called_with(MIRROR_KEY, pk)
+
+    @override_settings(AVAILABILITY_MIRROR=True)
+    def test_sync_mirrors_changes_made_meanwhile(self):
+        with mock.patch('store.availability.mirror') as mirror:
+            pipe = mirror.pipeline.return_value.__enter__.return_value
+            pipe.execute.return_value = [{str(self.first.pk).encode()}, 1]
+            self.assertEqual(sync_availability_mirror(), 2)
+
+        mirror.delete.assert_any_call(f'{MIRROR_KEY}:sync', CHANGED_KEY)
+        # The product written during the sync is mirrored after the swap
+        names = [name for name, args, kwargs in mirror.mock_calls]
+        last_write = max(position for position, name in enumerate(names)
+                         if name.endswith('.hset'))
+        self.assertLess(names.index('rename'), last_write)
+        pipe.hset.assert_called_with(
+            MIRROR_KEY, mapping={self.first.pk: '3|10.00'}
+        )
+
+    def test_mirror_is_off(self):
+        with mock.patch('store.availability.mirror') as mirror:
+            with self.captureOnCommitCallbacks(execute=True):
+                Storage.objects.filter(product=self.first).update(quantity=1)
+                self.first.save()
+            get_availability([self.first.pk])
+            mirror_availability([self.first.pk])
+        self.assertFalse(mirror.hmget.called)
+        self.assertEqual(mirror.pipeline.call_count, 1)
+
+
+class MediaTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root
+        )
+        self.settings_override.enable()
+        self.product = Product.objects.create(title='Title', price='10.00')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    @staticmethod
+    def make_picture(size, mode='RGB', exif=None):
+        content = BytesIO()
+        PillowImage.new(mode, size, 'red').save(
+            content, 'PNG' if 'A' in mode else 'JPEG', exif=exif or b''
+        )
+        return content.getvalue()
+
+    def create_image(self, size, mode='RGB', exif=None, name='cover.jpg'):
+        return Image.objects.create(
+            product=self.product,
+            image=SimpleUploadedFile(name,
+                                     self.make_picture(size, mode, exif)),
+        )
+
+    @staticmethod
+    def rotated_exif():
+        exif = PillowImage.Exif()
+        exif[0x0112] = 6  # Rotated 90 degrees clockwise
+        return exif.tobytes()
+
+
+class ContentAddressedStorageTest(MediaTestCase):
+    def count_files(self):
+        return sum(len(files) for _, _, files in os.walk(self.media_root))
+
+    def test_duplicates_are_stored_once(self):
+        first = self.create_image((100, 100), name='first.jpeg')
+        second = self.create_image((100, 100), name='second.JPG')
+
+        with first.image.open('rb') as file:
+            checksum = sha256(file.read()).hexdigest()
+        self.assertEqual(first.checksum, checksum)
+        self.assertEqual(
+            first.image.name,
+            f'blobs/{checksum[:2]}/{checksum[2:4]}/{checksum}.jpg'
+        )
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(self.count_files(), 1)
+
+    def test_exif_is_stripped_on_ingest(self):
+        plain = self.create_image((40, 20))
+        rotated = self.create_image((20, 40), exif=self.rotated_exif())
+        with PillowImage.open(rotated.image.path) as picture:
+            self.assertEqual(picture.size, (40, 20))
+            self.assertNotIn(0x0112, picture.getexif())
+        self.assertNotEqual(plain.checksum, rotated.checksum)
+
+        described = PillowImage.Exif()
+        described[0x010E] = 'Description'
+        same_as_plain = self.create_image((40, 20),
+                                          exif=described.tobytes())
+        self.assertEqual(same_as_plain.checksum, plain.checksum)
+
+    def test_webp_is_not_compressed_again(self):
+        gradient = PillowImage.radial_gradient('L').convert('RGB')
+
+        def upload(picture, exif=b''):
+            content = BytesIO()
+            picture.save(content, 'WEBP', lossless=True, exif=exif)
+            return Image.objects.create(
+                product=self.product,
+                image=SimpleUploadedFile('cover.webp', content.getvalue()),
+            )
+
+        plain = upload(gradient)
+        described = PillowImage.Exif()
+        described[0x010E] = 'Description'
+        self.assertEqual(upload(gradient, described.tobytes()).checksum,
+                         plain.checksum)
+
+        rotated = upload(gradient.transpose(PillowImage.ROTATE_90),
+                         self.rotated_exif())
+        with PillowImage.open(rotated.image.path) as picture:
+            self.assertFalse(picture.getexif())
+            self.assertEqual(picture.tobytes(), gradient.tobytes())
+
+    def test_other_files_are_kept_as_they_are(self):
+        storage = ContentAddressedStorage()
+        name = storage.save('uploads/notes.TXT', ContentFile(b'notes'))
+        checksum = sha256(b'notes').hexdigest()
+        self.assertEqual(name, storage.get_blob_name(checksum, '.txt'))
+        with storage.open(name) as file:
+            self.assertEqual(file.read(), b'notes')
+        self.assertEqual(storage.get_checksum('vinyl/images/a.jpg'), '')
+
+    def test_deduplicate_legacy_images(self):
+        storage = ContentAddressedStorage()
+        legacy_names = []
+        for number in range(2):
+            legacy_name = f'vinyl/images/cover_{number}.jpg'
+            storage._save(legacy_name,
+                          ContentFile(self.make_picture((10, 10))))
+            legacy_names.append(legacy_name)
+            Image.objects.create(product=self.product, image=legacy_name)
+
+        call_command('deduplicate_images', stdout=StringIO())
+        names = set(Image.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertEqual(self.count_files(), 1)
+        self.assertFalse(any(map(storage.exists, legacy_names)))
+        self.assertFalse(Image.objects.filter(checksum='').exists())
+
+
+class ImageRenditionTest(MediaTestCase):
+
+    def test_create_renditions(self):
+        image = self.create_image((1000, 500))
+        renditions = create_renditions(image)
+        self.assertEqual(
+            [(rendition.format, rendition.width)
+             for rendition in image.renditions.all()],
+            [('jpeg', 160), ('jpeg', 320), ('jpeg', 640),
+             ('webp', 160), ('webp', 320), ('webp', 640)]
+        )
+        for rendition in renditions:
+            with PillowImage.open(rendition.file.path) as picture:
+                self.assertEqual(picture.format, rendition.format.upper())
+                self.assertEqual(picture.size,
+                                 (rendition.width, rendition.width // 2))
+
+        old_paths = [rendition.file.path for rendition in renditions]
+        create_renditions(image)
+        self.assertEqual(image.renditions.count(), 6)
+        self.assertFalse(any(map(os.path.exists, old_paths)))
+
+    def test_small_and_transparent_image(self):
+        image = self.create_image((200, 100), mode='RGBA')
+        create_renditions(image)
+        self.assertEqual(
+            sorted(image.renditions.values_list('format', 'width')),
+            [('jpeg', 160), ('jpeg', 200), ('webp', 160), ('webp', 200)]
+        )
+
+    def test_exif_orientation(self):
+        image = self.create_image((400, 200), exif=self.rotated_exif())
+        create_renditions(image)
+        rendition = image.renditions.get(format=ImageRendition.JPEG,
+                                         width=160)
+        with PillowImage.open(rendition.file.path) as picture:
+            self.assertEqual(picture.size, (160, 320))
+            self.assertNotIn(0x0112, picture.getexif())
+
+    def test_task_is_queued_on_upload(self):
+        with mock.patch.object(create_image_renditions_task,
+                               'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                image = self.create_image((320, 320))
+        delay.assert_called_once_with(image.pk)
+
+        create_image_renditions_task(image.pk)
+        self.assertEqual(
+            ImageSrcsetSerializer(image).data,
+            {
+                'jpeg': f'/media/vinyl/renditions/{image.pk}-160.jpeg 160w, '
+                        f'/media/vinyl/renditions/{image.pk}-320.jpeg 320w',
+                'webp': f'/media/vinyl/renditions/{image.pk}-160.webp 160w, '
+                        f'/media/vinyl/renditions/{image.pk}-320.webp 320w',
+            }
+        )
+
+
+class ProductBulkServiceTest(TestCase):
+    def setUp(self):
+        self.first = Product.objects.create(title='First', price='10.00',
+                                            part_number='A1')
+        self.second = Product.objects.create(title='Second', price='20.00',
+                                             part_number='B2')
+        Storage.objects.create(product=self.first, quantity=1)
+        self.service = ProductBulkService(Product.objects.all())
+
+    def get_values(self, field):
+        return list(Product.objects.order_by('pk')
+                                   .values_list(field, flat=True))
+
+    def test_adjust_stock(self):
+        self.assertEqual(self.service.adjust_stock(3), 2)
+        self.assertEqual(self.get_values('storage__quantity'), [4, 3])
+
+        self.assertEqual(self.service.adjust_stock(-4), 2)
+        self.assertEqual(self.get_values('storage__quantity'), [0, 0])
+        self.assertEqual(self.get_values('in_stock'), [False, False])
+
+    def test_set_discount(self):
+        self.assertEqual(self.service.set_discount(50), 2)
+        self.assertEqual(self.get_values('effective_price'),
+                         [Decimal('5.00'), Decimal('10.00')])
+        # Unchanged discounts are not written
+        self.assertEqual(self.service.set_discount(50), 0)
+
+        service = ProductBulkService(Product.objects.filter(title='First'))
+        self.assertEqual(service.set_discount(0), 1)
+        self.assertEqual(self.get_values('effective_price'),
+                         [Decimal('10.00'), Decimal('10.00')])
+
+    def test_reprice(self):
+        self.assertEqual(self.service.reprice(Decimal('12.5')), 2)
+        self.assertEqual(self.get_values('price'),
+                         [Decimal('11.25'), Decimal('22.50')])
+
+        Product.objects.filter(pk=self.second.pk).update(price='9000.00')
+        with self.assertRaises(DataError):
+            self.service.reprice(20)
+        self.assertEqual(self.get_values('price'),
+                         [Decimal('11.25'), Decimal('9000.00')])
+
+    def test_update_from_csv(self):
+        form = ProductCSVForm(files={'file': SimpleUploadedFile(
+            'stock.csv',
+            b'part_number,quantity,price\n'
+            b'A1,5,\n'
+            b'B2,,19.99\n'
+            b'C3,1,1.00\n'
+        )})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(
+            ProductBulkService().update_from_csv(form.cleaned_data['file']),
+            (1, 1, ['C3'])
+        )
+        self.assertEqual(self.get_values('storage__quantity'), [5, None])
+        self.assertEqual(self.get_values('price'),
+                         [Decimal('10.00'), Decimal('19.99')])
+
+    def test_invalid_csv(self):
+        form = ProductCSVForm(files={'file': SimpleUploadedFile(
+            'stock.csv', b'part_number,quantity\nA1,-1\n,2\n'
+        )})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['file'], [
+            'Line 2: quantity is negative',
+            'Line 3: part_number is required',
+        ])
+
+    def test_admin_action(self):
+        admin = User.objects.create_superuser(email='admin@mail.com',
+                                              password='DifficultPassword1')
+        self.client.force_login(admin)
+        url = '/admin/store/product/'
+        data = {
+            'action': 'adjust_stock',
+            '_selected_action': [self.first.pk],
+        }
+        response = self.client.post(url, {**data, 'index': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'admin/bulk_product_action.html')
+
+        response = self.client.post(url, {**data, 'delta': 2,
+                                          'apply': 'yes'})
+        self.assertRedirects(response, url)
+        self.assertEqual(self.get_values('storage__quantity'), [3, None])
+
+        self.assertContains(self.client.get(url), f'{url}upload-csv/')
+        response = self.client.post(f'{url}upload-csv/', {
+            'file': SimpleUploadedFile('stock.csv',
+                                       b'part_number,price\nB2,1.00\n'),
+        })
+        self.assertRedirects(response, url)
+        self.assertEqual(self.get_values('price'),
+                         [Decimal('10.00'), Decimal('1.00')])
@@ -1,8 +1,46 @@
-import random
 import string
 
+from django.db import connection
+
+
+PART_NUMBER_SEQUENCE = 'store_part_number_seq'
+PART_NUMBER_DIGITS = 8
+PART_NUMBER_LETTERS = string.ascii_uppercase
+# Two letters and the digits, see format_part_number
+PART_NUMBER_MAX_VALUE = (
+    len(PART_NUMBER_LETTERS) ** 2 * 10 ** PART_NUMBER_DIGITS - 1
+)
+
+
+def format_part_number(value):
+    """
+    Two letters, '0' and eight digits, e.g. 'AA000000001'. Random numbers
+    generated before were two letters and nine digits starting from 1-9,
+    so the zero keeps the two sets apart.
+    """
+    letters, digits = divmod(value, 10 ** PART_NUMBER_DIGITS)
+    first, second = divmod(letters, len(PART_NUMBER_LETTERS))
+    return (
+        f'{PART_NUMBER_LETTERS[first]}{PART_NUMBER_LETTERS[second]}'
+        f'0{digits:0{PART_NUMBER_DIGITS}d}'
+    )
+
+
+def allocate_part_numbers(count):
+    """
+    Unique part numbers taken from a database sequence in one query.
+    Sequences are not rolled back, so numbers of failed transactions
+    are skipped rather than reused.
+    """
+    if count < 1:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(%s) FROM generate_series(1, %s)',
+            [PART_NUMBER_SEQUENCE, count]
+        )
+        return [format_part_number(value) for value, in cursor.fetchall()]
+
 
 def generate_part_number():
-    part_number = ''.join(random.choices(string.ascii_uppercase, k=2))
-    part_number += str(random.randint(100_000_000, 999_999_999))
-    return part_number
+    return allocate_part_numbers(1)[0]
@@ -1,12 +1,17 @@
 from django.contrib import admin
 
 from .models import User, Profile
+from store.pagination import EstimatedCountPaginator
 
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = ('id', 'email', 'full_name', 'is_email_verified')
     list_display_links = ('id', 'email', 'full_name')
+    # Trigram indexed (migration 0005)
+    search_fields = ('email',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     @staticmethod
     def full_name(obj):
@@ -17,4 +22,9 @@ class UserAdmin(admin.ModelAdmin):
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'age', 'country')
     list_display_links = ('id', 'user')
+    list_select_related = ('user', 'country')
+    search_fields = ('user__email',)
+    raw_id_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     save_on_top = True
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.13 on 2026-10-18 18:20
+
+from django.db import migrations
+
+
+# Admin search compiles icontains to UPPER(column::text) LIKE UPPER(%s),
+# so the index is built on the same expression
+TRIGRAM_INDEX = '''
+CREATE INDEX users_user_email_trgm_idx
+ON users_user USING gin (UPPER(email::text) gin_trgm_ops);
+'''
+
+DROP_TRIGRAM_INDEX = 'DROP INDEX users_user_email_trgm_idx;'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_alter_profile_balance'),
+        # Creates the pg_trgm extension
+        ('store', '0016_product_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(TRIGRAM_INDEX, DROP_TRIGRAM_INDEX),
+    ]
@@ -1,28 +1,31 @@
 from django.contrib import admin
-from django.db.models import F
 
 from .filters import StockFilter
 from .forms import VinylAdminForm
 from .models import Country, Genre, Artist, Vinyl
 from store.admin import (
     ImageInlineAdmin,
+    ProductBulkActionsMixin,
     StorageInlineAdmin,
     DiscountInlineAdmin
 )
-from store.models import Storage
+from store.pagination import EstimatedCountPaginator
 
 
 @admin.register(Vinyl)
-class VinylAdmin(admin.ModelAdmin):
+class VinylAdmin(ProductBulkActionsMixin, admin.ModelAdmin):
     form = VinylAdminForm
     change_form_template = 'admin/vinyl_change_form.html'
-    actions = ['decrease_quantity']
 
     list_display = ('id', 'title', 'price',
                     'price_with_discount', 'part_number')
     list_display_links = ('id', 'title')
-    search_fields = ('vinyl_title',)
+    # Both are on the product table and trigram indexed (store 0016)
+    search_fields = ('title', 'part_number')
     list_filter = (StockFilter, 'genres')
+    list_select_related = ('discount',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     readonly_fields = ('created_at', 'price_with_discount')
     inlines = [ImageInlineAdmin, StorageInlineAdmin, DiscountInlineAdmin]
@@ -42,18 +45,33 @@ class VinylAdmin(admin.ModelAdmin):
         return super().change_view(request, object_id,
                                    form_url, extra_context=context)
 
-    def decrease_quantity(self, request, queryset):
-        for vinyl in queryset:
-            vinyl_storage = Storage.objects.get(product=vinyl)
-            vinyl_storage.quantity = F('quantity') - 1
-            vinyl_storage.save()
-    decrease_quantity.short_description = "Decrease quantity by 1"
+    @admin.display(description='price with discount',
+                   ordering='effective_price')
+    def price_with_discount(self, obj):
+        """
+        Blank without a non-zero discount. The discount is selected with
+        the list, so the list makes no query per row
+        """
+        discount = getattr(obj, 'discount', None)
+        if discount is None or not discount.amount:
+            return None
+        return obj.effective_price
 
-    @staticmethod
-    def price_with_discount(obj):
-        return str(obj.discount.price_with_discount)
 
+# Search fields serve the autocomplete widgets of VinylAdminForm and are
+# trigram indexed (migration 0011)
+@admin.register(Country)
+class CountryAdmin(admin.ModelAdmin):
+    search_fields = ('name',)
 
-admin.site.register(Country)
-admin.site.register(Genre)
-admin.site.register(Artist)
+
+@admin.register(Genre)
+class GenreAdmin(admin.ModelAdmin):
+    search_fields = ('title',)
+
+
+@admin.register(Artist)
+class ArtistAdmin(admin.ModelAdmin):
+    search_fields = ('name',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
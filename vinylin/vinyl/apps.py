@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class VinylConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'vinyl'
+
+    def ready(self):
+        from vinyl import autocomplete, cache, search  # noqa: F401
@@ -0,0 +1,152 @@
+import time
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from store.models import Tag
+from vinyl.models import Artist, Country, Genre
+
+
+# Reference tables by endpoint name, with the field that is completed
+AUTOCOMPLETE_MODELS = {
+    'artists': (Artist, 'name'),
+    'genres': (Genre, 'title'),
+    'countries': (Country, 'name'),
+    'tags': (Tag, 'title'),
+}
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+# Queries this long are also matched inside words by the database
+MIN_CONTAINS_LENGTH = 3
+
+VERSION_KEY = 'autocomplete:version:{name}'
+# A worker reads the shared version at most this often, so most
+# requests are answered without any I/O
+VERSION_CHECK_INTERVAL = 1
+# Indexes are reloaded this often even while the version is unknown,
+# e.g. when the cache is unavailable
+MAX_INDEX_AGE = 300
+
+
+class PrefixIndex:
+    """
+    Names of a reference table sorted by their normalized form, so the
+    names starting with a prefix are found by a binary search. Starts
+    of the following words are kept apart and only used when names
+    starting with the prefix are fewer than the limit.
+    """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.loaded_at = self.checked_at = time.monotonic()
+
+        names = []
+        words = []
+        for pk, name in rows:
+            key = normalize(name)
+            names.append((key, name, pk))
+            start = key.find(' ')
+            while start != -1:
+                words.append((key[start + 1:], name, pk))
+                start = key.find(' ', start + 1)
+        names.sort()
+        words.sort()
+        self._names = names
+        self._name_keys = [key for key, name, pk in names]
+        self._words = words
+        self._word_keys = [key for key, name, pk in words]
+
+    def __len__(self):
+        return len(self._names)
+
+    def search(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        """Up to `limit` pairs of id and name matching `prefix`"""
+        prefix = normalize(prefix)
+        results = {}
+        for keys, entries in ((self._name_keys, self._names),
+                              (self._word_keys, self._words)):
+            position = bisect_left(keys, prefix)
+            while len(results) < limit and position < len(keys):
+                key, name, pk = entries[position]
+                if not key.startswith(prefix):
+                    break
+                results.setdefault(pk, name)
+                position += 1
+        return list(results.items())
+
+
+# Per worker process, replaced as a whole on reload
+_indexes = {}
+
+
+def normalize(name):
+    return ' '.join(name.casefold().split())
+
+
+def autocomplete(name, query, limit=AUTOCOMPLETE_LIMIT):
+    """
+    Up to `limit` pairs of id and name of the `name` table matching
+    `query`. Names starting with it, or with a word starting with it,
+    come from the prefix index of the worker. Longer queries are
+    completed by names containing them from the trigram indexes.
+    """
+    results = get_index(name).search(query, limit)
+    if len(results) < limit and len(query) >= MIN_CONTAINS_LENGTH:
+        model, field = AUTOCOMPLETE_MODELS[name]
+        found = {pk for pk, _ in results}
+        results.extend(
+            model.objects.filter(**{f'{field}__icontains': query})
+                         .exclude(pk__in=found)
+                         .order_by(field, 'pk')
+                         .values_list('pk', field)[:limit - len(results)]
+        )
+    return results
+
+
+def get_index(name):
+    """
+    The prefix index of the worker, loaded again when the shared
+    version was bumped by a change of the table
+    """
+    index = _indexes.get(name)
+    now = time.monotonic()
+    if index is not None and now - index.checked_at < VERSION_CHECK_INTERVAL:
+        return index
+
+    version = cache.get(VERSION_KEY.format(name=name))
+    if index is None:
+        stale = True
+    elif version is None:
+        stale = now - index.loaded_at > MAX_INDEX_AGE
+    else:
+        stale = version != index.version
+    if stale:
+        model, field = AUTOCOMPLETE_MODELS[name]
+        index = PrefixIndex(model.objects.values_list('pk', field), version)
+        _indexes[name] = index
+    index.checked_at = now
+    return index
+
+
+def invalidate_autocomplete(name):
+    """Makes every worker reload the index of `name` on its next check"""
+    cache.set(VERSION_KEY.format(name=name), time.time_ns(), timeout=None)
+
+
+def invalidate_autocomplete_on_commit(model):
+    for name, (autocomplete_model, field) in AUTOCOMPLETE_MODELS.items():
+        if autocomplete_model is model:
+            transaction.on_commit(
+                lambda name=name: invalidate_autocomplete(name)
+            )
+
+
+@receiver([post_save, post_delete], sender=Artist)
+@receiver([post_save, post_delete], sender=Genre)
+@receiver([post_save, post_delete], sender=Country)
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_on_change(sender, **kwargs):
+    invalidate_autocomplete_on_commit(sender)
@@ -0,0 +1,148 @@
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.response import Response
+
+from store.models import (
+    Discount,
+    Image,
+    ImageRendition,
+    Product,
+    Storage,
+    Tag,
+)
+from vinyl.models import Artist, Country, Genre, Vinyl
+
+
+VERSION_KEY = 'catalog:version'
+# Time of the last version bump, for Last-Modified
+MODIFIED_AT_KEY = 'catalog:modified_at'
+STATS_KEY = 'catalog:stats:{action}:{result}'
+
+
+def get_catalog_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Starting from the clock instead of 1 never reuses the version
+        # of entries that may have outlived an evicted version key
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_catalog_modified_at():
+    """
+    Timestamp of the last change of the catalog, which also covers
+    deletions and changes of relations, or now when it is unknown
+    """
+    modified_at = cache.get(MODIFIED_AT_KEY)
+    if modified_at is None:
+        cache.add(MODIFIED_AT_KEY, time.time(), timeout=None)
+        modified_at = cache.get(MODIFIED_AT_KEY)
+    return time.time() if modified_at is None else modified_at
+
+
+def invalidate_catalog_cache():
+    """Makes every cached catalog response unreachable at once"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+    cache.set(MODIFIED_AT_KEY, time.time(), timeout=None)
+
+
+def invalidate_catalog_cache_on_commit():
+    transaction.on_commit(invalidate_catalog_cache)
+
+
+def count_cache_result(action, result):
+    key = STATS_KEY.format(action=action, result=result)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def get_cache_stats(actions):
+    keys = {
+        (action, result): STATS_KEY.format(action=action, result=result)
+        for action in actions
+        for result in ('hits', 'misses')
+    }
+    values = cache.get_many(list(keys.values()))
+    stats = {action: {'hits': 0, 'misses': 0} for action in actions}
+    for (action, result), key in keys.items():
+        stats[action][result] = values.get(key, 0)
+    return stats
+
+
+class CatalogCacheMixin:
+    """
+    Caches successful responses of `cached_actions` per action, host and
+    query parameters. Keys include the catalog version, which receivers
+    below bump on any change of the cached data.
+    """
+    cached_actions = ('list', 'retrieve')
+    cache_timeout = settings.CATALOG_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request,
+                                        *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request,
+                                        *args, **kwargs)
+
+    def get_cached_response(self, view_func, request, *args, **kwargs):
+        if self.action not in self.cached_actions:
+            return view_func(request, *args, **kwargs)
+
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            count_cache_result(self.action, 'hits')
+            return Response(data=data, status=status.HTTP_200_OK)
+
+        count_cache_result(self.action, 'misses')
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout=self.cache_timeout)
+        return response
+
+    def get_cache_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        request_hash = md5(
+            f'{request.get_host()}{request.path}{params}'.encode()
+        ).hexdigest()
+        return f'catalog:{get_catalog_version()}:{self.action}:{request_hash}'
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Vinyl)
+@receiver([post_save, post_delete], sender=Storage)
+@receiver([post_save, post_delete], sender=Discount)
+@receiver([post_save, post_delete], sender=Image)
+@receiver([post_save, post_delete], sender=ImageRendition)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=Artist)
+@receiver([post_save, post_delete], sender=Genre)
+@receiver([post_save, post_delete], sender=Country)
+def invalidate_on_change(sender, **kwargs):
+    invalidate_catalog_cache_on_commit()
+
+
+@receiver(m2m_changed, sender=Vinyl.genres.through)
+@receiver(m2m_changed, sender=Product.tags.through)
+def invalidate_on_relations_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_catalog_cache_on_commit()
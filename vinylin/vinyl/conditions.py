@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+from hashlib import md5
+
+from django.db import connection
+from django.db.models.functions import Greatest
+
+from store.models import Discount, Product, Storage
+from store.popularity import get_ranked_at
+from vinyl.cache import get_catalog_modified_at, get_catalog_version
+from vinyl.models import Vinyl
+
+
+CATALOG_LAST_MODIFIED_SQL = '''
+SELECT GREATEST(
+    (SELECT MAX(updated_at) FROM {product}),
+    (SELECT MAX(updated_at) FROM {storage}),
+    (SELECT MAX(updated_at) FROM {discount})
+)
+'''
+
+# Orderings by counters, which change without touching updated_at
+RANKED_ORDERINGS = ('popular', 'trending')
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    """
+    Latest change of a product, its stock or discount. Each MAX is read
+    from the end of an updated_at index. Deletions and changes of
+    images, tags and other relations are covered by the time of the
+    last catalog version bump. Lists ordered by popularity also change
+    with every counters flush.
+    """
+    if not hasattr(request, '_catalog_last_modified'):
+        with connection.cursor() as cursor:
+            cursor.execute(CATALOG_LAST_MODIFIED_SQL.format(
+                product=Product._meta.db_table,
+                storage=Storage._meta.db_table,
+                discount=Discount._meta.db_table,
+            ))
+            last_modified = cursor.fetchone()[0]
+        ranked_at = (get_ranked_at()
+                     if request.GET.get('ordering') in RANKED_ORDERINGS
+                     else None)
+        if ranked_at:
+            ranked_at = datetime.fromtimestamp(ranked_at, timezone.utc)
+        request._catalog_last_modified = max(filter(None, (
+            last_modified, ranked_at, _catalog_modified_at()
+        )))
+    return request._catalog_last_modified
+
+
+def catalog_etag(request, *args, **kwargs):
+    last_modified = catalog_last_modified(request, *args, **kwargs)
+    return _make_etag(request, last_modified)
+
+
+def vinyl_last_modified(request, *args, **kwargs):
+    if not hasattr(request, '_catalog_last_modified'):
+        try:
+            pk = int(kwargs.get('pk'))
+        except (TypeError, ValueError):
+            pk = None
+        # Products that are not vinyls are not found by the view
+        last_modified = (
+            Vinyl.objects.filter(pk=pk)
+                         .annotate(last_modified=Greatest(
+                             'updated_at',
+                             'storage__updated_at',
+                             'discount__updated_at',
+                         ))
+                         .values_list('last_modified', flat=True)
+                         .first()
+        )
+        # Images, tags and other relations only bump the catalog version
+        if last_modified is not None:
+            last_modified = max(last_modified, _catalog_modified_at())
+        request._catalog_last_modified = last_modified
+    return request._catalog_last_modified
+
+
+def vinyl_etag(request, *args, **kwargs):
+    last_modified = vinyl_last_modified(request, *args, **kwargs)
+    if last_modified is None:
+        return None
+    return _make_etag(request, last_modified)
+
+
+def _catalog_modified_at():
+    return datetime.fromtimestamp(get_catalog_modified_at(), timezone.utc)
+
+
+def _make_etag(request, last_modified):
+    state = (
+        f'{get_catalog_version()}:{last_modified}:'
+        f'{request.get_host()}{request.get_full_path()}'
+    )
+    return md5(state.encode()).hexdigest()
@@ -0,0 +1,107 @@
+from django.db import connection
+
+from store.models import (
+    Discount,
+    Image,
+    ImageRendition,
+    Product,
+    Storage,
+    Tag,
+)
+from vinyl.models import Artist, Country, Genre, Vinyl
+
+
+# Same document as RetrieveVinylSerializer renders. Prices are numeric
+# with 2 decimal places, so their text is what DecimalField renders, and
+# the effective price is the price with a discount of any non-zero amount.
+VINYL_DOCUMENT_SQL = '''
+SELECT json_build_object(
+    'id', p.id,
+    'storage', (
+        SELECT json_build_object('quantity', s.quantity)
+        FROM {storage} s WHERE s.product_id = p.id
+    ),
+    'images', COALESCE((
+        SELECT json_agg(%(image_url)s || i.image ORDER BY i.id)
+        FROM {image} i WHERE i.product_id = p.id
+    ), '[]'),
+    'srcsets', COALESCE((
+        SELECT json_agg((
+            SELECT COALESCE(
+                json_object_agg(r.format, r.srcset ORDER BY r.format), '{{}}'
+            )
+            FROM (
+                SELECT format, string_agg(
+                    %(rendition_url)s || file || ' ' || width || 'w', ', '
+                    ORDER BY width
+                ) AS srcset
+                FROM {rendition} WHERE image_id = i.id
+                GROUP BY format
+            ) r
+        ) ORDER BY i.id)
+        FROM {image} i WHERE i.product_id = p.id
+    ), '[]'),
+    'tags', COALESCE((
+        SELECT json_agg(t.title ORDER BY t.id)
+        FROM {product_tags} pt JOIN {tag} t ON t.id = pt.tag_id
+        WHERE pt.product_id = p.id
+    ), '[]'),
+    'discount', (
+        SELECT json_build_object(
+            'amount', d.amount,
+            'price_with_discount',
+            CASE WHEN d.amount <> 0 THEN p.effective_price::text END
+        )
+        FROM {discount} d WHERE d.product_id = p.id
+    ),
+    'country', (SELECT c.name FROM {country} c WHERE c.id = v.country_id),
+    'genres', COALESCE((
+        SELECT json_agg(g.title ORDER BY g.id)
+        FROM {vinyl_genres} vg JOIN {genre} g ON g.id = vg.genre_id
+        WHERE vg.vinyl_id = v.product_ptr_id
+    ), '[]'),
+    'artist', (SELECT a.name FROM {artist} a WHERE a.id = v.artist_id),
+    'title', p.title,
+    'price', p.price::text,
+    'part_number', p.part_number,
+    'overview', p.overview,
+    'format', v.format,
+    'credits', v.credits
+)::text
+FROM {vinyl} v JOIN {product} p ON p.id = v.product_ptr_id
+WHERE v.product_ptr_id = %(pk)s
+'''.format(
+    vinyl=Vinyl._meta.db_table,
+    product=Product._meta.db_table,
+    storage=Storage._meta.db_table,
+    image=Image._meta.db_table,
+    rendition=ImageRendition._meta.db_table,
+    tag=Tag._meta.db_table,
+    product_tags=Product.tags.through._meta.db_table,
+    discount=Discount._meta.db_table,
+    country=Country._meta.db_table,
+    genre=Genre._meta.db_table,
+    vinyl_genres=Vinyl.genres.through._meta.db_table,
+    artist=Artist._meta.db_table,
+)
+
+
+def get_vinyl_document(pk):
+    """
+    JSON text of the vinyl detail assembled by PostgreSQL in 1 query,
+    or None if there is no such vinyl. Image and rendition URLs are the
+    base URL of each field's storage joined with stored names, which
+    upload names keep URL-safe. Images are content-addressed blobs and
+    renditions use the default storage.
+    """
+    image_storage = Image._meta.get_field('image').storage
+    rendition_storage = ImageRendition._meta.get_field('file').storage
+    params = {
+        'pk': pk,
+        'image_url': image_storage.url(''),
+        'rendition_url': rendition_storage.url(''),
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(VINYL_DOCUMENT_SQL, params)
+        row = cursor.fetchone()
+    return None if row is None else row[0]
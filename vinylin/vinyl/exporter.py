@@ -0,0 +1,94 @@
+import csv
+import json
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import F, OuterRef, Subquery
+
+from store.models import Tag
+from vinyl.importer import LIST_SEPARATOR
+from vinyl.models import Genre
+
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ('jsonl', 'csv')
+
+# Columns are the ones import_catalog reads, plus the effective price
+EXPORT_FIELDS = (
+    'part_number', 'title', 'vinyl_title', 'price', 'effective_price',
+    'artist', 'country', 'format', 'credits', 'genres', 'tags',
+    'quantity', 'discount',
+)
+LIST_FIELDS = ('genres', 'tags')
+
+
+def export_queryset(queryset):
+    """
+    Vinyls as tuples of EXPORT_FIELDS, genre and tag titles are read
+    by subqueries so the rows need no grouping
+    """
+    genres = (
+        Genre.objects.filter(vinyl=OuterRef('pk'))
+                     .order_by()
+                     .values('vinyl')
+                     .annotate(titles=ArrayAgg('title', ordering='pk'))
+    )
+    tags = (
+        Tag.objects.filter(tags=OuterRef('pk'))
+                   .order_by()
+                   .values('tags')
+                   .annotate(titles=ArrayAgg('title', ordering='pk'))
+    )
+    return (
+        queryset.annotate(
+            artist_name=F('artist__name'),
+            country_name=F('country__name'),
+            genre_titles=Subquery(genres.values('titles')),
+            tag_titles=Subquery(tags.values('titles')),
+            quantity=F('storage__quantity'),
+            discount_amount=F('discount__amount'),
+        )
+        .order_by('pk')
+        .values_list(
+            'part_number', 'title', 'vinyl_title', 'price', 'effective_price',
+            'artist_name', 'country_name', 'format', 'credits',
+            'genre_titles', 'tag_titles', 'quantity', 'discount_amount',
+        )
+    )
+
+
+def iter_export(queryset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the export line by line. Rows are fetched through
+    a server-side cursor `chunk_size` at a time, so memory stays flat
+    however many vinyls there are.
+    """
+    rows = export_queryset(queryset).iterator(chunk_size=chunk_size)
+    if export_format == 'csv':
+        return _iter_csv(rows)
+    return _iter_jsonl(rows)
+
+
+def _iter_jsonl(rows):
+    for row in rows:
+        record = dict(zip(EXPORT_FIELDS, row))
+        for field in LIST_FIELDS:
+            record[field] = record[field] or []
+        yield json.dumps(record, ensure_ascii=False, default=str) + '\n'
+
+
+class _Line:
+    """Pseudo buffer that returns what csv.writer writes into it"""
+
+    def write(self, value):
+        return value
+
+
+def _iter_csv(rows):
+    writer = csv.writer(_Line())
+    list_indexes = [EXPORT_FIELDS.index(field) for field in LIST_FIELDS]
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row = list(row)
+        for index in list_indexes:
+            row[index] = LIST_SEPARATOR.join(row[index] or [])
+        yield writer.writerow(row)
@@ -0,0 +1,96 @@
+from django.db import connection
+
+from store.models import Discount, Product, Tag
+from vinyl.models import Artist, Country, Genre, Vinyl
+
+
+# Every branch returns (facet, id, label, count, min_price, max_price)
+FACETS_SQL = '''
+WITH matched (id) AS ({matched})
+SELECT 'genres', g.id, g.title, COUNT(*), NULL::numeric, NULL::numeric
+FROM matched m
+JOIN {vinyl_genres} vg ON vg.vinyl_id = m.id
+JOIN {genre} g ON g.id = vg.genre_id
+GROUP BY g.id
+UNION ALL
+SELECT 'tags', t.id, t.title, COUNT(*), NULL, NULL
+FROM matched m
+JOIN {product_tags} pt ON pt.product_id = m.id
+JOIN {tag} t ON t.id = pt.tag_id
+GROUP BY t.id
+UNION ALL
+SELECT 'countries', c.id, c.name, COUNT(*), NULL, NULL
+FROM matched m
+JOIN {vinyl} v ON v.product_ptr_id = m.id
+JOIN {country} c ON c.id = v.country_id
+GROUP BY c.id
+UNION ALL
+SELECT 'artists', a.id, a.name, COUNT(*), NULL, NULL
+FROM matched m
+JOIN {vinyl} v ON v.product_ptr_id = m.id
+JOIN {artist} a ON a.id = v.artist_id
+GROUP BY a.id
+UNION ALL
+SELECT 'total', NULL, NULL, COUNT(*),
+       MIN(p.effective_price), MAX(p.effective_price)
+FROM matched m
+JOIN {product} p ON p.id = m.id
+UNION ALL
+SELECT 'discount', NULL, NULL, COUNT(*), NULL, NULL
+FROM matched m
+JOIN {discount} d ON d.product_id = m.id
+WHERE d.amount > 0
+UNION ALL
+SELECT 'in_stock', NULL, NULL, COUNT(*), NULL, NULL
+FROM matched m
+JOIN {product} p ON p.id = m.id
+WHERE p.in_stock
+ORDER BY 1, 4 DESC, 2
+'''
+
+
+def count_facets(queryset):
+    """
+    Counts how many vinyls of the queryset fall into every genre, tag,
+    country and artist, how many are discounted and in stock, and their
+    range of prices with discount. Everything is computed by one statement
+    over the matched ids, however many facet values there are.
+    """
+    matched, params = queryset.order_by().values('pk').query.sql_with_params()
+    sql = FACETS_SQL.format(
+        matched=matched,
+        vinyl=Vinyl._meta.db_table,
+        vinyl_genres=Vinyl.genres.through._meta.db_table,
+        genre=Genre._meta.db_table,
+        product_tags=Product.tags.through._meta.db_table,
+        tag=Tag._meta.db_table,
+        country=Country._meta.db_table,
+        artist=Artist._meta.db_table,
+        product=Product._meta.db_table,
+        discount=Discount._meta.db_table,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    facets = {'genres': [], 'tags': [], 'countries': [], 'artists': []}
+    label_names = {'genres': 'title', 'tags': 'title',
+                   'countries': 'name', 'artists': 'name'}
+    for facet, pk, label, count, min_price, max_price in rows:
+        if facet in facets:
+            facets[facet].append(
+                {'id': pk, label_names[facet]: label, 'count': count}
+            )
+        elif facet == 'total':
+            facets['total'] = count
+            facets['price'] = {
+                'min': _price(min_price),
+                'max': _price(max_price),
+            }
+        else:
+            facets[facet] = count
+    return facets
+
+
+def _price(value):
+    return None if value is None else str(value)
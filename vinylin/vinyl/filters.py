@@ -1,5 +1,14 @@
+from decimal import Decimal, InvalidOperation
+
+import coreapi
+import coreschema
 from django.contrib import admin
+from django.db.models import Exists, OuterRef
 from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from store.models import Product
 
 
 class StockFilter(admin.SimpleListFilter):
@@ -11,6 +20,130 @@ class StockFilter(admin.SimpleListFilter):
 
     def queryset(self, request, queryset):
         if self.value() == 'in_stock':
-            return queryset.filter(storage__quantity__gt=0)
+            return queryset.filter(in_stock=True)
         if self.value() == 'out_of_stock':
-            return queryset.filter(storage__quantity__lt=1)
+            return queryset.filter(in_stock=False)
+
+
+class CatalogFilterBackend(BaseFilterBackend):
+    """
+    Filters vinyls by query parameters. Id lists are comma separated
+    and match any of the given values, different parameters are combined.
+    """
+    id_params = {
+        'genre': 'Genre ids',
+        'tag': 'Tag ids',
+        'country': 'Country ids',
+        'artist': 'Artist ids',
+    }
+    decimal_params = {
+        'min_price': 'Minimal price with discount',
+        'max_price': 'Maximal price with discount',
+    }
+    bool_params = {
+        'discount': 'Only discounted (true) or not discounted (false)',
+        'in_stock': 'Only in stock (true) or out of stock (false)',
+    }
+    true_values = ('true', '1')
+    false_values = ('false', '0')
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        genres = self.get_ids(params, 'genre')
+        if genres:
+            queryset = queryset.filter(Exists(
+                queryset.model.genres.through.objects.filter(
+                    vinyl_id=OuterRef('pk'), genre_id__in=genres
+                )
+            ))
+
+        tags = self.get_ids(params, 'tag')
+        if tags:
+            queryset = queryset.filter(Exists(
+                Product.tags.through.objects.filter(
+                    product_id=OuterRef('pk'), tag_id__in=tags
+                )
+            ))
+
+        countries = self.get_ids(params, 'country')
+        if countries:
+            queryset = queryset.filter(country_id__in=countries)
+
+        artists = self.get_ids(params, 'artist')
+        if artists:
+            queryset = queryset.filter(artist_id__in=artists)
+
+        min_price = self.get_decimal(params, 'min_price')
+        if min_price is not None:
+            queryset = queryset.filter(effective_price__gte=min_price)
+
+        max_price = self.get_decimal(params, 'max_price')
+        if max_price is not None:
+            queryset = queryset.filter(effective_price__lte=max_price)
+
+        discount = self.get_bool(params, 'discount')
+        if discount is True:
+            queryset = queryset.filter(discount__amount__gt=0)
+        elif discount is False:
+            queryset = queryset.exclude(discount__amount__gt=0)
+
+        in_stock = self.get_bool(params, 'in_stock')
+        if in_stock is not None:
+            queryset = queryset.filter(in_stock=in_stock)
+
+        return queryset
+
+    @staticmethod
+    def get_ids(params, name):
+        value = params.get(name)
+        if not value:
+            return None
+        try:
+            return [int(pk) for pk in value.split(',')]
+        except ValueError:
+            raise ValidationError(
+                {name: ['Expected comma separated integers.']}
+            )
+
+    @staticmethod
+    def get_decimal(params, name):
+        value = params.get(name)
+        if not value:
+            return None
+        try:
+            number = Decimal(value)
+        except InvalidOperation:
+            number = None
+        if number is None or not number.is_finite():
+            raise ValidationError({name: ['A valid number is required.']})
+        return number
+
+    def get_bool(self, params, name):
+        value = params.get(name)
+        if not value:
+            return None
+        if value.lower() in self.true_values:
+            return True
+        if value.lower() in self.false_values:
+            return False
+        raise ValidationError({name: ['Expected true or false.']})
+
+    def get_schema_fields(self, view):
+        params = [
+            *((name, coreschema.String, description)
+              for name, description in self.id_params.items()),
+            *((name, coreschema.Number, description)
+              for name, description in self.decimal_params.items()),
+            *((name, coreschema.Boolean, description)
+              for name, description in self.bool_params.items()),
+        ]
+        return [
+            coreapi.Field(
+                name=name,
+                required=False,
+                location='query',
+                schema=schema(description=description),
+            )
+            for name, schema, description in params
+        ]
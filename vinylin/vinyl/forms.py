@@ -8,7 +8,6 @@ from django.contrib.admin.widgets import (
 from ckeditor_uploader.widgets import CKEditorUploadingWidget
 
 from .models import Vinyl, Artist, Genre, Country
-from store.utils import generate_part_number
 
 
 class VinylAdminForm(forms.ModelForm):
@@ -32,6 +31,3 @@ class VinylAdminForm(forms.ModelForm):
     class Meta:
         model = Vinyl
         fields = '__all__'
-        widgets = {
-            'part_number': forms.TextInput({'value': generate_part_number()})
-        }
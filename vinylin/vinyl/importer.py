@@ -0,0 +1,378 @@
+import csv
+import json
+import os
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from recommendations.similarity import mark_similarity_stale
+from store.availability import mirror_availability_on_commit
+from store.models import Discount, Product, Storage, Tag
+from store.pricing import CENT
+from store.utils import allocate_part_numbers
+from vinyl.autocomplete import invalidate_autocomplete_on_commit
+from vinyl.cache import invalidate_catalog_cache_on_commit
+from vinyl.models import Artist, Country, Genre, Vinyl
+from vinyl.search import update_search_vectors
+
+
+LIST_SEPARATOR = '|'
+MAX_PRICE = 10 ** (Product._meta.get_field('price').max_digits
+                   - Product._meta.get_field('price').decimal_places)
+
+UPSERT_PRODUCTS_SQL = '''
+INSERT INTO {product} (title, price, part_number, overview,
+                       created_at, updated_at,
+                       sales_count, view_count, trending_score, in_stock)
+VALUES {values}
+ON CONFLICT (part_number) DO UPDATE SET
+    title = EXCLUDED.title,
+    price = EXCLUDED.price,
+    overview = EXCLUDED.overview,
+    updated_at = EXCLUDED.updated_at
+RETURNING part_number, id
+'''.format(product=Product._meta.db_table, values='{values}')
+
+UPSERT_VINYLS_SQL = '''
+INSERT INTO {vinyl} (product_ptr_id, vinyl_title, artist_id, country_id,
+                     format, credits)
+VALUES {values}
+ON CONFLICT (product_ptr_id) DO UPDATE SET
+    vinyl_title = EXCLUDED.vinyl_title,
+    artist_id = EXCLUDED.artist_id,
+    country_id = EXCLUDED.country_id,
+    format = EXCLUDED.format,
+    credits = EXCLUDED.credits
+'''.format(vinyl=Vinyl._meta.db_table, values='{values}')
+
+UPSERT_STORAGE_SQL = '''
+INSERT INTO {storage} (product_id, quantity, updated_at)
+VALUES {values}
+ON CONFLICT (product_id) DO UPDATE SET
+    quantity = EXCLUDED.quantity,
+    updated_at = EXCLUDED.updated_at
+'''.format(storage=Storage._meta.db_table, values='{values}')
+
+UPSERT_DISCOUNTS_SQL = '''
+INSERT INTO {discount} (product_id, amount, created_at, updated_at)
+VALUES {values}
+ON CONFLICT (product_id) DO UPDATE SET
+    amount = EXCLUDED.amount,
+    updated_at = EXCLUDED.updated_at
+'''.format(discount=Discount._meta.db_table, values='{values}')
+
+DELETE_RELATIONS_SQL = 'DELETE FROM {table} WHERE {column} = ANY(%s)'
+
+INSERT_RELATIONS_SQL = '''
+INSERT INTO {table} ({column}, {related_column}) VALUES {values}
+ON CONFLICT DO NOTHING
+'''
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+class CatalogRecord:
+    """One vinyl of a feed, parsed from a CSV row or a JSON object"""
+
+    def __init__(self, data, number):
+        self.number = number
+        self.part_number = self._get_text(data, 'part_number')
+        self.title = self._get_text(data, 'title', required=True)
+        self.vinyl_title = self._get_text(data, 'vinyl_title') or self.title
+        self.price = self._get_decimal(data, 'price', required=True)
+        self.overview = self._get_text(data, 'overview')
+        self.artist = self._get_text(data, 'artist')
+        self.country = self._get_text(data, 'country')
+        self.format = self._get_text(data, 'format')
+        self.credits = self._get_text(data, 'credits')
+        self.genres = self._get_list(data, 'genres')
+        self.tags = self._get_list(data, 'tags')
+        self.quantity = self._get_int(data, 'quantity')
+        self.discount = self._get_int(data, 'discount')
+
+        if self.part_number and len(self.part_number) > 11:
+            raise InvalidRecord('part_number is longer than 11 characters')
+        if self.quantity is not None and self.quantity < 0:
+            raise InvalidRecord('quantity is negative')
+        if self.discount is not None and not 0 <= self.discount <= 100:
+            raise InvalidRecord('discount is not a percentage')
+
+    @staticmethod
+    def _get_text(data, key, required=False):
+        value = data.get(key)
+        value = '' if value is None else str(value).strip()
+        if required and not value:
+            raise InvalidRecord(f'{key} is required')
+        return value or None
+
+    def _get_decimal(self, data, key, required=False):
+        value = self._get_text(data, key, required)
+        try:
+            value = Decimal(value)
+        except InvalidOperation:
+            raise InvalidRecord(f'{key} is not a number')
+        if not value.is_finite() or not 0 <= value < MAX_PRICE:
+            raise InvalidRecord(f'{key} is not a valid price')
+        return value.quantize(CENT)
+
+    def _get_int(self, data, key):
+        value = self._get_text(data, key)
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise InvalidRecord(f'{key} is not an integer')
+
+    @staticmethod
+    def _get_list(data, key):
+        value = data.get(key) or []
+        if isinstance(value, str):
+            value = value.split(LIST_SEPARATOR)
+        return list(dict.fromkeys(
+            str(item).strip() for item in value if str(item).strip()
+        ))
+
+
+class CatalogImporter:
+    """
+    Imports vinyls from a CSV or JSON Lines feed in chunks. Every chunk
+    is written by a few set-based upserts keyed by part number in its own
+    transaction, after which its position is saved to the checkpoint
+    file, so a failed import resumes from the first unsaved chunk.
+    Artists, countries, genres and tags are resolved by name through
+    maps loaded once and extended with the created rows.
+    """
+
+    def __init__(self, path, chunk_size=1000, checkpoint_path=None,
+                 log=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path or f'{path}.checkpoint'
+        self.log = log or (lambda message: None)
+
+        self.imported = 0
+        self.skipped = 0
+        self._maps = {}
+
+    def run(self):
+        position = self.read_checkpoint()
+        if position:
+            self.log(f'Resuming after record {position}')
+
+        records = self.read_records(skip=position)
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            with transaction.atomic():
+                self.import_chunk(chunk)
+            position += len(chunk)
+            self.write_checkpoint(position)
+
+        self.remove_checkpoint()
+        return self.imported, self.skipped
+
+    def read_records(self, skip=0):
+        """Yields parsed records or None for records that are skipped"""
+        rows = islice(self.read_rows(), skip, None)
+        for number, data in enumerate(rows, start=skip + 1):
+            try:
+                yield CatalogRecord(data, number)
+            except InvalidRecord as error:
+                self.log(f'Record {number} is skipped: {error}')
+                yield None
+
+    def read_rows(self):
+        with open(self.path, encoding='utf-8', newline='') as file:
+            if self.path.lower().endswith('.csv'):
+                yield from csv.DictReader(file)
+                return
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    data = None
+                yield data if isinstance(data, dict) else {}
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as file:
+                checkpoint = json.load(file)
+        except FileNotFoundError:
+            return 0
+        if checkpoint.get('source') != self.source_id():
+            return 0
+        return checkpoint['position']
+
+    def write_checkpoint(self, position):
+        temporary_path = f'{self.checkpoint_path}.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump({'source': self.source_id(), 'position': position},
+                      file)
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def remove_checkpoint(self):
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+    def source_id(self):
+        """A checkpoint is only valid for the file it was written for"""
+        stat = os.stat(self.path)
+        return f'{os.path.abspath(self.path)}:{stat.st_size}:{stat.st_mtime}'
+
+    def import_chunk(self, chunk):
+        records = self.select_records(chunk)
+        if not records:
+            return
+
+        now = timezone.now()
+        artists = self.resolve(Artist, 'name', {r.artist for r in records})
+        countries = self.resolve(Country, 'name',
+                                 {r.country for r in records})
+        genres = self.resolve(Genre, 'title',
+                              {g for r in records for g in r.genres})
+        tags = self.resolve(Tag, 'title', {t for r in records for t in r.tags})
+        records = self.skip_taken_titles(records, artists)
+
+        with connection.cursor() as cursor:
+            product_ids = dict(self.execute_values(
+                cursor,
+                UPSERT_PRODUCTS_SQL,
+                [(r.title, r.price, r.part_number, r.overview, now, now,
+                  0, 0, 0, False)
+                 for r in records],
+                fetch=True,
+            ))
+            ids = [product_ids[r.part_number] for r in records]
+            self.execute_values(cursor, UPSERT_VINYLS_SQL, [
+                (product_ids[r.part_number], r.vinyl_title,
+                 artists.get(r.artist), countries.get(r.country),
+                 r.format, r.credits)
+                for r in records
+            ])
+            self.replace_relations(
+                cursor, Vinyl.genres.through, 'vinyl_id', 'genre_id', ids,
+                [(product_ids[r.part_number], genres[genre])
+                 for r in records for genre in r.genres]
+            )
+            self.replace_relations(
+                cursor, Product.tags.through, 'product_id', 'tag_id', ids,
+                [(product_ids[r.part_number], tags[tag])
+                 for r in records for tag in r.tags]
+            )
+            self.execute_values(cursor, UPSERT_STORAGE_SQL, [
+                (product_ids[r.part_number], r.quantity, now)
+                for r in records if r.quantity is not None
+            ])
+            self.execute_values(cursor, UPSERT_DISCOUNTS_SQL, [
+                (product_ids[r.part_number], r.discount, now, now)
+                for r in records if r.discount is not None
+            ])
+
+        update_search_vectors(Vinyl.objects.filter(pk__in=ids))
+        mark_similarity_stale(ids)
+        mirror_availability_on_commit(ids)
+        invalidate_catalog_cache_on_commit()
+        self.imported += len(records)
+
+    def select_records(self, chunk):
+        """
+        Drops invalid records, the last record of a part number wins.
+        Records without a part number are new vinyls and get one.
+        """
+        records = {}
+        new_records = []
+        for record in chunk:
+            if record is None:
+                self.skipped += 1
+            elif record.part_number is None:
+                new_records.append(record)
+            else:
+                if record.part_number in records:
+                    self.skipped += 1
+                records[record.part_number] = record
+
+        part_numbers = allocate_part_numbers(len(new_records))
+        for record, part_number in zip(new_records, part_numbers):
+            record.part_number = part_number
+        return [*records.values(), *new_records]
+
+    def skip_taken_titles(self, records, artists):
+        """
+        A vinyl title is unique per artist, records that would take the
+        title of another part number are skipped
+        """
+        owners = {
+            (vinyl_title, artist_id): part_number
+            for vinyl_title, artist_id, part_number in (
+                Vinyl.objects.filter(
+                    vinyl_title__in={r.vinyl_title for r in records},
+                    artist_id__in={artists.get(r.artist) for r in records},
+                ).values_list('vinyl_title', 'artist_id', 'part_number')
+            )
+        }
+        selected = []
+        for record in records:
+            artist_id = artists.get(record.artist)
+            key = (record.vinyl_title, artist_id)
+            owner = owners.setdefault(key, record.part_number)
+            if artist_id is not None and owner != record.part_number:
+                self.log(f'Record {record.number} is skipped: '
+                         f'{record.vinyl_title} of this artist is {owner}')
+                self.skipped += 1
+                continue
+            selected.append(record)
+        return selected
+
+    def resolve(self, model, field, names):
+        """Ids by name of the given names, creating missing rows"""
+        names.discard(None)
+        if model not in self._maps:
+            ids = {}
+            for pk, name in model.objects.order_by('pk').values_list('pk',
+                                                                     field):
+                ids.setdefault(name, pk)
+            self._maps[model] = ids
+
+        ids = self._maps[model]
+        missing = [name for name in names if name not in ids]
+        if missing:
+            created = model.objects.bulk_create(
+                model(**{field: name}) for name in missing
+            )
+            ids.update((getattr(obj, field), obj.pk) for obj in created)
+            invalidate_autocomplete_on_commit(model)
+        return ids
+
+    def replace_relations(self, cursor, through, column, related_column,
+                          ids, rows):
+        table = through._meta.db_table
+        cursor.execute(
+            DELETE_RELATIONS_SQL.format(table=table, column=column), [ids]
+        )
+        self.execute_values(cursor, INSERT_RELATIONS_SQL.format(
+            table=table,
+            column=column,
+            related_column=related_column,
+            values='{values}',
+        ), rows)
+
+    @staticmethod
+    def execute_values(cursor, sql, rows, fetch=False):
+        if not rows:
+            return []
+        placeholder = f'({", ".join(["%s"] * len(rows[0]))})'
+        cursor.execute(
+            sql.format(values=', '.join([placeholder] * len(rows))),
+            [value for row in rows for value in row],
+        )
+        return cursor.fetchall() if fetch else []
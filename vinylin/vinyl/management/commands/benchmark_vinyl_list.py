@@ -0,0 +1,99 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from store.models import Discount, Image, Storage, Tag
+from vinyl.models import Vinyl
+from vinyl.serializers import VinylSerializer, VinylValuesSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the catalog list rendered by VinylSerializer from model '
+        'instances and by VinylValuesSerializer from values. Missing rows '
+        'are created in a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        if rows < 1 or repeat < 1:
+            raise CommandError('--rows and --repeat must be positive')
+
+        with transaction.atomic():
+            self.create_vinyls(rows - Vinyl.objects.count())
+            renderer = JSONRenderer()
+            model_time, model_json = self.measure(
+                repeat,
+                lambda: renderer.render(VinylSerializer(
+                    Vinyl.objects.with_index_data().order_by('pk')[:rows],
+                    many=True,
+                ).data)
+            )
+            values_time, values_json = self.measure(
+                repeat,
+                lambda: renderer.render(VinylValuesSerializer(
+                    Vinyl.objects.with_list_values().order_by('pk')[:rows],
+                    many=True,
+                ).data)
+            )
+            transaction.set_rollback(True)
+
+        if model_json != values_json:
+            raise CommandError('Serializers rendered different JSON')
+
+        self.stdout.write(f'Rows: {rows}, best of {repeat}')
+        self.stdout.write(f'VinylSerializer:       {model_time:.3f} s')
+        self.stdout.write(f'VinylValuesSerializer: {values_time:.3f} s')
+        self.stdout.write(self.style.SUCCESS(
+            f'Speedup: {model_time / values_time:.1f}x'
+        ))
+
+    @staticmethod
+    def measure(repeat, render):
+        best, content = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            content = render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, content
+
+    def create_vinyls(self, count):
+        if count <= 0:
+            return
+        self.stdout.write(f'Creating {count} vinyls...')
+        tags = [Tag.objects.create(title=f'Benchmark tag {number}')
+                for number in range(3)]
+        vinyls = [
+            Vinyl.objects.create(
+                title=f'Benchmark {number}',
+                price=f'{number % 100 + 1}.99',
+                vinyl_title=f'Benchmark {number}',
+            )
+            for number in range(count)
+        ]
+        Storage.objects.bulk_create(
+            Storage(product=vinyl, quantity=number % 5)
+            for number, vinyl in enumerate(vinyls)
+        )
+        Discount.objects.bulk_create(
+            Discount(product=vinyl, amount=number % 4 * 10)
+            for number, vinyl in enumerate(vinyls)
+            if number % 3
+        )
+        Image.objects.bulk_create(
+            Image(product=vinyl, image=f'vinyl/images/benchmark-{side}.jpg')
+            for vinyl in vinyls
+            for side in ('front', 'back')
+        )
+        Vinyl.tags.through.objects.bulk_create(
+            Vinyl.tags.through(product_id=vinyl.pk, tag_id=tag.pk)
+            for number, vinyl in enumerate(vinyls)
+            for tag in tags[:number % 4]
+        )
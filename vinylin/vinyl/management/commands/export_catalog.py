@@ -0,0 +1,38 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from vinyl.exporter import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, iter_export
+from vinyl.models import Vinyl
+
+
+class Command(BaseCommand):
+    help = (
+        'Writes every vinyl with stock and effective price as JSON Lines '
+        'or CSV, in the columns import_catalog reads'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='export_format',
+                            choices=EXPORT_FORMATS, default='jsonl')
+        parser.add_argument('--output', help='File path, stdout by default')
+        parser.add_argument('--chunk-size', type=int,
+                            default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        lines = iter_export(Vinyl.objects.all(), options['export_format'],
+                            chunk_size=options['chunk_size'])
+        if options['output'] is None:
+            self.write_lines(lines, sys.stdout)
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as file:
+            self.write_lines(lines, file)
+
+    @staticmethod
+    def write_lines(lines, file):
+        for line in lines:
+            file.write(line)
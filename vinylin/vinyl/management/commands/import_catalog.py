@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from vinyl.importer import CatalogImporter
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports vinyls from a CSV or JSON Lines file, creating or updating '
+        'them by part number. Records without a part number are created '
+        'with a new one. Genres and tags are lists in JSON and '
+        '"|"-separated in CSV. An interrupted import resumes from its '
+        'checkpoint file when it is run again with the same file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--checkpoint',
+                            help='Checkpoint file, <path>.checkpoint '
+                                 'by default')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+        try:
+            importer = CatalogImporter(
+                options['path'],
+                chunk_size=options['chunk_size'],
+                checkpoint_path=options['checkpoint'],
+                log=self.stderr.write,
+            )
+            imported, skipped = importer.run()
+        except FileNotFoundError as error:
+            raise CommandError(error)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported: {imported}, skipped: {skipped}'
+        ))
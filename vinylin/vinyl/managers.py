@@ -3,17 +3,43 @@ from django.db import models
 
 class VinylManager(models.Manager):
     def with_index_data(self):
+        """
+        Loads everything VinylSerializer needs in 4 queries for any
+        number of rows: vinyls joined with storage and discount, images,
+        their renditions and tags. Selecting the discount through its
+        reverse one-to-one also caches `discount.product`, so
+        `price_with_discount` does not query the product again.
+        """
         return (
-            self.prefetch_related('images')
+            self.prefetch_related('images__renditions')
                 .prefetch_related('tags')
+                .select_related('storage')
                 .select_related('discount')
         )
 
+    def with_list_values(self):
+        """
+        Rows of VinylValuesSerializer as dicts in 1 query, vinyls joined
+        with storage and discount. Ordering fields of the catalog are
+        selected too, keyset pagination reads its cursor from them.
+        """
+        return self.values(
+            'pk', 'id', 'title', 'price', 'created_at', 'effective_price',
+            'sales_count', 'trending_score', 'storage__quantity',
+            'discount__amount',
+        )
+
     def with_all_data(self):
+        """
+        Loads everything RetrieveVinylSerializer needs in 5 queries:
+        vinyls joined with storage, discount, artist and country,
+        images, their renditions, tags and genres.
+        """
         return (
-            self.prefetch_related('images')
+            self.prefetch_related('images__renditions')
                 .prefetch_related('tags')
                 .prefetch_related('genres')
+                .select_related('storage')
                 .select_related('country')
                 .select_related('discount')
                 .select_related('artist')
@@ -22,4 +48,4 @@ class VinylManager(models.Manager):
 
 class VinylStockManager(models.Manager):
     def get_queryset(self):
-        return super().get_queryset().filter(storage__quantity__gt=0)
+        return super().get_queryset().filter(in_stock=True)
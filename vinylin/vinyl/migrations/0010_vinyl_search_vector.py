@@ -0,0 +1,72 @@
+# Generated by Django 3.2.13 on 2026-10-18 12:03
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F, OuterRef, Subquery
+
+
+def fill_search_vectors(apps, schema_editor):
+    # The vector of vinyl.search at the time of this migration
+    Product = apps.get_model('store', 'Product')
+    Artist = apps.get_model('vinyl', 'Artist')
+    Vinyl = apps.get_model('vinyl', 'Vinyl')
+
+    product = Product.objects.filter(pk=OuterRef('pk'))
+    artist = Artist.objects.filter(pk=OuterRef('artist_id'))
+    genres = (
+        Vinyl.genres.through.objects.filter(vinyl_id=OuterRef('pk'))
+                                    .order_by()
+                                    .values('vinyl_id')
+                                    .annotate(titles=StringAgg('genre__title',
+                                                               delimiter=' '))
+    )
+    tags = (
+        Product.tags.through.objects.filter(product_id=OuterRef('pk'))
+                                    .order_by()
+                                    .values('product_id')
+                                    .annotate(titles=StringAgg('tag__title',
+                                                               delimiter=' '))
+    )
+    Vinyl.objects.update(search_vector=(
+        SearchVector(
+            Subquery(product.values('title')),
+            F('vinyl_title'),
+            Subquery(artist.values('name')),
+            config='english',
+            weight='A',
+        )
+        + SearchVector(
+            Subquery(genres.values('titles')),
+            Subquery(tags.values('titles')),
+            config='english',
+            weight='B',
+        )
+        + SearchVector(
+            Subquery(product.values('overview')),
+            config='english',
+            weight='D',
+        )
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vinyl', '0009_auto_20220520_1001'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vinyl',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='vinyl',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='search_vector_idx'),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
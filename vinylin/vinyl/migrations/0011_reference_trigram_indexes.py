@@ -0,0 +1,37 @@
+# Generated by Django 3.2.13 on 2026-10-18 19:05
+
+from django.db import migrations
+
+
+# Autocomplete and admin search compile icontains to
+# UPPER(column::text) LIKE UPPER(%s), so the indexes are built on the
+# same expression
+TRIGRAM_INDEXES = '''
+CREATE INDEX vinyl_artist_name_trgm_idx
+ON vinyl_artist USING gin (UPPER(name::text) gin_trgm_ops);
+
+CREATE INDEX vinyl_genre_title_trgm_idx
+ON vinyl_genre USING gin (UPPER(title::text) gin_trgm_ops);
+
+CREATE INDEX vinyl_country_name_trgm_idx
+ON vinyl_country USING gin (UPPER(name::text) gin_trgm_ops);
+'''
+
+DROP_TRIGRAM_INDEXES = '''
+DROP INDEX vinyl_country_name_trgm_idx;
+DROP INDEX vinyl_genre_title_trgm_idx;
+DROP INDEX vinyl_artist_name_trgm_idx;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vinyl', '0010_vinyl_search_vector'),
+        # Creates the pg_trgm extension
+        ('store', '0016_product_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(TRIGRAM_INDEXES, DROP_TRIGRAM_INDEXES),
+    ]
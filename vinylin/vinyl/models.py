@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.urls import reverse
 
@@ -57,6 +59,8 @@ class Vinyl(Product):
     )
     format = models.CharField(max_length=50, blank=True, null=True)
     credits = models.CharField(max_length=250, blank=True, null=True)
+    # Maintained by vinyl.search on changes of the vinyl and its relations
+    search_vector = SearchVectorField(null=True, editable=False)
 
     objects = VinylManager()
 
@@ -68,6 +72,9 @@ class Vinyl(Product):
 
     class Meta:
         unique_together = ['vinyl_title', 'artist']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='search_vector_idx')
+        ]
 
 
 class VinylStock(Vinyl):
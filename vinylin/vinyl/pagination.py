@@ -0,0 +1,187 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+
+import coreapi
+import coreschema
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Seeks to the next page by the ordering values of the last row,
+    so the database never runs OFFSET or COUNT(*) and every page
+    costs the same. The last ordering field must be unique.
+    """
+    page_size = settings.CATALOG_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.CATALOG_MAX_PAGE_SIZE
+    ordering = ('-created_at', '-pk')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is not None:
+            self.cursor = self._clean_cursor(queryset.model, self.cursor)
+
+        if self.cursor is None:
+            reverse, values = False, None
+        else:
+            reverse, values = self.cursor
+
+        ordering = self.ordering
+        if reverse:
+            ordering = self._reverse_ordering(ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(ordering, values))
+
+        # One extra row tells whether there is a page beyond this one
+        results = list(queryset[:self.page_size + 1])
+        has_following = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        if reverse:
+            self.has_next = values is not None
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = values is not None
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, 'keyset_ordering', self.ordering))
+
+    def get_schema_fields(self, view):
+        fields = super().get_schema_fields(view)
+        orderings = getattr(view, 'keyset_orderings', None)
+        if orderings:
+            fields.append(coreapi.Field(
+                name=view.ordering_param,
+                required=False,
+                location='query',
+                schema=coreschema.Enum(
+                    list(orderings),
+                    description='Ordering of the results',
+                ),
+            ))
+        return fields
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # A stale cursor before the first row, go to the first page
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        values = self._get_values(self.page[-1])
+        return self.encode_cursor((False, values))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # A stale cursor past the last row, go to the last page
+            return self.encode_cursor((True, None))
+        values = self._get_values(self.page[0])
+        return self.encode_cursor((True, values))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            payload = json.loads(b64decode(encoded.encode('ascii')))
+            reverse = bool(payload['r'])
+            ordering = tuple(payload['o'])
+            # No values seek from the end, e.g. to the last page
+            values = payload['v']
+            if values is not None:
+                values = list(values)
+        except (BinasciiError, UnicodeError, ValueError,
+                KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # A cursor is only valid for the ordering it was made for
+        if ordering != self.ordering or (
+            values is not None and len(values) != len(ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, values
+
+    def encode_cursor(self, cursor):
+        reverse, values = cursor
+        payload = json.dumps(
+            {'r': int(reverse), 'o': self.ordering, 'v': values}
+        )
+        encoded = b64encode(payload.encode('ascii')).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def _get_values(self, instance):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            if isinstance(instance, dict):
+                value = instance[name]
+            else:
+                value = getattr(instance, name)
+            if not isinstance(value, int):
+                value = str(value)
+            values.append(value)
+        return values
+
+    def _clean_cursor(self, model, cursor):
+        reverse, values = cursor
+        if values is None:
+            return cursor
+        cleaned_values = []
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            model_field = (
+                model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            )
+            try:
+                cleaned_values.append(model_field.to_python(value))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        return reverse, cleaned_values
+
+    @staticmethod
+    def _reverse_ordering(ordering):
+        return tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in ordering
+        )
+
+    @staticmethod
+    def _seek(ordering, values):
+        """
+        Builds `(a, b) > (x, y)` as `a >= x AND (a > x OR (a = x AND b > y))`
+        so the leading column keeps using its index
+        """
+        seek = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            seek |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+
+        first = ordering[0]
+        first_lookup = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{first_lookup}': values[0]}) & seek
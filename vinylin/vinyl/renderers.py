@@ -0,0 +1,14 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class RawJSON(str):
+    """JSON text rendered elsewhere, e.g. by the database"""
+
+
+class CatalogJSONRenderer(JSONRenderer):
+    """Passes RawJSON through as is, renders everything else as usual"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, RawJSON):
+            return data.encode()
+        return super().render(data, accepted_media_type, renderer_context)
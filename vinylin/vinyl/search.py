@@ -0,0 +1,140 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from store.models import Product, Tag
+from vinyl.models import Artist, Genre, Vinyl
+
+
+SEARCH_CONFIG = 'english'
+
+
+def build_search_vector():
+    """
+    Weighted document of a vinyl. Every related value is read through
+    a subquery, so the vector is written by a single UPDATE of the vinyl
+    table without joins:
+        A - product title, vinyl title, artist name
+        B - genre and tag titles
+        D - overview
+    """
+    product = Product.objects.filter(pk=OuterRef('pk'))
+    artist = Artist.objects.filter(pk=OuterRef('artist_id'))
+    genres = (
+        Genre.objects.filter(vinyl=OuterRef('pk'))
+                     .order_by()
+                     .values('vinyl')
+                     .annotate(titles=StringAgg('title', delimiter=' '))
+    )
+    tags = (
+        Tag.objects.filter(tags=OuterRef('pk'))
+                   .order_by()
+                   .values('tags')
+                   .annotate(titles=StringAgg('title', delimiter=' '))
+    )
+    return (
+        SearchVector(
+            Subquery(product.values('title')),
+            F('vinyl_title'),
+            Subquery(artist.values('name')),
+            config=SEARCH_CONFIG,
+            weight='A',
+        )
+        + SearchVector(
+            Subquery(genres.values('titles')),
+            Subquery(tags.values('titles')),
+            config=SEARCH_CONFIG,
+            weight='B',
+        )
+        + SearchVector(
+            Subquery(product.values('overview')),
+            config=SEARCH_CONFIG,
+            weight='D',
+        )
+    )
+
+
+def update_search_vectors(queryset):
+    """Rewrites the search vector of every vinyl in the queryset"""
+    return queryset.update(search_vector=build_search_vector())
+
+
+def search_vinyls(queryset, text):
+    """Filters the queryset by the GIN-indexed vector, best matches first"""
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    return (
+        queryset.filter(search_vector=query)
+                .annotate(rank=SearchRank(F('search_vector'), query))
+                .order_by('-rank', '-pk')
+    )
+
+
+def _update_vinyls(**filters):
+    return update_search_vectors(Vinyl.objects.filter(**filters))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Vinyl)
+def update_product_vector(sender, instance, **kwargs):
+    _update_vinyls(pk=instance.pk)
+
+
+@receiver(post_save, sender=Artist)
+def update_artist_vinyls_vectors(sender, instance, **kwargs):
+    _update_vinyls(artist=instance)
+
+
+@receiver(post_save, sender=Genre)
+def update_genre_vinyls_vectors(sender, instance, **kwargs):
+    _update_vinyls(genres=instance)
+
+
+@receiver(post_save, sender=Tag)
+def update_tag_vinyls_vectors(sender, instance, **kwargs):
+    _update_vinyls(tags=instance)
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Tag)
+def remember_related_vinyls(sender, instance, **kwargs):
+    """Relations are gone after delete, so the vinyls are collected before"""
+    lookup = 'genres' if sender is Genre else 'tags'
+    instance._search_vinyl_pks = list(
+        Vinyl.objects.filter(**{lookup: instance})
+                     .values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Tag)
+def update_remembered_vinyls_vectors(sender, instance, **kwargs):
+    _update_vinyls(pk__in=getattr(instance, '_search_vinyl_pks', []))
+
+
+@receiver(m2m_changed, sender=Vinyl.genres.through)
+@receiver(m2m_changed, sender=Product.tags.through)
+def update_m2m_vectors(sender, instance, action, reverse, pk_set, **kwargs):
+    # Reverse clear does not report pk_set, so it is remembered beforehand
+    if action == 'pre_clear' and reverse:
+        remember_related_vinyls(type(instance), instance)
+        return
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        _update_vinyls(pk=instance.pk)
+    elif action == 'post_clear':
+        update_remembered_vinyls_vectors(type(instance), instance)
+    else:
+        _update_vinyls(pk__in=pk_set)
@@ -1,8 +1,19 @@
-from rest_framework.serializers import ModelSerializer, SlugRelatedField
+from collections import defaultdict
 
+from rest_framework.serializers import (
+    BaseSerializer,
+    ListSerializer,
+    ModelSerializer,
+    SlugRelatedField,
+)
+
+from store.models import Image, ImageRendition, Product
+from store.pricing import unit_price
+from store.renditions import build_srcsets
 from store.serializers import (
     DiscountSerializer,
     ImageSerializer,
+    ImageSrcsetSerializer,
     StorageSerializer
 )
 from vinyl.models import Vinyl
@@ -11,6 +22,7 @@ from vinyl.models import Vinyl
 class BaseVinylSerializer(ModelSerializer):
     storage = StorageSerializer()
     images = ImageSerializer(many=True)
+    srcsets = ImageSrcsetSerializer(source='images', many=True)
     tags = SlugRelatedField(slug_field='title', many=True, read_only=True)
     discount = DiscountSerializer()
 
@@ -24,8 +36,108 @@ class VinylSerializer(BaseVinylSerializer):
     class Meta:
         model = Vinyl
         fields = (
-            'id', 'title', 'price', 'storage', 'discount', 'images', 'tags'
+            'id', 'title', 'price', 'storage', 'discount', 'images',
+            'srcsets', 'tags'
+        )
+
+
+class VinylValuesListSerializer(ListSerializer):
+    """
+    Looks up images, their renditions and tags of the whole page
+    in 1 query each
+    """
+
+    def to_representation(self, data):
+        rows = list(data)
+        if not rows:
+            return []
+
+        product_ids = [row['id'] for row in rows]
+        image_url = Image._meta.get_field('image').storage.url
+        rendition_url = ImageRendition._meta.get_field('file').storage.url
+        images = _group(
+            (product_id, (image_id, name))
+            for product_id, image_id, name in (
+                Image.objects.filter(product_id__in=product_ids)
+                             .values_list('product_id', 'id', 'image')
+            )
+        )
+        renditions = _group(
+            (image_id, (rendition_format, width, rendition_url(name)))
+            for image_id, rendition_format, width, name in (
+                ImageRendition.objects.filter(
+                    image__product_id__in=product_ids
+                ).values_list('image_id', 'format', 'width', 'file')
+            )
         )
+        tags = _group(
+            Product.tags.through.objects.filter(product_id__in=product_ids)
+                                        .order_by('tag_id')
+                                        .values_list('product_id',
+                                                     'tag__title')
+        )
+        return [
+            self.child.to_row_representation(
+                row,
+                [image_url(name) for _, name in images[row['id']]],
+                [build_srcsets(renditions[image_id])
+                 for image_id, _ in images[row['id']]],
+                tags[row['id']],
+            )
+            for row in rows
+        ]
+
+
+class VinylValuesSerializer(BaseSerializer):
+    """
+    Renders exactly what VinylSerializer renders, but from the dicts of
+    `Vinyl.objects.with_list_values()`, without model instances and
+    field objects. Read only, for the catalog list.
+    """
+
+    class Meta:
+        list_serializer_class = VinylValuesListSerializer
+
+    def to_representation(self, instance):
+        return self.__class__([instance], many=True).data[0]
+
+    def to_row_representation(self, row, images, srcsets, tags):
+        quantity = row['storage__quantity']
+        amount = row['discount__amount']
+        if amount is None:
+            discount = None
+        else:
+            price_with_discount = None
+            if amount:
+                price_with_discount = _format_decimal(
+                    unit_price(row['price'], amount)
+                )
+            discount = {
+                'amount': amount,
+                'price_with_discount': price_with_discount,
+            }
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'price': _format_decimal(row['price']),
+            'storage': None if quantity is None else {'quantity': quantity},
+            'discount': discount,
+            'images': images,
+            'srcsets': srcsets,
+            'tags': tags,
+        }
+
+
+def _format_decimal(value):
+    """Prices come with 2 decimal places, as DecimalField renders them"""
+    return f'{value:f}'
+
+
+def _group(pairs):
+    groups = defaultdict(list)
+    for key, value in pairs:
+        groups[key].append(value)
+    return groups
 
 
 class RetrieveVinylSerializer(BaseVinylSerializer):
@@ -36,4 +148,8 @@ class RetrieveVinylSerializer(BaseVinylSerializer):
 
     class Meta:
         model = Vinyl
-        exclude = ('created_at', 'vinyl_title')
+        exclude = (
+            'created_at', 'updated_at', 'effective_price', 'sales_count',
+            'view_count', 'trending_score', 'in_stock', 'vinyl_title',
+            'search_vector',
+        )
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from vinyl import autocomplete
+from vinyl.autocomplete import PrefixIndex
+from vinyl.models import Artist, Genre
+
+
+class PrefixIndexTest(TestCase):
+    def setUp(self):
+        self.index = PrefixIndex([
+            (1, 'The Beatles'),
+            (2, 'Beach Boys'),
+            (3, 'Bee  Gees'),
+            (4, 'Blur'),
+        ])
+
+    def test_search(self):
+        # Names starting with the prefix come before word starts
+        self.assertEqual(self.index.search('be'),
+                         [(2, 'Beach Boys'), (3, 'Bee  Gees'),
+                          (1, 'The Beatles')])
+        self.assertEqual(self.index.search('BEE g'), [(3, 'Bee  Gees')])
+        self.assertEqual(self.index.search('the'), [(1, 'The Beatles')])
+        self.assertEqual(self.index.search('x'), [])
+
+    def test_limit(self):
+        self.assertEqual(self.index.search('b', limit=2),
+                         [(2, 'Beach Boys'), (3, 'Bee  Gees')])
+
+
+class AutocompleteViewTest(APITestCase):
+    def setUp(self):
+        autocomplete._indexes.clear()
+        self.beatles = Artist.objects.create(name='The Beatles')
+        self.blur = Artist.objects.create(name='Blur')
+
+    def tearDown(self):
+        autocomplete._indexes.clear()
+
+    def test_prefix_is_answered_by_the_index(self):
+        self.client.get('/api/vinyl/autocomplete/artists/', {'q': 'b'})
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/vinyl/autocomplete/artists/',
+                                       {'q': 'bl'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data,
+                         [{'id': self.blur.pk, 'name': 'Blur'}])
+
+    def test_contains_is_completed_by_the_database(self):
+        response = self.client.get('/api/vinyl/autocomplete/artists/',
+                                   {'q': 'eatl'})
+        self.assertEqual(response.data,
+                         [{'id': self.beatles.pk, 'name': 'The Beatles'}])
+
+    @mock.patch('vinyl.autocomplete.VERSION_CHECK_INTERVAL', 0)
+    def test_index_is_reloaded_on_change(self):
+        self.client.get('/api/vinyl/autocomplete/genres/', {'q': 'r'})
+        with self.captureOnCommitCallbacks(execute=True):
+            genre = Genre.objects.create(title='Rock')
+        response = self.client.get('/api/vinyl/autocomplete/genres/',
+                                   {'q': 'r'})
+        self.assertEqual(response.data, [{'id': genre.pk, 'name': 'Rock'}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            genre.delete()
+        response = self.client.get('/api/vinyl/autocomplete/genres/',
+                                   {'q': 'r'})
+        self.assertEqual(response.data, [])
+
+    def test_bad_request(self):
+        url = '/api/vinyl/autocomplete/tags/'
+        for params in ({}, {'q': ' '}, {'q': 'a', 'limit': 0},
+                       {'q': 'a', 'limit': 'ten'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code,
+                             status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get('/api/vinyl/autocomplete/users/',
+                                   {'q': 'a'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,66 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from store.models import Storage
+from users.models import User
+from vinyl.models import Genre, Vinyl
+
+
+class CatalogCacheTest(APITestCase):
+    def setUp(self):
+        self.vinyl = Vinyl.objects.create(
+            title='Title',
+            price='10.00',
+            part_number='123ABC',
+            vinyl_title='Vinyl Title',
+        )
+        self.storage = Storage.objects.create(product=self.vinyl, quantity=1)
+
+    def test_list_is_cached(self):
+        response = self.client.get('/api/vinyl/')
+        # Only the Last-Modified lookup of conditional requests is left
+        with self.assertNumQueries(1):
+            cached_response = self.client.get('/api/vinyl/')
+        self.assertEqual(cached_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_response.data, response.data)
+
+        with self.assertNumQueries(5):
+            self.client.get('/api/vinyl/', {'page_size': 1})
+
+    def test_retrieve_is_cached(self):
+        self.client.get(f'/api/vinyl/{self.vinyl.pk}/')
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/vinyl/{self.vinyl.pk}/')
+        self.assertEqual(response.json().get('id'), self.vinyl.pk)
+
+    def test_invalidation(self):
+        self.client.get(f'/api/vinyl/{self.vinyl.pk}/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.quantity = 5
+            self.storage.save()
+        response = self.client.get(f'/api/vinyl/{self.vinyl.pk}/')
+        self.assertEqual(response.json()['storage']['quantity'], 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vinyl.genres.add(Genre.objects.create(title='Jazz'))
+        response = self.client.get(f'/api/vinyl/{self.vinyl.pk}/')
+        self.assertEqual(response.json()['genres'], ['Jazz'])
+
+    def test_cache_stats(self):
+        self.client.get('/api/vinyl/')
+        self.client.get('/api/vinyl/')
+        self.client.get(f'/api/vinyl/{self.vinyl.pk}/')
+
+        response = self.client.get('/api/vinyl/cache-stats/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        admin = User.objects.create_superuser(
+            email='admin@mail.com', password='DifficultPassword1'
+        )
+        self.client.force_authenticate(admin)
+        response = self.client.get('/api/vinyl/cache-stats/')
+        self.assertEqual(response.data, {
+            'list': {'hits': 1, 'misses': 1},
+            'retrieve': {'hits': 0, 'misses': 1},
+        })
@@ -0,0 +1,73 @@
+import json
+from unittest import mock
+
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase
+
+from store.models import Discount, Image, ImageRendition, Storage, Tag
+from vinyl.documents import get_vinyl_document
+from vinyl.models import Artist, Country, Genre, Vinyl
+from vinyl.serializers import RetrieveVinylSerializer
+from vinyl.tests.test_serializers import create_rendition_rows
+
+
+class VinylDocumentTest(TestCase):
+    def setUp(self):
+        self.artist = Artist.objects.create(name='Artist "Ä"')
+        self.country = Country.objects.create(name='Country')
+        self.genres = [Genre.objects.create(title=title)
+                       for title in ('Rock', 'Jazz')]
+        self.tags = [Tag.objects.create(title=title)
+                     for title in ('New', 'Хит')]
+
+    def assertSameAsSerializer(self, vinyl):
+        expected = RetrieveVinylSerializer(
+            Vinyl.objects.with_all_data().get(pk=vinyl.pk)
+        ).data
+        with self.assertNumQueries(1):
+            document = get_vinyl_document(vinyl.pk)
+        self.assertEqual(json.loads(document), expected)
+
+    def test_bare_vinyl(self):
+        vinyl = Vinyl.objects.create(title='Bare', price='100.00',
+                                     vinyl_title='Bare')
+        self.assertSameAsSerializer(vinyl)
+
+    def test_vinyl_with_relations(self):
+        vinyl = Vinyl.objects.create(
+            title='Full ♫',
+            price='19.99',
+            part_number='PN1',
+            overview='Overview',
+            vinyl_title='Full',
+            artist=self.artist,
+            country=self.country,
+            format='LP',
+            credits='Credits',
+        )
+        vinyl.genres.add(self.genres[1], self.genres[0])
+        vinyl.tags.add(*self.tags)
+        Storage.objects.create(product=vinyl, quantity=0)
+        create_rendition_rows(
+            Image.objects.create(product=vinyl, image='vinyl/images/b.jpg')
+        )
+        Image.objects.create(product=vinyl, image='vinyl/images/a.jpg')
+
+        for amount in (33, 0, -5):
+            Discount.objects.update_or_create(product=vinyl,
+                                              defaults={'amount': amount})
+            self.assertSameAsSerializer(vinyl)
+
+    def test_missing_vinyl(self):
+        self.assertIsNone(get_vinyl_document(0))
+
+    def test_storages_with_different_urls(self):
+        vinyl = Vinyl.objects.create(title='Title', price='10.00',
+                                     vinyl_title='Title')
+        create_rendition_rows(
+            Image.objects.create(product=vinyl, image='vinyl/images/a.jpg')
+        )
+        field = ImageRendition._meta.get_field('file')
+        storage = FileSystemStorage(base_url='/renditions/')
+        with mock.patch.object(field, 'storage', storage):
+            self.assertSameAsSerializer(vinyl)
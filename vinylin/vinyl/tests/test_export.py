@@ -0,0 +1,97 @@
+import csv
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from store.models import Discount, Storage, Tag
+from users.models import User
+from vinyl.models import Artist, Genre, Vinyl
+
+
+class CatalogExportTest(APITestCase):
+    def setUp(self):
+        self.vinyl = Vinyl.objects.create(
+            title='Kind of Blue',
+            price='20.00',
+            part_number='PN1',
+            vinyl_title='Kind of Blue',
+            artist=Artist.objects.create(name='Miles Davis'),
+        )
+        self.vinyl.genres.add(Genre.objects.create(title='Jazz'),
+                              Genre.objects.create(title='Modal'))
+        self.vinyl.tags.add(Tag.objects.create(title='Новинка'))
+        Storage.objects.create(product=self.vinyl, quantity=3)
+        Discount.objects.create(product=self.vinyl, amount=10)
+        Vinyl.objects.create(title='Bare', price='5.00', part_number='PN2',
+                             vinyl_title='Bare')
+
+        self.admin = User.objects.create_superuser(
+            email='admin@mail.com', password='DifficultPassword1'
+        )
+
+    def export(self, **params):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/vinyl/export/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_jsonl(self):
+        records = [json.loads(line)
+                   for line in self.export().splitlines()]
+        self.assertEqual(records[0], {
+            'part_number': 'PN1',
+            'title': 'Kind of Blue',
+            'vinyl_title': 'Kind of Blue',
+            'price': '20.00',
+            'effective_price': '18.00',
+            'artist': 'Miles Davis',
+            'country': None,
+            'format': None,
+            'credits': None,
+            'genres': ['Jazz', 'Modal'],
+            'tags': ['Новинка'],
+            'quantity': 3,
+            'discount': 10,
+        })
+        self.assertEqual(records[1]['genres'], [])
+        self.assertIsNone(records[1]['quantity'])
+
+    def test_export_csv_with_filters(self):
+        rows = list(csv.DictReader(StringIO(
+            self.export(export_format='csv', in_stock='true')
+        )))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['genres'], 'Jazz|Modal')
+        self.assertEqual(rows[0]['effective_price'], '18.00')
+
+    def test_export_permissions_and_format(self):
+        response = self.client.get('/api/vinyl/export/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/vinyl/export/',
+                                   {'export_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_command_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'catalog.csv')
+            call_command('export_catalog', format='csv', output=path,
+                         chunk_size=1)
+            Vinyl.objects.all().delete()
+            call_command('import_catalog', path, stdout=StringIO(),
+                         stderr=StringIO())
+
+        vinyl = Vinyl.objects.get(part_number='PN1')
+        self.assertEqual(vinyl.effective_price, Decimal('18.00'))
+        self.assertEqual(vinyl.storage.quantity, 3)
+        self.assertEqual(list(vinyl.tags.values_list('title', flat=True)),
+                         ['Новинка'])
+        self.assertEqual(Vinyl.objects.count(), 2)
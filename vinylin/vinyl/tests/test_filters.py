@@ -0,0 +1,97 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from store.models import Discount, Storage, Tag
+from vinyl.models import Artist, Country, Genre, Vinyl
+
+
+class CatalogFilterTest(APITestCase):
+    def setUp(self):
+        self.artist = Artist.objects.create(name='Artist')
+        self.country = Country.objects.create(name='Country')
+        self.rock = Genre.objects.create(title='Rock')
+        self.jazz = Genre.objects.create(title='Jazz')
+        self.tag = Tag.objects.create(title='New')
+
+        self.cheap = self.create_vinyl('Cheap', '5.00', quantity=0)
+        self.cheap.genres.add(self.rock, self.jazz)
+        self.cheap.tags.add(self.tag)
+
+        self.expensive = self.create_vinyl('Expensive', '30.00', quantity=3)
+        self.expensive.genres.add(self.rock)
+        Discount.objects.create(product=self.expensive, amount=10)
+
+    def create_vinyl(self, title, price, quantity):
+        vinyl = Vinyl.objects.create(
+            title=title,
+            price=price,
+            part_number=title,
+            vinyl_title=title,
+            artist=self.artist,
+            country=self.country,
+        )
+        Storage.objects.create(product=vinyl, quantity=quantity)
+        return vinyl
+
+    def list_ids(self, params):
+        response = self.client.get('/api/vinyl/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {vinyl['id'] for vinyl in response.data.get('results')}
+
+    def test_filters(self):
+        both = {self.cheap.pk, self.expensive.pk}
+        self.assertEqual(self.list_ids({'genre': self.rock.pk}), both)
+        self.assertEqual(
+            self.list_ids({'genre': f'{self.rock.pk},{self.jazz.pk}'}), both
+        )
+        self.assertEqual(self.list_ids({'genre': self.jazz.pk}),
+                         {self.cheap.pk})
+        self.assertEqual(self.list_ids({'tag': self.tag.pk}),
+                         {self.cheap.pk})
+        self.assertEqual(self.list_ids({'min_price': '10'}),
+                         {self.expensive.pk})
+        self.assertEqual(self.list_ids({'max_price': '10'}),
+                         {self.cheap.pk})
+        # The expensive one costs 27.00 with its discount
+        self.assertEqual(self.list_ids({'max_price': '27'}), both)
+        self.assertEqual(self.list_ids({'discount': 'true'}),
+                         {self.expensive.pk})
+        self.assertEqual(self.list_ids({'in_stock': 'false'}),
+                         {self.cheap.pk})
+        self.assertEqual(
+            self.list_ids({'artist': self.artist.pk,
+                           'country': self.country.pk}),
+            both
+        )
+
+    def test_invalid_filter(self):
+        for params in ({'genre': 'rock'}, {'min_price': 'cheap'},
+                       {'in_stock': 'maybe'}):
+            response = self.client.get('/api/vinyl/', params)
+            self.assertEqual(response.status_code,
+                             status.HTTP_400_BAD_REQUEST)
+
+    def test_facets(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/vinyl/facets/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.get('total'), 2)
+        self.assertEqual(response.data.get('discount'), 1)
+        self.assertEqual(response.data.get('in_stock'), 1)
+        self.assertEqual(response.data.get('price'),
+                         {'min': '5.00', 'max': '27.00'})
+        self.assertEqual(response.data.get('genres'), [
+            {'id': self.rock.pk, 'title': 'Rock', 'count': 2},
+            {'id': self.jazz.pk, 'title': 'Jazz', 'count': 1},
+        ])
+        self.assertEqual(response.data.get('countries'), [
+            {'id': self.country.pk, 'name': 'Country', 'count': 2},
+        ])
+
+    def test_facets_follow_filters(self):
+        response = self.client.get('/api/vinyl/facets/', {'in_stock': 'true'})
+        self.assertEqual(response.data.get('total'), 1)
+        self.assertEqual(response.data.get('genres'), [
+            {'id': self.rock.pk, 'title': 'Rock', 'count': 1},
+        ])
+        self.assertEqual(response.data.get('tags'), [])
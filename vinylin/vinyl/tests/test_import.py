@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from store.models import Product
+from vinyl.importer import CatalogImporter
+from vinyl.models import Artist, Genre, Vinyl
+from vinyl.search import search_vinyls
+
+
+CSV_FEED = '''\
+part_number,title,price,artist,country,genres,tags,quantity,discount
+PN1,Kind of Blue,19.99,Miles Davis,USA,Jazz|Modal,New,5,10
+PN2,Blue Train,bad,John Coltrane,USA,Jazz,,1,
+PN3,Giant Steps,15.00,John Coltrane,USA,Jazz|Hard Bop,,0,
+'''
+
+
+class ImportCatalogTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        Genre.objects.create(title='Jazz')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_feed(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def import_catalog(self, path, **options):
+        stdout = StringIO()
+        call_command('import_catalog', path, stdout=stdout,
+                     stderr=StringIO(), **options)
+        return stdout.getvalue()
+
+    def test_import_csv(self):
+        output = self.import_catalog(self.write_feed('feed.csv', CSV_FEED))
+        self.assertIn('Imported: 2, skipped: 1', output)
+
+        vinyl = Vinyl.objects.select_related('artist', 'country',
+                                             'storage', 'discount') \
+                             .get(part_number='PN1')
+        self.assertEqual(vinyl.title, 'Kind of Blue')
+        self.assertEqual(vinyl.vinyl_title, 'Kind of Blue')
+        self.assertEqual(vinyl.artist.name, 'Miles Davis')
+        self.assertEqual(vinyl.country.name, 'USA')
+        self.assertEqual(vinyl.storage.quantity, 5)
+        self.assertEqual(vinyl.discount.amount, 10)
+        self.assertEqual(vinyl.effective_price, Decimal('17.99'))
+        self.assertEqual(list(vinyl.genres.values_list('title', flat=True)),
+                         ['Jazz', 'Modal'])
+        self.assertEqual(list(vinyl.tags.values_list('title', flat=True)),
+                         ['New'])
+        self.assertEqual(Genre.objects.filter(title='Jazz').count(), 1)
+        self.assertEqual(Artist.objects.filter(name='John Coltrane').count(),
+                         1)
+        self.assertEqual(
+            list(search_vinyls(Vinyl.objects.all(), 'steps')
+                 .values_list('part_number', flat=True)),
+            ['PN3']
+        )
+
+    def test_import_updates_by_part_number(self):
+        self.import_catalog(self.write_feed('feed.csv', CSV_FEED))
+        records = [
+            {'part_number': 'PN1', 'title': 'Kind of Blue (Remaster)',
+             'price': 25, 'genres': ['Modal'], 'quantity': 2},
+            {'part_number': 'PN4', 'title': 'Ascension', 'price': '9.50',
+             'artist': 'John Coltrane'},
+            {'part_number': 'PN5', 'title': 'Giant Steps', 'price': '1',
+             'artist': 'John Coltrane'},
+            'not an object',
+            {'title': 'Without part number', 'price': '3'},
+        ]
+        path = self.write_feed(
+            'feed.jsonl', '\n'.join(map(json.dumps, records)) + '\n'
+        )
+        output = self.import_catalog(path, chunk_size=2)
+        # PN5 would take the vinyl title of PN3 by the same artist
+        self.assertIn('Imported: 3, skipped: 2', output)
+
+        vinyl = Vinyl.objects.get(part_number='PN1')
+        self.assertEqual(vinyl.title, 'Kind of Blue (Remaster)')
+        self.assertEqual(vinyl.price, Decimal('25.00'))
+        self.assertEqual(vinyl.storage.quantity, 2)
+        self.assertEqual(vinyl.discount.amount, 10)
+        self.assertEqual(list(vinyl.genres.values_list('title', flat=True)),
+                         ['Modal'])
+        self.assertFalse(vinyl.tags.exists())
+        self.assertEqual(Product.objects.count(), 4)
+        self.assertFalse(Product.objects.filter(part_number='PN5').exists())
+        self.assertRegex(
+            Product.objects.get(title='Without part number').part_number,
+            r'^[A-Z]{2}0[0-9]{8}$'
+        )
+
+    def test_resume_from_checkpoint(self):
+        lines = [
+            json.dumps({'part_number': f'PN{number}', 'title': f'{number}',
+                        'price': '10'})
+            for number in range(5)
+        ]
+        path = self.write_feed('feed.jsonl', '\n'.join(lines))
+        checkpoint_path = f'{path}.checkpoint'
+
+        import_chunk = CatalogImporter.import_chunk
+        calls = []
+
+        def fail_third_chunk(importer, chunk):
+            calls.append(len(chunk))
+            if len(calls) == 3:
+                raise RuntimeError('Connection lost')
+            return import_chunk(importer, chunk)
+
+        with mock.patch.object(CatalogImporter, 'import_chunk',
+                               fail_third_chunk):
+            with self.assertRaises(RuntimeError):
+                self.import_catalog(path, chunk_size=2)
+        self.assertEqual(Vinyl.objects.count(), 4)
+        with open(checkpoint_path) as file:
+            self.assertEqual(json.load(file)['position'], 4)
+
+        output = self.import_catalog(path, chunk_size=2)
+        self.assertIn('Imported: 1, skipped: 0', output)
+        self.assertEqual(Vinyl.objects.count(), 5)
+        self.assertFalse(os.path.exists(checkpoint_path))
+
+        # A changed file is imported from the start
+        with open(checkpoint_path, 'w') as file:
+            json.dump({'source': 'other', 'position': 4}, file)
+        output = self.import_catalog(path, chunk_size=2)
+        self.assertIn('Imported: 5, skipped: 0', output)
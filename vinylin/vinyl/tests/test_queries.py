@@ -0,0 +1,161 @@
+from unittest import mock
+
+from django.contrib.admin import site
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from recommendations.models import RelatedProduct, SimilarProduct
+from store.models import Discount, Image, Storage, Tag
+from store.pagination import EstimatedCountPaginator
+from users.models import User
+from vinyl.admin import VinylAdmin
+from vinyl.models import Artist, Country, Genre, Vinyl
+
+
+class VinylQueryBudgetTest(APITestCase):
+    """
+    Every catalog endpoint must run in a fixed number of queries
+    no matter how many rows it returns. Budgets include the
+    Last-Modified lookup of conditional requests.
+    """
+    LIST_QUERIES = 5
+    RETRIEVE_QUERIES = 2
+    RELATED_QUERIES = 4
+    AVAILABILITY_QUERIES = 1
+
+    def setUp(self):
+        self.artist = Artist.objects.create(name='Artist')
+        self.country = Country.objects.create(name='Country')
+        self.genre = Genre.objects.create(title='Genre')
+        self.tag = Tag.objects.create(title='Tag')
+
+    def create_vinyls(self, count):
+        vinyls = []
+        for number in range(Vinyl.objects.count(), count):
+            vinyl = Vinyl.objects.create(
+                title=f'Title {number}',
+                price='10.00',
+                part_number=f'PN{number}',
+                vinyl_title=f'Vinyl Title {number}',
+                artist=self.artist,
+                country=self.country,
+            )
+            vinyl.genres.add(self.genre)
+            vinyl.tags.add(self.tag)
+            Storage.objects.create(product=vinyl, quantity=5)
+            Discount.objects.create(product=vinyl, amount=10)
+            Image.objects.create(product=vinyl, image='vinyl/images/a.jpg')
+            Image.objects.create(product=vinyl, image='vinyl/images/b.jpg')
+            vinyls.append(vinyl)
+        return vinyls
+
+    @mock.patch('store.tasks.create_image_renditions_task.delay')
+    def test_list(self, delay):
+        for count in (1, 10):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create_vinyls(count)
+            with self.assertNumQueries(self.LIST_QUERIES):
+                response = self.client.get('/api/vinyl/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data.get('results')), count)
+
+    def test_retrieve(self):
+        vinyl = self.create_vinyls(1)[0]
+        with self.assertNumQueries(self.RETRIEVE_QUERIES):
+            response = self.client.get(f'/api/vinyl/{vinyl.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json().get('genres'), ['Genre'])
+
+    def test_related(self):
+        vinyl, *others = self.create_vinyls(10)
+        RelatedProduct.objects.bulk_create(
+            RelatedProduct(product=vinyl, related=other, count=1, rank=rank)
+            for rank, other in enumerate(others, start=1)
+        )
+        with self.assertNumQueries(self.RELATED_QUERIES):
+            response = self.client.get(f'/api/vinyl/{vinyl.pk}/related/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), len(others))
+
+    def test_similar(self):
+        vinyl, *others = self.create_vinyls(10)
+        SimilarProduct.objects.bulk_create(
+            SimilarProduct(product=vinyl, related=other, score=1, rank=rank)
+            for rank, other in enumerate(others, start=1)
+        )
+        with self.assertNumQueries(self.RELATED_QUERIES):
+            response = self.client.get(f'/api/vinyl/{vinyl.pk}/similar/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data],
+                         [other.pk for other in others])
+
+    def test_availability(self):
+        vinyls = self.create_vinyls(10)
+        ids = ','.join(str(vinyl.pk) for vinyl in vinyls)
+        with self.assertNumQueries(self.AVAILABILITY_QUERIES):
+            response = self.client.get('/api/vinyl/availability/',
+                                       {'ids': ids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), len(vinyls))
+
+    def test_admin_changelist(self):
+        admin = User.objects.create_superuser(email='admin@mail.com',
+                                              password='DifficultPassword1')
+        self.client.force_login(admin)
+        queries = []
+        for count in (1, 10):
+            self.create_vinyls(count)
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get('/admin/vinyl/vinyl/', {
+                    'q': 'Title',
+                    'storage': 'in_stock',
+                })
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.context['cl'].result_count, count)
+            queries.append(len(context.captured_queries))
+        self.assertEqual(queries[0], queries[1])
+
+    def test_admin_price_with_discount(self):
+        vinyl = self.create_vinyls(1)[0]
+        model_admin = VinylAdmin(Vinyl, site)
+        queryset = model_admin.get_queryset(None).select_related(
+            *model_admin.list_select_related
+        )
+        with self.assertNumQueries(1):
+            price = model_admin.price_with_discount(queryset.get())
+        self.assertEqual(str(price), '9.00')
+
+        Discount.objects.filter(product=vinyl).update(amount=0)
+        self.assertIsNone(model_admin.price_with_discount(queryset.get()))
+        Discount.objects.filter(product=vinyl).delete()
+        self.assertIsNone(model_admin.price_with_discount(queryset.get()))
+
+
+class EstimatedCountPaginatorTest(APITestCase):
+    def setUp(self):
+        for number in range(3):
+            Vinyl.objects.create(title=f'Title {number}', price='10.00')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE vinyl_vinyl')
+
+    def get_count(self, queryset):
+        paginator = EstimatedCountPaginator(queryset, 100)
+        with CaptureQueriesContext(connection) as context:
+            count = paginator.count
+        counted = any('COUNT(*)' in query['sql']
+                      for query in context.captured_queries)
+        return count, counted
+
+    def test_small_results_are_counted(self):
+        self.assertEqual(self.get_count(Vinyl.objects.all()), (3, True))
+
+    @mock.patch('store.pagination.EXACT_COUNT_LIMIT', 0)
+    def test_big_results_are_estimated(self):
+        self.assertEqual(self.get_count(Vinyl.objects.all()), (3, False))
+        count, counted = self.get_count(
+            Vinyl.objects.filter(title__icontains='Title')
+        )
+        self.assertGreater(count, 0)
+        self.assertFalse(counted)
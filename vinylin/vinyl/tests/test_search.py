@@ -0,0 +1,58 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from store.models import Tag
+from vinyl.models import Artist, Genre, Vinyl
+
+
+class VinylSearchTest(APITestCase):
+    def setUp(self):
+        self.artist = Artist.objects.create(name='Miles Davis')
+        self.jazz = Genre.objects.create(title='Jazz')
+        self.vinyl = Vinyl.objects.create(
+            title='Kind of Blue',
+            price='10.00',
+            part_number='123ABC',
+            vinyl_title='Kind of Blue',
+            artist=self.artist,
+            overview='<p>Recorded in New York</p>',
+        )
+        self.other_vinyl = Vinyl.objects.create(
+            title='Abbey Road',
+            price='10.00',
+            part_number='456DEF',
+            vinyl_title='Abbey Road',
+            overview='Mentions blue in the overview only',
+        )
+
+    def search(self, text):
+        response = self.client.get('/api/vinyl/search/', {'q': text})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [vinyl['id'] for vinyl in response.data]
+
+    def test_search_ranks_title_over_overview(self):
+        self.assertEqual(self.search('blue'),
+                         [self.vinyl.pk, self.other_vinyl.pk])
+
+    def test_search_requires_query(self):
+        response = self.client.get('/api/vinyl/search/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_vector_follows_relations(self):
+        self.assertEqual(self.search('davis'), [self.vinyl.pk])
+
+        self.artist.name = 'John Coltrane'
+        self.artist.save()
+        self.assertEqual(self.search('davis'), [])
+        self.assertEqual(self.search('coltrane'), [self.vinyl.pk])
+
+        self.vinyl.genres.add(self.jazz)
+        self.assertEqual(self.search('jazz'), [self.vinyl.pk])
+        self.jazz.delete()
+        self.assertEqual(self.search('jazz'), [])
+
+        tag = Tag.objects.create(title='Remastered')
+        tag.tags.add(self.other_vinyl)
+        self.assertEqual(self.search('remastered'), [self.other_vinyl.pk])
+        tag.tags.clear()
+        self.assertEqual(self.search('remastered'), [])
@@ -0,0 +1,74 @@
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from store.models import Discount, Image, ImageRendition, Storage, Tag
+from vinyl.models import Vinyl
+from vinyl.serializers import VinylSerializer, VinylValuesSerializer
+
+
+def create_rendition_rows(image):
+    for rendition_format in ('webp', 'jpeg'):
+        for width in (320, 160):
+            ImageRendition.objects.create(
+                image=image,
+                width=width,
+                format=rendition_format,
+                file=f'vinyl/renditions/{image.pk}-{width}.{rendition_format}',
+            )
+
+
+class VinylValuesSerializerTest(TestCase):
+    def setUp(self):
+        first_tag = Tag.objects.create(title='Первый')
+        second_tag = Tag.objects.create(title='Second "tag"')
+        rows = (
+            ('Bare', '100.00', None, None, 0),
+            ('Stored', '0.05', 0, None, 1),
+            ('Zero discount', '9.99', 3, 0, 2),
+            ('Discounted ♫', '19.99', 12, 33, 3),
+            ('Rounded', '0.05', 1, 10, 0),
+        )
+        for number, (title, price, quantity, amount, images) in (
+                enumerate(rows)):
+            vinyl = Vinyl.objects.create(
+                title=title,
+                price=price,
+                part_number=f'PN{number}',
+                vinyl_title=title,
+            )
+            if quantity is not None:
+                Storage.objects.create(product=vinyl, quantity=quantity)
+            if amount is not None:
+                Discount.objects.create(product=vinyl, amount=amount)
+            for image in range(images):
+                picture = Image.objects.create(
+                    product=vinyl, image=f'vinyl/images/{number}-{image}.jpg'
+                )
+                if image:
+                    create_rendition_rows(picture)
+            if number % 2:
+                vinyl.tags.add(second_tag, first_tag)
+
+    def test_renders_same_bytes_as_model_serializer(self):
+        renderer = JSONRenderer()
+        expected = renderer.render(VinylSerializer(
+            Vinyl.objects.with_index_data().order_by('pk'), many=True
+        ).data)
+        with self.assertNumQueries(4):
+            rendered = renderer.render(VinylValuesSerializer(
+                Vinyl.objects.with_list_values().order_by('pk'), many=True
+            ).data)
+        self.assertEqual(rendered, expected)
+
+    def test_single_row(self):
+        vinyl = Vinyl.objects.with_index_data().get(title='Rounded')
+        row = Vinyl.objects.with_list_values().get(pk=vinyl.pk)
+        self.assertEqual(VinylValuesSerializer(row).data,
+                         VinylSerializer(vinyl).data)
+
+    def test_empty_page(self):
+        with self.assertNumQueries(1):
+            data = VinylValuesSerializer(
+                Vinyl.objects.with_list_values().filter(title=''), many=True
+            ).data
+        self.assertEqual(data, [])
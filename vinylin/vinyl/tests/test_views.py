@@ -1,6 +1,13 @@
+import time
+from unittest import mock
+
+from django.utils.http import http_date
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from recommendations.models import RelatedProduct
+from store.models import Product, Storage, Tag
+from store.popularity import set_ranked_at
 from vinyl.models import Vinyl
 
 
@@ -29,9 +36,232 @@ class VinylViewSetTest(APITestCase):
     def test_retrieve(self):
         response = self.client.get(f'/api/vinyl/{self.vinyl.pk}/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data.get('id'), self.vinyl.pk)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json().get('id'), self.vinyl.pk)
+
+    def test_retrieve_not_found(self):
+        for pk in (0, 'abc'):
+            response = self.client.get(f'/api/vinyl/{pk}/')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # Products that are not vinyls are never not modified
+        product = Product.objects.create(title='Title', price='10.00')
+        response = self.client.get(
+            f'/api/vinyl/{product.pk}/',
+            HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60),
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_list(self):
         response = self.client.get('/api/vinyl/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data.get('results')), 2)
+        self.assertIsNone(response.data.get('next'))
+        self.assertIsNone(response.data.get('previous'))
+
+    def test_list_keyset_pagination(self):
+        first_page = self.client.get('/api/vinyl/', {'page_size': 1})
+        self.assertEqual(len(first_page.data.get('results')), 1)
+        self.assertIsNone(first_page.data.get('previous'))
+
+        second_page = self.client.get(first_page.data.get('next'))
+        self.assertEqual(len(second_page.data.get('results')), 1)
+        self.assertIsNone(second_page.data.get('next'))
+        self.assertNotEqual(
+            first_page.data['results'][0]['id'],
+            second_page.data['results'][0]['id']
+        )
+
+        previous_page = self.client.get(second_page.data.get('previous'))
+        self.assertEqual(previous_page.data.get('results'),
+                         first_page.data.get('results'))
+
+    def test_list_cursor_past_last_row(self):
+        first_page = self.client.get('/api/vinyl/', {'page_size': 1})
+        first_id = first_page.data['results'][0]['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            Vinyl.objects.exclude(pk=first_id).delete()
+
+        empty_page = self.client.get(first_page.data.get('next'))
+        self.assertEqual(empty_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(empty_page.data.get('results'), [])
+        self.assertIsNone(empty_page.data.get('next'))
+
+        # The previous page is the last one
+        last_page = self.client.get(empty_page.data.get('previous'))
+        self.assertEqual(last_page.data.get('results'),
+                         first_page.data.get('results'))
+        self.assertIsNone(last_page.data.get('next'))
+
+    def test_list_cursor_before_first_row(self):
+        first_page = self.client.get('/api/vinyl/', {'page_size': 1})
+        second_page = self.client.get(first_page.data.get('next'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Vinyl.objects.filter(
+                pk=first_page.data['results'][0]['id']
+            ).delete()
+
+        empty_page = self.client.get(second_page.data.get('previous'))
+        self.assertEqual(empty_page.status_code, status.HTTP_200_OK)
+        self.assertEqual(empty_page.data.get('results'), [])
+        self.assertIsNone(empty_page.data.get('previous'))
+
+        # The next page is the first one
+        next_page = self.client.get(empty_page.data.get('next'))
+        self.assertEqual(next_page.data.get('results'),
+                         second_page.data.get('results'))
+
+    def test_list_invalid_cursor(self):
+        response = self.client.get('/api/vinyl/', {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_ordering_by_price(self):
+        Vinyl.objects.filter(pk=self.vinyl.pk).update(price='5.00')
+        first_page = self.client.get(
+            '/api/vinyl/', {'ordering': 'price', 'page_size': 1}
+        )
+        self.assertEqual(first_page.data['results'][0]['id'], self.vinyl.pk)
+
+        second_page = self.client.get(first_page.data.get('next'))
+        self.assertEqual(len(second_page.data.get('results')), 1)
+        self.assertNotEqual(second_page.data['results'][0]['id'],
+                            self.vinyl.pk)
+
+        descending = self.client.get('/api/vinyl/', {'ordering': '-price'})
+        self.assertEqual(descending.data['results'][-1]['id'], self.vinyl.pk)
+
+    def test_list_ordering_by_popularity(self):
+        other = Vinyl.objects.exclude(pk=self.vinyl.pk).get()
+        Vinyl.objects.filter(pk=self.vinyl.pk).update(sales_count=5,
+                                                      trending_score=0.5)
+        Vinyl.objects.filter(pk=other.pk).update(trending_score=2.25)
+
+        popular = self.client.get('/api/vinyl/', {'ordering': 'popular'})
+        self.assertEqual([item['id'] for item in popular.data['results']],
+                         [self.vinyl.pk, other.pk])
+
+        first_page = self.client.get(
+            '/api/vinyl/', {'ordering': 'trending', 'page_size': 1}
+        )
+        self.assertEqual(first_page.data['results'][0]['id'], other.pk)
+        second_page = self.client.get(first_page.data.get('next'))
+        self.assertEqual(second_page.data['results'][0]['id'], self.vinyl.pk)
+
+    def test_conditional_list_by_popularity(self):
+        params = {'ordering': 'popular'}
+        response = self.client.get('/api/vinyl/', params)
+        set_ranked_at()
+        self.assertNotEqual(
+            self.client.get('/api/vinyl/', params)['ETag'], response['ETag']
+        )
+        newest = self.client.get('/api/vinyl/')
+        set_ranked_at()
+        self.assertEqual(self.client.get('/api/vinyl/')['ETag'],
+                         newest['ETag'])
+
+    def test_list_invalid_ordering(self):
+        response = self.client.get('/api/vinyl/', {'ordering': 'title'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_cursor_of_other_ordering(self):
+        first_page = self.client.get('/api/vinyl/', {'page_size': 1})
+        cursor = first_page.data.get('next').split('cursor=')[1].split('&')[0]
+        response = self.client.get(
+            '/api/vinyl/', {'cursor': cursor, 'ordering': 'price'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_related(self):
+        other = Vinyl.objects.exclude(pk=self.vinyl.pk).get()
+        third = Vinyl.objects.create(title='Third', price='10.00',
+                                     vinyl_title='Third')
+        RelatedProduct.objects.create(product=self.vinyl, related=third,
+                                      count=1, rank=2)
+        RelatedProduct.objects.create(product=self.vinyl, related=other,
+                                      count=2, rank=1)
+
+        response = self.client.get(f'/api/vinyl/{self.vinyl.pk}/related/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.json()],
+                         [other.pk, third.pk])
+
+        response = self.client.get(f'/api/vinyl/{other.pk}/related/')
+        self.assertEqual(response.json(), [])
+
+        response = self.client.get('/api/vinyl/abc/related/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_availability(self):
+        Storage.objects.create(product=self.vinyl, quantity=2)
+        response = self.client.get('/api/vinyl/availability/',
+                                   {'ids': f'{self.vinyl.pk},0'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), [{
+            'id': self.vinyl.pk,
+            'quantity': 2,
+            'in_stock': True,
+            'effective_price': '10.00',
+        }])
+
+        for ids in ('', 'a,b', ','.join(['1'] * 501)):
+            response = self.client.get('/api/vinyl/availability/',
+                                       {'ids': ids})
+            self.assertEqual(response.status_code,
+                             status.HTTP_400_BAD_REQUEST)
+
+    def test_conditional_retrieve(self):
+        path = f'/api/vinyl/{self.vinyl.pk}/'
+        response = self.client.get(path)
+        etag = response['ETag']
+
+        not_modified = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified.content, b'')
+
+        not_modified = self.client.get(
+            path, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(not_modified.status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+        Storage.objects.create(product=self.vinyl, quantity=3)
+        modified = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(modified.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(modified['ETag'], etag)
+
+    def test_conditional_list(self):
+        response = self.client.get('/api/vinyl/')
+        not_modified = self.client.get(
+            '/api/vinyl/', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(not_modified.status_code,
+                         status.HTTP_304_NOT_MODIFIED)
+
+        other_page = self.client.get(
+            '/api/vinyl/', {'page_size': 1},
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(other_page.status_code, status.HTTP_200_OK)
+
+        modified = self.client.get(
+            '/api/vinyl/', HTTP_IF_MODIFIED_SINCE=http_date(0)
+        )
+        self.assertEqual(modified.status_code, status.HTTP_200_OK)
+
+    def test_last_modified_follows_catalog_version(self):
+        path = f'/api/vinyl/{self.vinyl.pk}/'
+        responses = [self.client.get(url) for url in ('/api/vinyl/', path)]
+
+        # Neither a deletion nor a new tag changes updated_at
+        with mock.patch('vinyl.cache.time.time',
+                        return_value=time.time() + 10):
+            with self.captureOnCommitCallbacks(execute=True):
+                Vinyl.objects.exclude(pk=self.vinyl.pk).delete()
+                self.vinyl.tags.add(Tag.objects.create(title='Tag'))
+
+        for response, url in zip(responses, ('/api/vinyl/', path)):
+            modified = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+            self.assertEqual(modified.status_code, status.HTTP_200_OK)
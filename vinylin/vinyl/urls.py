@@ -1,9 +1,10 @@
 from rest_framework.routers import SimpleRouter
 
-from vinyl.views import VinylViewSet
+from vinyl.views import AutocompleteViewSet, VinylViewSet
 
 
 router = SimpleRouter()
+router.register(r'autocomplete', AutocompleteViewSet, basename='autocomplete')
 router.register(r'', VinylViewSet)
 
 urlpatterns = router.urls
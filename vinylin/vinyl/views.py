@@ -1,14 +1,257 @@
-from rest_framework.viewsets import ReadOnlyModelViewSet
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.viewsets import ReadOnlyModelViewSet, ViewSet
 
+from store.availability import MAX_AVAILABILITY_IDS, get_availability
+from store.popularity import count_view
+from vinyl.autocomplete import (
+    AUTOCOMPLETE_LIMIT,
+    AUTOCOMPLETE_MAX_LIMIT,
+    AUTOCOMPLETE_MODELS,
+    autocomplete,
+)
+from vinyl.cache import CatalogCacheMixin, get_cache_stats
+from vinyl.conditions import (
+    catalog_etag,
+    catalog_last_modified,
+    vinyl_etag,
+    vinyl_last_modified,
+)
+from vinyl.documents import get_vinyl_document
+from vinyl.exporter import EXPORT_FORMATS, iter_export
+from vinyl.facets import count_facets
+from vinyl.filters import CatalogFilterBackend
 from vinyl.models import Vinyl
-from vinyl.serializers import VinylSerializer, RetrieveVinylSerializer
+from vinyl.pagination import KeysetPagination
+from vinyl.renderers import CatalogJSONRenderer, RawJSON
+from vinyl.search import search_vinyls
+from vinyl.serializers import (
+    VinylSerializer,
+    VinylValuesSerializer,
+    RetrieveVinylSerializer,
+)
 
 
-class VinylViewSet(ReadOnlyModelViewSet):
+class VinylViewSet(CatalogCacheMixin, ReadOnlyModelViewSet):
     model = Vinyl
     queryset = Vinyl.objects.all()
+    pagination_class = KeysetPagination
+    renderer_classes = (CatalogJSONRenderer,)
+    filter_backends = (CatalogFilterBackend,)
+    ordering_param = 'ordering'
+    keyset_orderings = {
+        'newest': ('-created_at', '-pk'),
+        'price': ('effective_price', 'pk'),
+        '-price': ('-effective_price', '-pk'),
+        'popular': ('-sales_count', '-pk'),
+        'trending': ('-trending_score', '-pk'),
+    }
+
+    @property
+    def keyset_ordering(self):
+        name = self.request.query_params.get(self.ordering_param, 'newest')
+        if name not in self.keyset_orderings:
+            raise ValidationError({self.ordering_param: [
+                f'Expected one of: {", ".join(self.keyset_orderings)}.'
+            ]})
+        return self.keyset_orderings[name]
+
+    def get_queryset(self):
+        if self.action == 'retrieve':
+            return Vinyl.objects.with_all_data()
+        if self.action == 'list':
+            return Vinyl.objects.with_list_values()
+        return Vinyl.objects.with_index_data()
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return RetrieveVinylSerializer
+        # The schema of the list is described by the model serializer
+        if self.action == 'list' and not getattr(self, 'swagger_fake_view',
+                                                 False):
+            return VinylValuesSerializer
         return VinylSerializer
+
+    @method_decorator(condition(etag_func=catalog_etag,
+                                last_modified_func=catalog_last_modified))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @method_decorator(condition(etag_func=vinyl_etag,
+                                last_modified_func=vinyl_last_modified))
+    def retrieve(self, request, *args, **kwargs):
+        response = self.get_cached_response(self.retrieve_document, request,
+                                            *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            count_view(int(kwargs[self.lookup_field]))
+        return response
+
+    def retrieve_document(self, request, *args, **kwargs):
+        """
+        The detail is assembled by PostgreSQL as RetrieveVinylSerializer
+        would render it and is passed to the client as is
+        """
+        try:
+            pk = int(kwargs[self.lookup_field])
+        except ValueError:
+            raise Http404
+        document = get_vinyl_document(pk)
+        if document is None:
+            raise Http404
+        return Response(data=RawJSON(document), status=status.HTTP_200_OK)
+
+    @action(url_path='related', methods=['GET'], detail=True,
+            pagination_class=None, filter_backends=())
+    def related(self, request, *args, **kwargs):
+        """
+        Vinyls most often bought together with this one, read from
+        the neighbours ranked by recommendations.bought_together
+        """
+        return self.get_ranked_response('related_to', **kwargs)
+
+    @action(url_path='similar', methods=['GET'], detail=True,
+            pagination_class=None, filter_backends=())
+    def similar(self, request, *args, **kwargs):
+        """
+        Vinyls sharing most genres, tags, artist and country with this
+        one, ranked by recommendations.similarity
+        """
+        return self.get_ranked_response('similar_to', **kwargs)
+
+    def get_ranked_response(self, relation, **kwargs):
+        """Vinyls ranked for this one in `relation`, in 1 indexed query"""
+        try:
+            pk = int(kwargs[self.lookup_field])
+        except ValueError:
+            raise Http404
+        queryset = (
+            Vinyl.objects.with_list_values()
+                         .filter(**{f'{relation}__product_id': pk})
+                         .order_by(f'{relation}__rank')
+        )
+        serializer = VinylValuesSerializer(queryset, many=True)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
+    @action(url_path='search', methods=['GET'], detail=False)
+    def search(self, request, *args, **kwargs):
+        """Ranked full-text search, returns up to `page_size` best matches"""
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response(
+                data={'q': ['This query parameter is required.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = search_vinyls(queryset, text)
+        queryset = queryset[:self.paginator.get_page_size(request)]
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
+    @action(url_path='availability', methods=['GET'], detail=False,
+            pagination_class=None, filter_backends=())
+    def availability(self, request, *args, **kwargs):
+        """
+        Stock and effective price of up to MAX_AVAILABILITY_IDS vinyls
+        by comma-separated `ids`, in their order, unknown ids skipped
+        """
+        ids = request.query_params.get('ids', '').split(',')
+        try:
+            ids = [int(pk) for pk in ids if pk.strip()]
+        except ValueError:
+            ids = None
+        if not ids or len(ids) > MAX_AVAILABILITY_IDS:
+            return Response(
+                data={'ids': [
+                    f'Expected 1 to {MAX_AVAILABILITY_IDS} comma-separated '
+                    f'integers.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(data=get_availability(ids), status=status.HTTP_200_OK)
+
+    @action(url_path='facets', methods=['GET'], detail=False,
+            pagination_class=None)
+    def facets(self, request, *args, **kwargs):
+        """Facet value counts of the vinyls matching the filters"""
+        queryset = self.filter_queryset(Vinyl.objects.all())
+        return Response(data=count_facets(queryset), status=status.HTTP_200_OK)
+
+    @action(url_path='cache-stats', methods=['GET'], detail=False,
+            pagination_class=None, filter_backends=(),
+            permission_classes=(IsAdminUser,))
+    def cache_stats(self, request, *args, **kwargs):
+        """Response cache hits and misses per catalog action"""
+        stats = get_cache_stats(self.cached_actions)
+        return Response(data=stats, status=status.HTTP_200_OK)
+
+    @action(url_path='export', methods=['GET'], detail=False,
+            pagination_class=None, permission_classes=(IsAdminUser,))
+    def export(self, request, *args, **kwargs):
+        """
+        Streams every vinyl matching the filters as JSON Lines or CSV
+        with stock and effective price. `export_format` is used because
+        `format` selects the renderer in DRF.
+        """
+        export_format = request.query_params.get('export_format', 'jsonl')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                data={'export_format': [
+                    f'Expected one of: {", ".join(EXPORT_FORMATS)}.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(Vinyl.objects.all())
+        content_type = {
+            'jsonl': 'application/x-ndjson',
+            'csv': 'text/csv',
+        }[export_format]
+        response = StreamingHttpResponse(
+            iter_export(queryset, export_format),
+            content_type=f'{content_type}; charset=utf-8',
+        )
+        filename = f'catalog-{timezone.now():%Y%m%d}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename={filename}'
+        return response
+
+
+class AutocompleteViewSet(ViewSet):
+    """
+    Typeahead of artists, genres, countries and tags, e.g.
+    `autocomplete/artists/?q=bea&limit=5`, see vinyl.autocomplete
+    """
+    lookup_field = 'name'
+    lookup_value_regex = '|'.join(AUTOCOMPLETE_MODELS)
+
+    def retrieve(self, request, name=None):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                data={'q': ['This query parameter is required.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params.get('limit',
+                                                 AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= AUTOCOMPLETE_MAX_LIMIT:
+            return Response(
+                data={'limit': [
+                    f'Expected an integer from 1 to {AUTOCOMPLETE_MAX_LIMIT}.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        data = [
+            {'id': pk, 'name': value}
+            for pk, value in autocomplete(name, query[:100], limit)
+        ]
+        return Response(data=data, status=status.HTTP_200_OK)
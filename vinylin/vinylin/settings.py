@@ -35,6 +35,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # Installed apps:
     'phonenumber_field',
@@ -49,6 +50,7 @@ INSTALLED_APPS = [
     'store',
     'vinyl',
     'orders',
+    'recommendations',
 ]
 
 MIDDLEWARE = [
@@ -168,6 +170,7 @@ MEDIA_URL = '/media/'
 
 CKEDITOR_BASEPATH = '/static/ckeditor/ckeditor/'
 CKEDITOR_UPLOAD_PATH = '/ckeditor_uploads/'
+CKEDITOR_STORAGE_BACKEND = 'store.storage.ContentAddressedStorage'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -180,6 +183,9 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.JSONParser',
     ]
 }
+CATALOG_PAGE_SIZE = int(os.environ.get('CATALOG_PAGE_SIZE', 24))
+CATALOG_MAX_PAGE_SIZE = int(os.environ.get('CATALOG_MAX_PAGE_SIZE', 100))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(
         minutes=int(os.environ.get('ACCESS_TOKEN_LIFETIME', 5))
@@ -192,12 +198,60 @@ SIMPLE_JWT = {
 REDIS_HOST = os.environ.get('REDIS_HOST')
 REDIS_PORT = os.environ.get('REDIS_PORT')
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT}/1',
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            # Redis outage makes cache reads misses instead of errors
+            'IGNORE_EXCEPTIONS': True,
+        },
+    }
+}
+COUNTERS_REDIS_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/2'
+# Serve bulk availability from a Redis copy of stock and prices
+AVAILABILITY_MIRROR = bool(int(os.environ.get('AVAILABILITY_MIRROR', 0)))
+AVAILABILITY_REDIS_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/3'
+# Keep cart lines in Redis until checkout instead of a row per change
+REDIS_CART = bool(int(os.environ.get('REDIS_CART', 0)))
+CART_REDIS_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/4'
+CATALOG_CACHE_TIMEOUT = int(os.environ.get('CATALOG_CACHE_TIMEOUT', 300))
+
 CELERY_BROKER_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}'
 CELERY_BROKER_TRANSPORT_OPTION = {'visibility_timeout': 3600}
 CELERY_RESULT_BACKEND = f'redis://{REDIS_HOST}:{REDIS_PORT}'
 CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
+CELERY_BEAT_SCHEDULE = {
+    'sync-availability-mirror': {
+        'task': 'store.tasks.sync_availability_mirror_task',
+        'schedule': timedelta(minutes=15),
+    },
+    # Campaigns start and end within a minute of their time
+    'sync-discount-campaigns': {
+        'task': 'store.tasks.sync_discount_campaigns_task',
+        'schedule': timedelta(minutes=1),
+    },
+    'flush-popularity-counters': {
+        'task': 'store.tasks.flush_popularity_counters_task',
+        'schedule': timedelta(minutes=5),
+    },
+    # decay_trending_scores halves scores by the hour
+    'decay-trending-scores': {
+        'task': 'store.tasks.decay_trending_scores_task',
+        'schedule': timedelta(hours=1),
+    },
+    'refresh-bought-together': {
+        'task': 'recommendations.tasks.refresh_bought_together_task',
+        'schedule': timedelta(hours=1),
+    },
+    'refresh-similar-vinyls': {
+        'task': 'recommendations.tasks.refresh_similar_vinyls_task',
+        'schedule': timedelta(minutes=10),
+    },
+}
 
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {